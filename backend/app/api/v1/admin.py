@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from app.core.profiling import profile_store
+from app.models.user import User, UserRole
+from app.api.v1.auth import get_current_user
+
+router = APIRouter()
+
+
+# Dependency to require an admin user
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Get current user, requiring the admin role"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    
+    return current_user
+
+
+@router.get("/profiles")
+async def list_profiles(current_user: User = Depends(get_current_admin)):
+    """List stored request profiles, newest first"""
+    profiles = profile_store.list()
+    
+    return {
+        "total_profiles": len(profiles),
+        "profiles": profiles
+    }
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile_report(
+    profile_id: str,
+    sort: str = "cumulative",
+    limit: int = 50,
+    current_user: User = Depends(get_current_admin)
+):
+    """Get a text report of the hottest functions in a profile"""
+    if sort not in ["cumulative", "tottime", "calls", "ncalls"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported sort key"
+        )
+    
+    report = profile_store.report(profile_id, sort=sort, limit=limit)
+    
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    
+    return report
+
+
+@router.get("/profiles/{profile_id}/pstats")
+async def download_profile(
+    profile_id: str,
+    current_user: User = Depends(get_current_admin)
+):
+    """Download the raw pstats file for offline analysis"""
+    path = profile_store.path(profile_id)
+    
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.pstats")
@@ -1,24 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
 
 from app.core.database import get_db
+from app.core.response_cache import response_cache
 from app.models.user import User
 from app.models.decision import Decision
 from app.models.bias_analysis import BiasAnalysis
+from app.models.disparity_scan import DisparityScanResult
+from app.models.outcome_metrics import OutcomeFairnessResult
 from app.api.v1.auth import get_current_user
+from app.services.container import services
 
 router = APIRouter()
 
 
+def serialize_scan_row(row: DisparityScanResult) -> dict:
+    """Helper function to shape a stored scan row for responses"""
+    return {
+        "decision_type": row.decision_type,
+        "attribute": row.attribute,
+        "department": row.department,
+        "group_value": row.group_value,
+        "decision_count": row.decision_count,
+        "positive_count": row.positive_count,
+        "selection_rate": row.selection_rate,
+        "mean_outcome": row.mean_outcome,
+        "disparity_ratio": row.disparity_ratio,
+        "z_score": {
+            "mean": row.z_score_mean,
+            "std": row.z_score_std,
+            "p50": row.z_score_p50,
+            "p90": row.z_score_p90,
+            "outlier_share": row.outlier_share
+        }
+    }
+
+
 @router.get("/dashboard")
 async def get_dashboard_metrics(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get dashboard metrics and statistics"""
+    # The "recent" window moves with the date even when no data changes
+    return response_cache.respond(
+        request, current_user, lambda: compute_dashboard_metrics(current_user, db),
+        vary=datetime.utcnow().date().isoformat()
+    )
+
+
+def compute_dashboard_metrics(
+    current_user: User,
+    db: Session
+) -> dict:
+    """Get dashboard metrics and statistics (uncached)"""
     
     # Total decisions
     total_decisions = db.query(Decision).filter(
@@ -73,11 +112,25 @@ async def get_dashboard_metrics(
 
 @router.get("/bias-trends")
 async def get_bias_trends(
+    request: Request,
     days: int = 30,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get bias risk trends over time"""
+    # The window moves with the date even when no data changes
+    return response_cache.respond(
+        request, current_user, lambda: compute_bias_trends(current_user, db, days),
+        vary=datetime.utcnow().date().isoformat()
+    )
+
+
+def compute_bias_trends(
+    current_user: User,
+    db: Session,
+    days: int
+) -> dict:
+    """Get bias risk trends over time (uncached)"""
     
     start_date = datetime.utcnow() - timedelta(days=days)
     
@@ -111,10 +164,21 @@ async def get_bias_trends(
 
 @router.get("/fairness-metrics")
 async def get_fairness_metrics(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get organizational fairness metrics"""
+    return response_cache.respond(
+        request, current_user, lambda: compute_fairness_metrics(current_user, db)
+    )
+
+
+def compute_fairness_metrics(
+    current_user: User,
+    db: Session
+) -> dict:
+    """Get organizational fairness metrics (uncached)"""
     
     # Get all bias analyses for this user
     analyses = db.query(BiasAnalysis).join(Decision).filter(
@@ -159,6 +223,153 @@ async def get_fairness_metrics(
     }
 
 
+@router.post("/org-scan")
+async def run_org_scan(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Scan every stored decision of the organization for selection-rate disparities"""
+    
+    result = services.org_scanner.run_scan(db, current_user.organization_id)
+    
+    return {
+        "scan_id": result.scan_id,
+        "decisions_scanned": result.decisions_scanned,
+        "groups": len(result.rows),
+        "flagged_groups": result.flagged_groups
+    }
+
+
+@router.get("/org-scan")
+async def get_org_scan(
+    decision_type: Optional[str] = None,
+    attribute: Optional[str] = None,
+    department: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the latest org-wide disparity scan summary"""
+    
+    latest = db.query(DisparityScanResult.scan_id, DisparityScanResult.created_at).filter(
+        DisparityScanResult.organization_id == current_user.organization_id
+    ).order_by(DisparityScanResult.created_at.desc()).first()
+    
+    if not latest:
+        return {
+            "scan_id": None,
+            "message": "No org scan has been run yet"
+        }
+    
+    query = db.query(DisparityScanResult).filter(
+        DisparityScanResult.scan_id == latest.scan_id
+    )
+    
+    if decision_type:
+        query = query.filter(DisparityScanResult.decision_type == decision_type)
+    
+    if attribute:
+        query = query.filter(DisparityScanResult.attribute == attribute)
+    
+    if department:
+        query = query.filter(DisparityScanResult.department == department)
+    
+    rows = query.all()
+    
+    return {
+        "scan_id": latest.scan_id,
+        "scanned_at": latest.created_at.isoformat(),
+        "total_groups": len(rows),
+        "results": [serialize_scan_row(row) for row in rows]
+    }
+
+
+def serialize_outcome_row(row: OutcomeFairnessResult) -> dict:
+    """Helper function to shape a stored outcome metrics row for responses"""
+    return {
+        "decision_type": row.decision_type,
+        "outcome": row.outcome,
+        "attribute": row.attribute,
+        "group_value": row.group_value,
+        "decision_count": row.decision_count,
+        "confusion_matrix": {
+            "true_positive": row.true_positive,
+            "false_positive": row.false_positive,
+            "true_negative": row.true_negative,
+            "false_negative": row.false_negative
+        },
+        "true_positive_rate": row.true_positive_rate,
+        "false_positive_rate": row.false_positive_rate,
+        "precision": row.precision,
+        "equal_opportunity_gap": row.equal_opportunity_gap,
+        "equalized_odds_gap": row.equalized_odds_gap,
+        "calibration_error": row.calibration_error,
+        "calibration": row.calibration
+    }
+
+
+@router.post("/outcome-metrics")
+async def run_outcome_metrics(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Evaluate finalized decisions against later retention and ratings, per protected group"""
+    
+    result = services.outcome_metrics.run(db, current_user.organization_id)
+    
+    return {
+        "run_id": result.run_id,
+        "decisions_scanned": result.decisions_scanned,
+        "groups": len(result.rows),
+        "max_equal_opportunity_gap": max(
+            (row["equal_opportunity_gap"] for row in result.rows if row["equal_opportunity_gap"] is not None),
+            default=None
+        )
+    }
+
+
+@router.get("/outcome-metrics")
+async def get_outcome_metrics(
+    decision_type: Optional[str] = None,
+    outcome: Optional[str] = None,
+    attribute: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the latest equal opportunity, equalized odds and calibration metrics"""
+    
+    latest = db.query(OutcomeFairnessResult.run_id, OutcomeFairnessResult.created_at).filter(
+        OutcomeFairnessResult.organization_id == current_user.organization_id
+    ).order_by(OutcomeFairnessResult.created_at.desc()).first()
+    
+    if not latest:
+        return {
+            "run_id": None,
+            "message": "Outcome metrics have not been computed yet"
+        }
+    
+    query = db.query(OutcomeFairnessResult).filter(
+        OutcomeFairnessResult.run_id == latest.run_id
+    )
+    
+    if decision_type:
+        query = query.filter(OutcomeFairnessResult.decision_type == decision_type)
+    
+    if outcome:
+        query = query.filter(OutcomeFairnessResult.outcome == outcome)
+    
+    if attribute:
+        query = query.filter(OutcomeFairnessResult.attribute == attribute)
+    
+    rows = query.all()
+    
+    return {
+        "run_id": latest.run_id,
+        "computed_at": latest.created_at.isoformat(),
+        "total_groups": len(rows),
+        "results": [serialize_outcome_row(row) for row in rows]
+    }
+
+
 @router.post("/export-audit")
 async def export_audit_logs(
     format: str = "json",
@@ -178,6 +389,9 @@ async def export_audit_logs(
         Decision.created_by == current_user.id
     ).all()
     
+    # Hot and archived entries of every decision in one pass per tier
+    histories = services.audit.histories(db, {decision.id: decision.created_at for decision in decisions})
+    
     export_data = []
     
     for decision in decisions:
@@ -194,7 +408,7 @@ async def export_audit_logs(
                     "details": log.details,
                     "timestamp": log.created_at.isoformat()
                 }
-                for log in decision.audit_logs
+                for log in histories[decision.id]
             ]
         }
         
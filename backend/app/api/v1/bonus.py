@@ -0,0 +1,235 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+
+from app.core.database import get_db
+from app.models.user import User, UserRole
+from app.models.audit_log import AuditLog
+from app.models.bonus import BonusDistribution, BonusAllocation, BonusDistributionStatus
+from app.api.v1.auth import get_current_user
+from app.services.container import services
+
+router = APIRouter()
+
+# Allowed status changes after calculation
+STATUS_TRANSITIONS = {
+    BonusDistributionStatus.CALCULATED.value: {BonusDistributionStatus.APPROVED.value},
+    BonusDistributionStatus.APPROVED.value: {BonusDistributionStatus.PAID.value}
+}
+
+
+# Pydantic schemas
+class BonusDistributionCreate(BaseModel):
+    name: str
+    total_amount: float = Field(..., gt=0)
+    date_range_start: Optional[date] = None
+    date_range_end: Optional[date] = None
+    eligible_departments: Optional[List[str]] = None
+    eligible_employees: Optional[List[str]] = None
+
+
+class BonusCalculationRequest(BaseModel):
+    employee_attributes: Dict[str, Dict[str, Any]] = {}  # Extra profile fields per employee id, e.g. gender
+
+
+class BonusStatusUpdate(BaseModel):
+    status: BonusDistributionStatus
+
+
+class BonusDistributionResponse(BaseModel):
+    id: str
+    name: str
+    total_amount: float
+    date_range_start: Optional[date]
+    date_range_end: Optional[date]
+    eligible_departments: Optional[List[str]]
+    eligible_employees: Optional[List[str]]
+    status: str
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class BonusAllocationResponse(BaseModel):
+    id: str
+    employee_id: str
+    contribution_percentage: float
+    bonus_amount: float
+    calculation_details: dict
+    risk_score: Optional[float]
+    risk_level: Optional[str]
+    
+    class Config:
+        from_attributes = True
+
+
+# Dependency to require a user allowed to manage bonus pools
+async def get_bonus_manager(current_user: User = Depends(get_current_user)) -> User:
+    """Get current user, requiring the HR manager or admin role"""
+    if current_user.role not in (UserRole.HR_MANAGER, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="HR manager or admin privileges required"
+        )
+    
+    return current_user
+
+
+def get_distribution_or_404(db: Session, distribution_id: str, current_user: User) -> BonusDistribution:
+    """Helper function to load a distribution of the user's organization"""
+    distribution = db.query(BonusDistribution).filter(
+        BonusDistribution.id == distribution_id,
+        BonusDistribution.organization_id == current_user.organization_id
+    ).first()
+    
+    if not distribution:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bonus distribution not found"
+        )
+    
+    return distribution
+
+
+def log_distribution_action(db: Session, distribution: BonusDistribution, user: User, action: str, details: dict = None):
+    """Helper function to log distribution changes to the audit trail (caller commits)"""
+    db.add(AuditLog(
+        user_id=user.id,
+        action=action,
+        details={
+            "distribution_id": distribution.id,
+            "total_amount": distribution.total_amount,
+            **(details or {})
+        }
+    ))
+
+
+@router.post("/distributions", response_model=BonusDistributionResponse, status_code=status.HTTP_201_CREATED)
+async def create_distribution(
+    distribution_data: BonusDistributionCreate,
+    current_user: User = Depends(get_bonus_manager),
+    db: Session = Depends(get_db)
+):
+    """Create a draft bonus pool"""
+    distribution = BonusDistribution(
+        organization_id=current_user.organization_id,
+        created_by=current_user.id,
+        **distribution_data.model_dump()
+    )
+    
+    db.add(distribution)
+    db.flush()
+    log_distribution_action(db, distribution, current_user, "bonus_distribution_created")
+    db.commit()
+    db.refresh(distribution)
+    
+    return distribution
+
+
+@router.get("/distributions", response_model=List[BonusDistributionResponse])
+async def list_distributions(
+    skip: int = 0,
+    limit: int = 50,
+    status_filter: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List the organization's bonus pools, newest first"""
+    query = db.query(BonusDistribution).filter(
+        BonusDistribution.organization_id == current_user.organization_id
+    )
+    
+    if status_filter:
+        query = query.filter(BonusDistribution.status == status_filter)
+    
+    return query.order_by(BonusDistribution.created_at.desc()).offset(skip).limit(limit).all()
+
+
+@router.get("/distributions/{distribution_id}")
+async def get_distribution(
+    distribution_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get a bonus pool with a page of its allocations, largest first"""
+    distribution = get_distribution_or_404(db, distribution_id, current_user)
+    
+    allocations = db.query(BonusAllocation).filter(
+        BonusAllocation.distribution_id == distribution.id
+    ).order_by(BonusAllocation.bonus_amount.desc(), BonusAllocation.employee_id).offset(skip).limit(limit).all()
+    
+    return {
+        "distribution": BonusDistributionResponse.model_validate(distribution),
+        "allocations": [BonusAllocationResponse.model_validate(a) for a in allocations]
+    }
+
+
+@router.post("/distributions/{distribution_id}/calculate")
+async def calculate_distribution(
+    distribution_id: str,
+    calculation: Optional[BonusCalculationRequest] = None,
+    current_user: User = Depends(get_bonus_manager),
+    db: Session = Depends(get_db)
+):
+    """
+    Compute the allocations of a bonus pool
+    
+    Replaces any previous calculation. Each allocation is screened for bias
+    as a compensation decision against the rest of the pool.
+    """
+    distribution = get_distribution_or_404(db, distribution_id, current_user)
+    
+    try:
+        summary = services.bonus.calculate(
+            db,
+            distribution,
+            employee_attributes=calculation.employee_attributes if calculation else None
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    log_distribution_action(db, distribution, current_user, "bonus_distribution_calculated", summary)
+    db.commit()
+    
+    return {
+        "distribution_id": distribution.id,
+        "status": distribution.status,
+        **summary
+    }
+
+
+@router.put("/distributions/{distribution_id}/status", response_model=BonusDistributionResponse)
+async def update_distribution_status(
+    distribution_id: str,
+    status_update: BonusStatusUpdate,
+    current_user: User = Depends(get_bonus_manager),
+    db: Session = Depends(get_db)
+):
+    """Approve a calculated pool, or mark an approved pool as paid"""
+    distribution = get_distribution_or_404(db, distribution_id, current_user)
+    new_status = status_update.status.value
+    
+    if new_status not in STATUS_TRANSITIONS.get(distribution.status, set()):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot change a {distribution.status} distribution to {new_status}"
+        )
+    
+    previous_status = distribution.status
+    distribution.status = new_status
+    log_distribution_action(db, distribution, current_user, f"bonus_distribution_{new_status}", {
+        "previous_status": previous_status
+    })
+    db.commit()
+    db.refresh(distribution)
+    
+    return distribution
@@ -1,20 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
+from sqlalchemy.orm import Session, defer
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError
 from datetime import datetime
 import json
 import csv
 import io
+import math
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.models.user import User
 from app.models.decision import Decision, DecisionType, DecisionStatus
-from app.models.bias_analysis import BiasAnalysis, Explanation
+from app.models.bias_analysis import Explanation
 from app.models.audit_log import AuditLog
 from app.api.v1.auth import get_current_user
-from app.services.bias_detection import BiasDetectionService
-from app.services.explainability import ExplainabilityService
+from app.core.metrics import record_cache
+from app.core.rate_limit import RateLimitExceeded
+from app.core.response_cache import response_cache
+from app.services.bulk_decisions import bulk_create_decisions, parse_bulk_payload
+from app.services.decision_attributes import attribute_values, build_decision_attributes, refresh_decision_attributes
+from app.services.container import services
+from app.services.decision_claims import DecisionBusy
 
 router = APIRouter()
 
@@ -24,13 +32,26 @@ class DecisionCreate(BaseModel):
     decision_type: str
     employee_data: dict
     comparable_cohort: Optional[List[dict]] = None
+    auto_select_cohort: bool = True  # Select peers server-side when no cohort is supplied
+
+
+class DecisionUpdate(BaseModel):
+    employee_data: Optional[dict] = None
+    comparable_cohort: Optional[List[dict]] = None
+
+
+class DecisionBulkItem(BaseModel):
+    decision_type: DecisionType
+    employee_data: dict
+    comparable_cohort: Optional[List[dict]] = None
+    idempotency_key: Optional[str] = Field(None, min_length=1, max_length=255)
 
 
 class DecisionResponse(BaseModel):
     id: str
     decision_type: str
     employee_data: dict
-    comparable_cohort: Optional[dict]
+    comparable_cohort: Optional[List[dict]]
     status: str
     created_at: datetime
     finalized_at: Optional[datetime]
@@ -43,7 +64,7 @@ class BiasAnalysisResponse(BaseModel):
     id: str
     risk_score: float
     risk_level: str
-    detected_patterns: dict
+    detected_patterns: List[dict]
     fairness_metrics: dict
     comparable_outcomes: dict
     
@@ -54,8 +75,9 @@ class BiasAnalysisResponse(BaseModel):
 class ExplanationResponse(BaseModel):
     id: str
     justification: str
-    key_factors: dict
-    alternatives: dict
+    key_factors: List[dict]
+    alternatives: List[str]
+    source: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -67,11 +89,6 @@ class DecisionDetailResponse(BaseModel):
     explanation: Optional[ExplanationResponse]
 
 
-# Initialize services
-bias_service = BiasDetectionService()
-explainability_service = ExplainabilityService()
-
-
 def log_action(
     db: Session,
     decision_id: str,
@@ -90,13 +107,27 @@ def log_action(
     db.commit()
 
 
+@asynccontextmanager
+async def claim_decision(decision_id: str, operation: str):
+    """Helper to keep other requests and workers off a decision while it is worked on"""
+    try:
+        async with services.claims.hold(decision_id, operation):
+            yield
+    except DecisionBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
 @router.post("/upload", status_code=status.HTTP_200_OK)
 async def upload_decision_data(
     file: UploadFile = File(...),
+    decision_type: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Upload decision data from CSV/JSON file"""
+    """Upload decision data from CSV/JSON file, storing each record as a decision if decision_type is given"""
     try:
         contents = await file.read()
         
@@ -111,19 +142,124 @@ async def upload_decision_data(
                 detail="Unsupported file format. Please upload CSV or JSON."
             )
         
-        return {
+        response = {
             "message": "File uploaded successfully",
             "records": len(data) if isinstance(data, list) else 1,
             "data": data
         }
+        
+        if decision_type:
+            records = data if isinstance(data, list) else [data]
+            # Profiles naming an employee get the aggregated performance rating when they lack one
+            for start in range(0, len(records), settings.BULK_CREATE_CHUNK_SIZE):
+                services.ratings.fill_performance_ratings(
+                    db, current_user.organization_id, records[start:start + settings.BULK_CREATE_CHUNK_SIZE]
+                )
+            new_decisions = []
+            for record in records:
+                new_decision = Decision(
+                    decision_type=DecisionType(decision_type),
+                    employee_data=record,
+                    created_by=current_user.id,
+                    organization_id=current_user.organization_id
+                )
+                new_decision.attributes = build_decision_attributes(new_decision)
+                new_decisions.append(new_decision)
+            
+            db.add_all(new_decisions)
+            db.flush()
+            pool_rows = [attribute_values(new_decision.attributes) for new_decision in new_decisions]
+            db.add_all([
+                AuditLog(
+                    decision_id=new_decision.id,
+                    user_id=current_user.id,
+                    action="decision_created",
+                    details={"decision_type": decision_type, "source": "upload"}
+                )
+                for new_decision in new_decisions
+            ])
+            db.commit()
+            services.cohort.add_decisions(current_user.organization_id, decision_type, pool_rows)
+            response_cache.invalidate(current_user.organization_id)
+            
+            response["created_ids"] = [str(new_decision.id) for new_decision in new_decisions]
+        
+        return response
     
+    except HTTPException:
+        raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error processing file: {str(e)}"
         )
 
 
+@router.post("/bulk", status_code=status.HTTP_200_OK)
+async def bulk_create_decisions_endpoint(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create many decisions from a JSON array or NDJSON body
+    
+    Every row is validated before anything is written; invalid rows are
+    reported in errors and the rest are inserted in chunks. Rows with an
+    idempotency_key seen before for this user are returned as duplicates.
+    """
+    try:
+        raw_rows = parse_bulk_payload(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid request body: {str(e)}"
+        )
+    
+    if len(raw_rows) > settings.BULK_CREATE_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_CREATE_MAX_ROWS} decisions per request"
+        )
+    
+    rows, errors = [], []
+    for index, raw in enumerate(raw_rows):
+        if isinstance(raw, ValueError):
+            errors.append({"index": index, "errors": [{"loc": [], "msg": str(raw)}]})
+            continue
+        try:
+            item = DecisionBulkItem.model_validate(raw)
+        except ValidationError as e:
+            errors.append({
+                "index": index,
+                "errors": [{"loc": list(error["loc"]), "msg": error["msg"]} for error in e.errors()]
+            })
+            continue
+        rows.append({
+            "index": index,
+            "decision_type": item.decision_type.value,
+            "employee_data": item.employee_data,
+            "comparable_cohort": item.comparable_cohort,
+            "idempotency_key": item.idempotency_key
+        })
+    
+    result = bulk_create_decisions(db, rows, current_user, settings.BULK_CREATE_CHUNK_SIZE, services.ratings)
+    result.errors.extend(errors)
+    
+    if result.created:
+        for decision_type in {row["decision_type"] for row in result.created}:
+            services.cohort.add_decisions(current_user.organization_id, decision_type, [
+                row["attributes"] for row in result.created if row["decision_type"] == decision_type
+            ])
+        response_cache.invalidate(current_user.organization_id)
+        for row in result.created:
+            if row["comparable_cohort"]:
+                services.cohort.store.save(row["id"], row["comparable_cohort"])
+    
+    return result.to_dict(len(raw_rows))
+
+
 @router.post("/create", response_model=DecisionResponse, status_code=status.HTTP_201_CREATED)
 async def create_decision(
     decision_data: DecisionCreate,
@@ -131,6 +267,13 @@ async def create_decision(
     db: Session = Depends(get_db)
 ):
     """Create a new decision record"""
+    # Profiles naming an employee get the aggregated performance rating when they lack one
+    services.ratings.fill_performance_ratings(
+        db,
+        current_user.organization_id,
+        [decision_data.employee_data, *(decision_data.comparable_cohort or [])]
+    )
+    
     # Create decision
     new_decision = Decision(
         decision_type=DecisionType(decision_data.decision_type),
@@ -139,10 +282,24 @@ async def create_decision(
         created_by=current_user.id,
         organization_id=current_user.organization_id
     )
+    new_decision.attributes = build_decision_attributes(new_decision)
     
     db.add(new_decision)
+    
+    if not decision_data.comparable_cohort and decision_data.auto_select_cohort:
+        db.flush()
+        services.cohort.assign_cohort(db, new_decision)
+    
     db.commit()
     db.refresh(new_decision)
+    services.cohort.add_decisions(
+        new_decision.organization_id,
+        decision_data.decision_type,
+        [attribute_values(new_decision.attributes)]
+    )
+    response_cache.invalidate(new_decision.organization_id)
+    if decision_data.comparable_cohort:
+        services.cohort.store.save(new_decision.id, decision_data.comparable_cohort)
     
     # Log action
     log_action(
@@ -159,6 +316,7 @@ async def create_decision(
 @router.get("/{decision_id}", response_model=DecisionDetailResponse)
 async def get_decision(
     decision_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -171,11 +329,15 @@ async def get_decision(
             detail="Decision not found"
         )
     
-    return {
-        "decision": decision,
-        "bias_analysis": decision.bias_analysis,
-        "explanation": decision.explanation
-    }
+    return response_cache.respond(
+        request,
+        current_user,
+        lambda: DecisionDetailResponse.model_validate({
+            "decision": decision,
+            "bias_analysis": decision.bias_analysis,
+            "explanation": decision.explanation
+        }, from_attributes=True)
+    )
 
 
 @router.get("/", response_model=List[DecisionResponse])
@@ -208,7 +370,10 @@ async def analyze_decision(
     db: Session = Depends(get_db)
 ):
     """Run bias analysis on a decision"""
-    decision = db.query(Decision).filter(Decision.id == decision_id).first()
+    # The cohort is read from the columnar store; skip decoding the JSON copy
+    decision = db.query(Decision).options(
+        defer(Decision.comparable_cohort)
+    ).filter(Decision.id == decision_id).first()
     
     if not decision:
         raise HTTPException(
@@ -216,65 +381,51 @@ async def analyze_decision(
             detail="Decision not found"
         )
     
-    # Check if analysis already exists
-    existing_analysis = db.query(BiasAnalysis).filter(
-        BiasAnalysis.decision_id == decision_id
-    ).first()
-    
-    if existing_analysis:
-        # Return existing analysis
-        return existing_analysis
-    
-    # Run bias detection
-    comparable_cohort = decision.comparable_cohort if decision.comparable_cohort else []
-    
-    analysis_result = bias_service.analyze_bias(
-        decision.employee_data,
-        comparable_cohort,
-        decision.decision_type.value
-    )
-    
-    # Store analysis results
-    bias_analysis = BiasAnalysis(
-        decision_id=decision.id,
-        risk_score=analysis_result.risk_score,
-        risk_level=analysis_result.risk_level,
-        detected_patterns=analysis_result.detected_patterns,
-        fairness_metrics=analysis_result.fairness_metrics,
-        comparable_outcomes=analysis_result.comparable_outcomes
-    )
-    
-    db.add(bias_analysis)
-    
-    # Update decision status
-    decision.status = DecisionStatus.ANALYZED
-    
-    db.commit()
-    db.refresh(bias_analysis)
-    
-    # Log action
-    log_action(
-        db,
-        str(decision_id),
-        str(current_user.id),
-        "bias_analyzed",
-        {
-            "risk_level": analysis_result.risk_level,
-            "risk_score": analysis_result.risk_score
-        }
-    )
-    
-    return bias_analysis
+    # Requests waiting on the claim then find the fresh analysis stored
+    async with claim_decision(decision.id, "analyze"):
+        # Reuse the stored analysis unless it is stale or its inputs changed
+        bias_analysis, recomputed = services.analysis.analyze(db, decision)
+        
+        record_cache("bias_analysis", hit=not recomputed)
+        if not recomputed:
+            return bias_analysis
+        
+        db.commit()
+        db.refresh(bias_analysis)
+        response_cache.invalidate(decision.organization_id)
+        
+        # Log action
+        log_action(
+            db,
+            str(decision_id),
+            str(current_user.id),
+            "bias_analyzed",
+            {
+                "risk_level": bias_analysis.risk_level,
+                "risk_score": bias_analysis.risk_score
+            }
+        )
+        
+        return bias_analysis
 
 
 @router.post("/{decision_id}/explain", response_model=ExplanationResponse)
 async def explain_decision(
     decision_id: str,
+    detailed: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Generate AI explanation for a decision"""
-    decision = db.query(Decision).filter(Decision.id == decision_id).first()
+    """
+    Generate an explanation for a decision
+    
+    Low-risk decisions are explained from the analysis results; detailed
+    asks for a Gemini explanation regardless, replacing a template one.
+    """
+    # The cohort is read from the columnar store; skip decoding the JSON copy
+    decision = db.query(Decision).options(
+        defer(Decision.comparable_cohort)
+    ).filter(Decision.id == decision_id).first()
     
     if not decision:
         raise HTTPException(
@@ -282,73 +433,133 @@ async def explain_decision(
             detail="Decision not found"
         )
     
-    # Check if explanation already exists
-    existing_explanation = db.query(Explanation).filter(
-        Explanation.decision_id == decision_id
-    ).first()
-    
-    if existing_explanation:
-        return existing_explanation
-    
-    # Get bias analysis (run if needed)
-    bias_analysis = db.query(BiasAnalysis).filter(
-        BiasAnalysis.decision_id == decision_id
-    ).first()
-    
-    if not bias_analysis:
-        # Run analysis first
-        comparable_cohort = decision.comparable_cohort if decision.comparable_cohort else []
-        analysis_result = bias_service.analyze_bias(
-            decision.employee_data,
-            comparable_cohort,
-            decision.decision_type.value
+    # Requests waiting on the claim then find the stored explanation
+    async with claim_decision(decision.id, "explain"):
+        # Bring the analysis up to date first; recomputing drops an outdated explanation
+        bias_analysis, recomputed = services.analysis.analyze(db, decision)
+        if recomputed:
+            db.commit()
+            db.refresh(bias_analysis)
+            response_cache.invalidate(decision.organization_id)
+        
+        # Check if explanation already exists
+        existing_explanation = db.query(Explanation).filter(
+            Explanation.decision_id == decision_id
+        ).first()
+        
+        reusable = existing_explanation is not None and not (detailed and existing_explanation.source != "gemini")
+        record_cache("explanation", hit=reusable)
+        if reusable:
+            return existing_explanation
+        
+        # Generate explanation
+        comparable_cohort = services.cohort.resolve_cohort(db, decision)
+        
+        try:
+            explanation_result = await services.explainability.generate_explanation(
+                decision.employee_data,
+                bias_analysis,
+                comparable_cohort,
+                decision.decision_type.value,
+                detailed=detailed
+            )
+        except RateLimitExceeded as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Explanation capacity exhausted, retry later",
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+            )
+        
+        # Store explanation, upgrading a template one in place
+        explanation = existing_explanation or Explanation(decision_id=decision.id)
+        explanation.justification = explanation_result.justification
+        explanation.key_factors = explanation_result.key_factors
+        explanation.alternatives = explanation_result.alternatives
+        if explanation_result.prompt is not None:
+            explanation.store_prompt(explanation_result.prompt, services.explanation_store.template(db))
+        else:
+            explanation.gemini_prompt = None
+        explanation.gemini_response = explanation_result.raw_response
+        explanation.source = explanation_result.source
+        
+        db.add(explanation)
+        db.commit()
+        db.refresh(explanation)
+        response_cache.invalidate(decision.organization_id)
+        
+        # Log action
+        log_action(
+            db,
+            str(decision_id),
+            str(current_user.id),
+            "explanation_generated"
         )
         
-        bias_analysis = BiasAnalysis(
-            decision_id=decision.id,
-            risk_score=analysis_result.risk_score,
-            risk_level=analysis_result.risk_level,
-            detected_patterns=analysis_result.detected_patterns,
-            fairness_metrics=analysis_result.fairness_metrics,
-            comparable_outcomes=analysis_result.comparable_outcomes
+        return explanation
+
+
+@router.patch("/{decision_id}", response_model=DecisionResponse)
+async def update_decision(
+    decision_id: str,
+    update: DecisionUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Change a decision's inputs and mark the analyses depending on them stale"""
+    decision = db.query(Decision).filter(Decision.id == decision_id).first()
+    
+    if not decision:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Decision not found"
         )
-        db.add(bias_analysis)
-        db.commit()
-        db.refresh(bias_analysis)
     
-    # Generate explanation
-    comparable_cohort = decision.comparable_cohort if decision.comparable_cohort else []
+    if decision.status == DecisionStatus.FINALIZED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Finalized decisions cannot be changed"
+        )
     
-    explanation_result = await explainability_service.generate_explanation(
-        decision.employee_data,
-        bias_analysis,
-        comparable_cohort,
-        decision.decision_type.value
-    )
+    changed = sorted(update.model_fields_set & {"employee_data", "comparable_cohort"})
+    if not changed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nothing to update"
+        )
     
-    # Store explanation
-    explanation = Explanation(
-        decision_id=decision.id,
-        justification=explanation_result.justification,
-        key_factors=explanation_result.key_factors,
-        alternatives=explanation_result.alternatives,
-        gemini_prompt=explanation_result.prompt,
-        gemini_response=explanation_result.raw_response
-    )
+    if "employee_data" in changed:
+        if update.employee_data is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="employee_data cannot be null"
+            )
+        decision.employee_data = update.employee_data
+        refresh_decision_attributes(decision)
     
-    db.add(explanation)
+    if "comparable_cohort" in changed:
+        decision.comparable_cohort = update.comparable_cohort or None
+        services.cohort.store.delete(decision.id)
+        if not decision.comparable_cohort and not decision.cohort_members:
+            services.cohort.assign_cohort(db, decision)
+    
+    # Peers whose server-selected cohorts include this decision are affected too
+    services.analysis.mark_stale(db, [decision.id], include_dependents="employee_data" in changed)
     db.commit()
-    db.refresh(explanation)
+    db.refresh(decision)
+    if "employee_data" in changed:
+        services.cohort.invalidate(decision.organization_id, decision.decision_type.value)
+    response_cache.invalidate(decision.organization_id)
     
     # Log action
     log_action(
         db,
         str(decision_id),
         str(current_user.id),
-        "explanation_generated"
+        "decision_updated",
+        {"fields": changed}
     )
     
-    return explanation
+    return decision
 
 
 @router.put("/{decision_id}/finalize", response_model=DecisionResponse)
@@ -372,6 +583,7 @@ async def finalize_decision(
     
     db.commit()
     db.refresh(decision)
+    response_cache.invalidate(decision.organization_id)
     
     # Log action
     log_action(
@@ -384,13 +596,50 @@ async def finalize_decision(
     return decision
 
 
+@router.get("/{decision_id}/counterfactuals")
+async def get_counterfactuals(
+    decision_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Smallest changes that would move an analyzed decision across a risk level boundary
+    
+    Candidate outcomes, with the cohort's demographic disparity as is and
+    resolved, are scored from the stored analysis under the active scoring
+    policy; the cohort is not re-analyzed.
+    """
+    decision = db.query(Decision).options(
+        defer(Decision.comparable_cohort)
+    ).filter(Decision.id == decision_id).first()
+    
+    if not decision:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Decision not found"
+        )
+    
+    analysis = decision.bias_analysis
+    if analysis is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Decision has not been analyzed yet"
+        )
+    
+    return {
+        "decision_id": decision.id,
+        "stale": services.analysis.is_outdated(db, decision, analysis),
+        **services.counterfactuals.search_decision(db, decision, analysis)
+    }
+
+
 @router.get("/{decision_id}/audit-log")
 async def get_audit_log(
     decision_id: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get audit trail for a decision"""
+    """Get audit trail for a decision, including entries moved to the archive"""
     decision = db.query(Decision).filter(Decision.id == decision_id).first()
     
     if not decision:
@@ -399,9 +648,7 @@ async def get_audit_log(
             detail="Decision not found"
         )
     
-    audit_logs = db.query(AuditLog).filter(
-        AuditLog.decision_id == decision_id
-    ).order_by(AuditLog.created_at).all()
+    audit_logs = services.audit.history(db, decision.id, since=decision.created_at)
     
     return {
         "decision_id": decision_id,
@@ -0,0 +1,258 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.response_cache import response_cache
+from app.models.user import User, UserRole
+from app.models.decision import DecisionType
+from app.models.audit_log import AuditLog
+from app.models.scoring_policy import ScoringPolicy
+from app.api.v1.auth import get_current_user
+from app.services.container import services
+from app.services.scoring_rules import DEFAULT_RULES
+
+router = APIRouter()
+
+
+# Pydantic schemas
+class ScoringPolicyCreate(BaseModel):
+    rules: dict
+    decision_type: Optional[DecisionType] = None  # None applies to every decision type
+    description: Optional[str] = None
+    activate: bool = True
+
+
+class SimulationRequest(BaseModel):
+    grid: Dict[str, List[Any]] = {}  # Candidate values per rule, e.g. {"z_score.moderate": [1.5, 2.0]}
+    decision_type: Optional[DecisionType] = None
+    base_policy_id: Optional[str] = None  # Defaults to the active policy
+    bins: int = Field(20, ge=1, le=200)
+
+
+class ScoringPolicyResponse(BaseModel):
+    id: str
+    decision_type: Optional[str]
+    version: int
+    rules: dict
+    description: Optional[str]
+    is_active: bool
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+# Dependency to require a user allowed to change scoring policy
+async def get_policy_manager(current_user: User = Depends(get_current_user)) -> User:
+    """Get current user, requiring the compliance or admin role"""
+    if current_user.role not in (UserRole.COMPLIANCE, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Compliance or admin privileges required"
+        )
+    
+    return current_user
+
+
+def get_policy_or_404(db: Session, policy_id: str, current_user: User) -> ScoringPolicy:
+    """Helper function to load a policy of the user's organization"""
+    policy = db.query(ScoringPolicy).filter(
+        ScoringPolicy.id == policy_id,
+        ScoringPolicy.organization_id == current_user.organization_id
+    ).first()
+    
+    if not policy:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scoring policy not found"
+        )
+    
+    return policy
+
+
+def log_policy_action(db: Session, policy: ScoringPolicy, user: User, action: str, details: dict = None):
+    """Helper function to log policy changes to the audit trail (caller commits)"""
+    db.add(AuditLog(
+        user_id=user.id,
+        action=action,
+        details={
+            "policy_id": policy.id,
+            "decision_type": policy.decision_type,
+            "version": policy.version,
+            **(details or {})
+        }
+    ))
+
+
+@router.get("/defaults")
+async def get_default_rules(current_user: User = Depends(get_current_user)):
+    """Get the built-in scoring rules"""
+    return {"rules": DEFAULT_RULES}
+
+
+@router.get("/", response_model=List[ScoringPolicyResponse])
+async def list_policies(
+    decision_type: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List every scoring policy version of the organization"""
+    query = db.query(ScoringPolicy).filter(
+        ScoringPolicy.organization_id == current_user.organization_id
+    )
+    
+    if decision_type:
+        query = query.filter(ScoringPolicy.decision_type == decision_type)
+    
+    return query.order_by(ScoringPolicy.decision_type, ScoringPolicy.version.desc()).all()
+
+
+@router.post("/", response_model=ScoringPolicyResponse, status_code=status.HTTP_201_CREATED)
+async def create_policy(
+    policy_data: ScoringPolicyCreate,
+    current_user: User = Depends(get_policy_manager),
+    db: Session = Depends(get_db)
+):
+    """
+    Store a new policy version
+    
+    Active policies take effect on the next analysis of each decision; use
+    the apply endpoint to re-score stored analyses right away.
+    """
+    try:
+        policy = services.policies.create_version(
+            db,
+            current_user,
+            policy_data.rules,
+            decision_type=policy_data.decision_type.value if policy_data.decision_type else None,
+            description=policy_data.description,
+            activate=policy_data.activate
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid scoring rules: {str(e)}"
+        )
+    
+    db.flush()
+    log_policy_action(db, policy, current_user, "scoring_policy_created", {"activated": policy_data.activate})
+    db.commit()
+    db.refresh(policy)
+    
+    return policy
+
+
+@router.post("/simulate")
+async def simulate_policies(
+    simulation: SimulationRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    What-if risk distributions of stored analyses over a grid of rule values
+    
+    Each combination of grid values overrides the base policy; the baseline
+    is the base policy itself. Stored analyses are scored, not recomputed.
+    """
+    decision_type = simulation.decision_type.value if simulation.decision_type else None
+    
+    if simulation.base_policy_id:
+        base_policy = get_policy_or_404(db, simulation.base_policy_id, current_user)
+    else:
+        base_policy = services.policies.resolve(db, current_user.organization_id, decision_type)
+    
+    try:
+        result = services.policies.simulate(
+            db,
+            current_user.organization_id,
+            services.policies.rules_for(base_policy),
+            simulation.grid,
+            decision_type=decision_type,
+            bins=simulation.bins,
+            max_settings=settings.SIMULATION_MAX_SETTINGS
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid simulation grid: {str(e)}"
+        )
+    
+    return {
+        "base_policy_id": base_policy.id if base_policy else None,
+        "decision_type": decision_type,
+        **result
+    }
+
+
+@router.get("/{policy_id}", response_model=ScoringPolicyResponse)
+async def get_policy(
+    policy_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get one scoring policy version"""
+    return get_policy_or_404(db, policy_id, current_user)
+
+
+@router.post("/{policy_id}/activate", response_model=ScoringPolicyResponse)
+async def activate_policy(
+    policy_id: str,
+    current_user: User = Depends(get_policy_manager),
+    db: Session = Depends(get_db)
+):
+    """Make a version the active policy of its scope, e.g. to roll back"""
+    policy = get_policy_or_404(db, policy_id, current_user)
+    
+    services.policies.activate(db, policy)
+    log_policy_action(db, policy, current_user, "scoring_policy_activated")
+    db.commit()
+    db.refresh(policy)
+    
+    return policy
+
+
+@router.post("/{policy_id}/preview")
+async def preview_policy(
+    policy_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Risk distribution of the stored analyses under a policy, without writing anything"""
+    policy = get_policy_or_404(db, policy_id, current_user)
+    
+    return {
+        "policy_id": policy.id,
+        "version": policy.version,
+        **services.policies.preview(db, policy)
+    }
+
+
+@router.post("/{policy_id}/apply")
+async def apply_policy(
+    policy_id: str,
+    current_user: User = Depends(get_policy_manager),
+    db: Session = Depends(get_db)
+):
+    """Re-score every stored analysis governed by an active policy"""
+    policy = get_policy_or_404(db, policy_id, current_user)
+    
+    if not policy.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only the active policy can be applied"
+        )
+    
+    result = services.policies.apply(db, policy)
+    log_policy_action(db, policy, current_user, "scoring_policy_applied", result)
+    db.commit()
+    response_cache.invalidate(current_user.organization_id)
+    
+    return {
+        "policy_id": policy.id,
+        "version": policy.version,
+        **result
+    }
@@ -0,0 +1,226 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+
+from app.core.database import get_db
+from app.models.user import User, UserRole
+from app.models.audit_log import AuditLog
+from app.models.promotion import PromotionDecision, PromotionCandidate, PromotionDecisionStatus
+from app.api.v1.auth import get_current_user
+from app.services.container import services
+
+router = APIRouter()
+
+
+# Pydantic schemas
+class PromotionDecisionCreate(BaseModel):
+    name: str
+    total_slots: int = Field(..., ge=1)
+
+
+class PromotionRankingRequest(BaseModel):
+    eligible_departments: Optional[List[str]] = None
+    eligible_employees: Optional[List[str]] = None
+    period_start: Optional[date] = None
+    period_end: Optional[date] = None
+    fairness_attribute: Optional[str] = None  # Protected attribute to balance the slate on, e.g. gender
+    employee_attributes: Dict[str, Dict[str, Any]] = {}  # Profile fields per employee id
+
+
+class PromotionDecisionResponse(BaseModel):
+    id: str
+    name: str
+    total_slots: int
+    status: str
+    criteria_snapshot: Optional[dict]
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class PromotionCandidateResponse(BaseModel):
+    id: str
+    employee_id: str
+    score: float
+    rank: int
+    is_recommended: bool
+    calculation_details: dict
+    
+    class Config:
+        from_attributes = True
+
+
+# Dependency to require a user allowed to run promotion rounds
+async def get_promotion_manager(current_user: User = Depends(get_current_user)) -> User:
+    """Get current user, requiring the HR manager or admin role"""
+    if current_user.role not in (UserRole.HR_MANAGER, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="HR manager or admin privileges required"
+        )
+    
+    return current_user
+
+
+def get_promotion_or_404(db: Session, decision_id: str, current_user: User) -> PromotionDecision:
+    """Helper function to load a promotion decision of the user's organization"""
+    decision = db.query(PromotionDecision).filter(
+        PromotionDecision.id == decision_id,
+        PromotionDecision.organization_id == current_user.organization_id
+    ).first()
+    
+    if not decision:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Promotion decision not found"
+        )
+    
+    return decision
+
+
+def log_promotion_action(db: Session, decision: PromotionDecision, user: User, action: str, details: dict = None):
+    """Helper function to log promotion changes to the audit trail (caller commits)"""
+    db.add(AuditLog(
+        user_id=user.id,
+        action=action,
+        details={
+            "promotion_decision_id": decision.id,
+            "total_slots": decision.total_slots,
+            **(details or {})
+        }
+    ))
+
+
+@router.post("/decisions", response_model=PromotionDecisionResponse, status_code=status.HTTP_201_CREATED)
+async def create_promotion_decision(
+    decision_data: PromotionDecisionCreate,
+    current_user: User = Depends(get_promotion_manager),
+    db: Session = Depends(get_db)
+):
+    """Open a promotion round"""
+    decision = PromotionDecision(
+        organization_id=current_user.organization_id,
+        created_by=current_user.id,
+        **decision_data.model_dump()
+    )
+    
+    db.add(decision)
+    db.flush()
+    log_promotion_action(db, decision, current_user, "promotion_decision_created")
+    db.commit()
+    db.refresh(decision)
+    
+    return decision
+
+
+@router.get("/decisions", response_model=List[PromotionDecisionResponse])
+async def list_promotion_decisions(
+    skip: int = 0,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List the organization's promotion rounds, newest first"""
+    return db.query(PromotionDecision).filter(
+        PromotionDecision.organization_id == current_user.organization_id
+    ).order_by(PromotionDecision.created_at.desc()).offset(skip).limit(limit).all()
+
+
+@router.get("/decisions/{decision_id}")
+async def get_promotion_decision(
+    decision_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    recommended_only: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get a promotion round with a page of its candidates in rank order"""
+    decision = get_promotion_or_404(db, decision_id, current_user)
+    
+    query = db.query(PromotionCandidate).filter(PromotionCandidate.decision_id == decision.id)
+    if recommended_only:
+        query = query.filter(PromotionCandidate.is_recommended.is_(True))
+    
+    # Served by ix_promotion_candidates_decision_rank
+    candidates = query.order_by(PromotionCandidate.rank).offset(skip).limit(limit).all()
+    
+    return {
+        "decision": PromotionDecisionResponse.model_validate(decision),
+        "candidates": [PromotionCandidateResponse.model_validate(c) for c in candidates]
+    }
+
+
+@router.post("/decisions/{decision_id}/rank")
+async def rank_promotion_candidates(
+    decision_id: str,
+    ranking: Optional[PromotionRankingRequest] = None,
+    current_user: User = Depends(get_promotion_manager),
+    db: Session = Depends(get_db)
+):
+    """
+    Rank the eligible employees and recommend a slate
+    
+    Replaces any previous ranking. With a fairness_attribute, the slate is
+    re-balanced so that no group's selection rate falls below the
+    organization's parity ratio (80% by default) of the highest one.
+    """
+    decision = get_promotion_or_404(db, decision_id, current_user)
+    ranking = ranking or PromotionRankingRequest()
+    
+    try:
+        summary = services.promotions.rank_candidates(
+            db,
+            decision,
+            eligible_departments=ranking.eligible_departments,
+            eligible_employees=ranking.eligible_employees,
+            period_start=ranking.period_start,
+            period_end=ranking.period_end,
+            fairness_attribute=ranking.fairness_attribute,
+            employee_attributes=ranking.employee_attributes
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT if decision.status == PromotionDecisionStatus.FINALIZED.value
+            else status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    log_promotion_action(db, decision, current_user, "promotion_candidates_ranked", {
+        "candidates": summary["candidates"],
+        "fairness_attribute": ranking.fairness_attribute
+    })
+    db.commit()
+    
+    return {
+        "decision_id": decision.id,
+        "status": decision.status,
+        **summary
+    }
+
+
+@router.put("/decisions/{decision_id}/finalize", response_model=PromotionDecisionResponse)
+async def finalize_promotion_decision(
+    decision_id: str,
+    current_user: User = Depends(get_promotion_manager),
+    db: Session = Depends(get_db)
+):
+    """Finalize a ranked promotion round after human review"""
+    decision = get_promotion_or_404(db, decision_id, current_user)
+    
+    if decision.status != PromotionDecisionStatus.CALCULATED.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot finalize a {decision.status} promotion decision"
+        )
+    
+    decision.status = PromotionDecisionStatus.FINALIZED.value
+    log_promotion_action(db, decision, current_user, "promotion_decision_finalized")
+    db.commit()
+    db.refresh(decision)
+    
+    return decision
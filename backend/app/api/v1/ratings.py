@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import date, datetime
+
+from app.core.database import get_db
+from app.models.user import User
+from app.models.performance import EmployeeRatingSummary
+from app.api.v1.auth import get_current_user
+from app.services.container import services
+from app.services.rating_aggregation import period_key
+
+router = APIRouter()
+
+
+# Pydantic schemas
+class RatingSummaryResponse(BaseModel):
+    employee_id: str
+    period: str
+    volume_score: Optional[float]
+    quality_score: Optional[float]
+    speed_score: Optional[float]
+    complexity_score: Optional[float]
+    performance_rating: Optional[float]
+    project_count: int
+    rating_count: int
+    ratings_through: Optional[datetime]
+    computed_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+@router.get("/employees", response_model=List[RatingSummaryResponse])
+async def list_ratings(
+    period_start: Optional[date] = None,
+    period_end: Optional[date] = None,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Aggregated ratings of every rated employee for a period, best first
+    
+    The period covers projects starting on or after period_start and
+    ending on or before period_end; omit both for all time.
+    """
+    services.ratings.refresh(db, current_user.organization_id, period_start, period_end)
+    
+    return db.query(EmployeeRatingSummary).filter(
+        EmployeeRatingSummary.organization_id == current_user.organization_id,
+        EmployeeRatingSummary.period == period_key(period_start, period_end)
+    ).order_by(
+        EmployeeRatingSummary.performance_rating.desc(), EmployeeRatingSummary.employee_id
+    ).offset(skip).limit(limit).all()
+
+
+@router.get("/employees/{employee_id}", response_model=RatingSummaryResponse)
+async def get_rating(
+    employee_id: str,
+    period_start: Optional[date] = None,
+    period_end: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Aggregated ratings of one employee for a period"""
+    summary = services.ratings.ratings(
+        db, current_user.organization_id, [employee_id], period_start, period_end
+    ).get(employee_id)
+    
+    if not summary:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No ratings found for this employee in the period"
+        )
+    
+    return summary
+
+
+@router.post("/refresh")
+async def refresh_ratings(
+    period_start: Optional[date] = None,
+    period_end: Optional[date] = None,
+    full: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Recompute stored ratings of a period
+    
+    Reads refresh new ratings on their own; a full refresh is needed after
+    ratings are edited or deleted, or project weightages change.
+    """
+    refreshed = services.ratings.refresh(db, current_user.organization_id, period_start, period_end, full=full)
+    
+    return {
+        "period": period_key(period_start, period_end),
+        "refreshed": refreshed
+    }
@@ -0,0 +1,29 @@
+import zlib
+from typing import Optional
+
+# Level 9 costs little on short texts and is only paid once per row
+COMPRESSION_LEVEL = 9
+
+
+def compress_text(text: str, dictionary: Optional[str] = None) -> bytes:
+    """
+    zlib-compress text, optionally against a preset dictionary
+    
+    Text shared with the dictionary (e.g. a prompt's instruction scaffold)
+    is stored as back-references, so only the varying parts take space.
+    The same dictionary must be passed to decompress_text.
+    """
+    if dictionary:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=dictionary.encode())
+    else:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL)
+    return compressor.compress(text.encode()) + compressor.flush()
+
+
+def decompress_text(data: bytes, dictionary: Optional[str] = None) -> str:
+    """Inverse of compress_text"""
+    if dictionary:
+        decompressor = zlib.decompressobj(zdict=dictionary.encode())
+    else:
+        decompressor = zlib.decompressobj()
+    return (decompressor.decompress(data) + decompressor.flush()).decode()
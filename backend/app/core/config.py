@@ -12,6 +12,8 @@ class Settings(BaseSettings):
     
     # Database - Using SQLite for local development
     DATABASE_URL: str = "sqlite:///./glassbox.db"
+    AUTO_MIGRATE: bool = True  # Create missing tables on startup; disable when migrating separately
+    SQLITE_BUSY_TIMEOUT_MS: int = 10000  # Wait for another worker's write lock before failing
     
     # Security
     JWT_SECRET: str = "dev-secret-key-change-in-production"
@@ -25,6 +27,59 @@ class Settings(BaseSettings):
     # AI
     GEMINI_API_KEY: str = ""
     GEMINI_MODEL: str = "gemini-1.5-pro"
+    LLM_RATE_LIMIT_PER_MINUTE: float = 0  # Calls per minute across all workers; 0 disables the limit
+    LLM_RATE_LIMIT_BURST: int = 5
+    LLM_RATE_LIMIT_MAX_WAIT_SECONDS: float = 10.0  # Longer waits answer 429
+    EXPLANATION_LLM_MIN_RISK: str = "moderate"  # Lower-risk decisions are explained from templates; "low" sends all to the LLM
+    
+    # Bias analysis
+    PARITY_SIGNIFICANCE_LEVEL: float = 0.05
+    PARITY_CONFIDENCE_LEVEL: float = 0.95
+    PARITY_BOOTSTRAP_ITERATIONS: int = 0  # 0 disables the bootstrap
+    PARITY_BOOTSTRAP_SEED: int = 42
+    PARITY_BOOTSTRAP_TIME_BUDGET_MS: float = 50.0
+    PARITY_MIN_CELL_SIZE: int = 5  # Smaller intersectional groups are suppressed
+    
+    # Server-side cohort selection
+    COHORT_MIN_SIZE: int = 10
+    COHORT_MAX_SIZE: int = 500
+    COHORT_EXPERIENCE_WINDOW: float = 3.0
+    COHORT_TENURE_WINDOW: float = 3.0
+    COHORT_POOL_TTL_SECONDS: int = 300
+    COHORT_STORE_DIR: str = "./cohorts"  # Columnar cohort files, memory-mapped at analysis time
+    
+    # Scoring policy simulation
+    SIMULATION_MAX_SETTINGS: int = 1000  # Rule combinations per what-if request
+    
+    # Bulk decision creation
+    BULK_CREATE_MAX_ROWS: int = 50000
+    BULK_CREATE_CHUNK_SIZE: int = 1000  # Rows per executemany batch and commit
+    
+    # Audit log tiers
+    AUDIT_HOT_MONTHS: int = 3  # Full months before these move from the audit_logs table to archive files
+    AUDIT_ARCHIVE_DIR: str = "./audit_archive"  # Compressed columnar month files
+    AUDIT_ARCHIVE_BLOCK_ROWS: int = 4096  # Rows per compressed block; a lookup decompresses only its blocks
+    
+    # Multi-worker server (python -m app.server)
+    WORKERS: int = 0  # 0 starts one worker per CPU core
+    SHUTDOWN_GRACE_SECONDS: int = 30  # In-flight requests get this long to finish on shutdown
+    SHARED_STATE_BACKEND: str = "memory"  # "memory" (per process) or "sqlite" (shared on one host)
+    SHARED_STATE_PATH: str = "./cache/shared_state.db"
+    DECISION_CLAIM_TTL_SECONDS: int = 300  # Claims of a crashed worker expire after this
+    DECISION_CLAIM_WAIT_SECONDS: float = 30.0  # Wait for a decision claimed elsewhere before answering 409
+    
+    # Request profiling
+    PROFILE_TOKEN: str = ""  # Enables X-Profile header / ?profile= flag when set
+    PROFILE_SAMPLE_RATE: float = 0.0  # Fraction of requests profiled automatically
+    PROFILE_DIR: str = "./profiles"
+    PROFILE_MAX_ENTRIES: int = 50
+    PROFILE_MAX_TOTAL_BYTES: int = 50 * 1024 * 1024
+    
+    # HTTP response cache for read-heavy GET endpoints
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: str = "memory"  # "memory" (per process), "disk" or "shared" (shared on one host)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    RESPONSE_CACHE_DIR: str = "./cache/responses"
     
     class Config:
         env_file = ".env"
@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from .config import settings
+from .metrics import instrument_engine, stage_timer
 
 # Create SQLAlchemy engine
 engine = create_engine(
@@ -9,9 +10,29 @@ engine = create_engine(
     pool_pre_ping=True,
     echo=settings.DEBUG
 )
+instrument_engine(engine)
+
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        # WAL lets worker processes read while another writes; writers queue instead of failing
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+
+class InstrumentedSession(Session):
+    """Session that records commit latency"""
+    
+    def commit(self):
+        with stage_timer("db_commit"):
+            super().commit()
+
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=InstrumentedSession)
 
 # Create Base class for models
 Base = declarative_base()
@@ -0,0 +1,83 @@
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .database import engine as default_engine, Base
+
+logger = logging.getLogger(__name__)
+
+
+def run_migrations(engine: Engine = default_engine):
+    """Create missing tables, add columns and indexes new to existing tables, then backfill derived rows"""
+    # Register every model on Base.metadata
+    import app.models  # noqa: F401
+    
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
+    _add_missing_indexes(engine)
+    _backfill_derived_rows(engine)
+
+
+def _add_missing_columns(engine: Engine):
+    """
+    Additive upgrade for tables that predate a model change
+    
+    create_all only creates whole tables, so nullable columns added to an
+    existing model are added with ALTER TABLE.
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            missing = [column for column in table.columns if column.name not in present]
+            if not missing:
+                continue
+            
+            for column in missing:
+                if not column.nullable:
+                    raise RuntimeError(
+                        f"Cannot add NOT NULL column {table.name}.{column.name} automatically"
+                    )
+                logger.info("Adding column %s.%s", table.name, column.name)
+                conn.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} "
+                    f"{column.type.compile(dialect=engine.dialect)}"
+                ))
+
+
+def _add_missing_indexes(engine: Engine):
+    """Create indexes added to a model after its table was created"""
+    inspector = inspect(engine)
+    
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            indexed = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexed:
+                    logger.info("Creating index %s", index.name)
+                    index.create(conn)
+
+
+def _backfill_derived_rows(engine: Engine):
+    """
+    Rows every writer creates alongside a decision, for decisions stored before they existed
+    
+    Once the backfill has run this is a single anti-join returning nothing,
+    so request paths can rely on the rows instead of checking per request.
+    """
+    from app.services.decision_attributes import backfill_decision_attributes
+    
+    with Session(bind=engine) as db:
+        created = backfill_decision_attributes(db, all_organizations=True)
+    if created:
+        logger.info("Backfilled attributes for %d decisions", created)
+
+
+if __name__ == "__main__":
+    run_migrations()
+    print("Database schema is up to date")
@@ -0,0 +1,172 @@
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional
+from urllib.parse import parse_qs
+
+from .config import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "profile"
+
+
+class ProfileStore:
+    """On-disk pstats store bounded by entry count and total size"""
+    
+    def __init__(self, directory: str, max_entries: int, max_total_bytes: int):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_total_bytes = max_total_bytes
+        self._lock = threading.Lock()
+    
+    def save(self, profile_id: str, profiler: cProfile.Profile, metadata: Dict[str, Any]):
+        """Write a profile and its metadata, then evict the oldest entries over the bounds"""
+        os.makedirs(self.directory, exist_ok=True)
+        stats_path = self._stats_path(profile_id)
+        profiler.dump_stats(stats_path)
+        metadata["size_bytes"] = os.path.getsize(stats_path)
+        with open(self._meta_path(profile_id), "w") as f:
+            json.dump(metadata, f)
+        self._prune()
+    
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata of stored profiles, newest first"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        entries.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return sorted(entries, key=lambda entry: entry.get("started_at", 0), reverse=True)
+    
+    def report(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """Text report of the hottest functions in a stored profile"""
+        stats_path = self.path(profile_id)
+        if stats_path is None:
+            return None
+        out = io.StringIO()
+        stats = pstats.Stats(stats_path, stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+    
+    def path(self, profile_id: str) -> Optional[str]:
+        """Path of a stored pstats file, or None for unknown ids"""
+        try:
+            uuid.UUID(profile_id)
+        except ValueError:
+            return None
+        stats_path = self._stats_path(profile_id)
+        return stats_path if os.path.exists(stats_path) else None
+    
+    def _prune(self):
+        with self._lock:
+            entries = sorted(self.list(), key=lambda entry: entry.get("started_at", 0))
+            total = sum(entry.get("size_bytes", 0) for entry in entries)
+            while entries and (len(entries) > self.max_entries or total > self.max_total_bytes):
+                oldest = entries.pop(0)
+                total -= oldest.get("size_bytes", 0)
+                for path in (self._stats_path(oldest["id"]), self._meta_path(oldest["id"])):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+    
+    def _stats_path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.pstats")
+    
+    def _meta_path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+
+profile_store = ProfileStore(
+    settings.PROFILE_DIR,
+    settings.PROFILE_MAX_ENTRIES,
+    settings.PROFILE_MAX_TOTAL_BYTES
+)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that wraps selected requests in cProfile
+    
+    A request is profiled when it carries the configured PROFILE_TOKEN in the
+    X-Profile header or the ?profile= query flag, or when it is picked by
+    PROFILE_SAMPLE_RATE. Only one request is profiled at a time; the profile
+    id is returned in the X-Profile-Id response header. The profiler follows
+    the event loop thread, so work offloaded to the threadpool is not
+    captured and concurrently running requests may show up in the stats.
+    """
+    
+    def __init__(self, app, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+        self._busy = threading.Lock()
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        # Another request is already being profiled
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        
+        profile_id = str(uuid.uuid4())
+        status_code = [500]
+        
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+        
+        profiler = cProfile.Profile()
+        started_at = time.time()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            self._busy.release()
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            self.store.save(profile_id, profiler, {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status_code[0],
+                "duration_seconds": elapsed,
+                "started_at": started_at
+            })
+    
+    def _should_profile(self, scope) -> bool:
+        token = settings.PROFILE_TOKEN
+        if token:
+            supplied = None
+            for name, value in scope.get("headers", []):
+                if name == PROFILE_HEADER:
+                    supplied = value.decode("latin-1")
+                    break
+            if supplied is None and scope.get("query_string"):
+                values = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_QUERY_PARAM)
+                supplied = values[0] if values else None
+            if supplied is not None and hmac.compare_digest(supplied.encode(), token.encode()):
+                return True
+        
+        rate = settings.PROFILE_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
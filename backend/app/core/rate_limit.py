@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+from .shared_state import shared_state
+
+
+class RateLimitExceeded(Exception):
+    """No capacity within the allowed wait"""
+    
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Rate limit of {name} exceeded; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Token bucket kept in the shared state store
+    
+    With the SQLite backend every worker process draws from the same bucket,
+    so the limit holds for the whole host rather than per process.
+    """
+    
+    def __init__(self, name: str, per_minute: float, burst: int, state=None):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.burst = max(1, burst)
+        self.state = state or shared_state
+    
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+    
+    async def acquire(self, max_wait: float = 0.0):
+        """
+        Wait for a token
+        
+        Args:
+            max_wait: Longest time to wait for capacity, in seconds
+        
+        Raises:
+            RateLimitExceeded: If no token becomes available within max_wait
+        """
+        if not self.enabled:
+            return
+        
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.state.take_token(self.name, self.rate, self.burst)
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitExceeded(self.name, wait)
+            await asyncio.sleep(wait)
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from .config import settings
+from .metrics import record_cache
+from .shared_state import SQLiteState, shared_state
+
+
+class MemoryBackend:
+    """Bounded in-process LRU store"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def set(self, key: str, entry: Dict[str, str]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_version(self, scope: str) -> str:
+        return self._versions.get(scope, "0")
+    
+    def bump_version(self, scope: str):
+        # Random tokens, so a lost version can never resurrect stale entries
+        self._versions[scope] = uuid.uuid4().hex
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class DiskBackend:
+    """Local-disk store, shareable between worker processes on one host"""
+    
+    def __init__(self, directory: str, max_entries: int, prune_every: int = 100):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        os.makedirs(os.path.join(directory, "entries"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "versions"), exist_ok=True)
+    
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        try:
+            with open(self._entry_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def set(self, key: str, entry: Dict[str, str]):
+        self._write_atomic(self._entry_path(key), json.dumps(entry))
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self._prune()
+    
+    def get_version(self, scope: str) -> str:
+        try:
+            with open(self._version_path(scope)) as f:
+                return f.read().strip() or "0"
+        except OSError:
+            return "0"
+    
+    def bump_version(self, scope: str):
+        self._write_atomic(self._version_path(scope), uuid.uuid4().hex)
+    
+    def clear(self):
+        for sub in ("entries", "versions"):
+            folder = os.path.join(self.directory, sub)
+            for name in os.listdir(folder):
+                try:
+                    os.remove(os.path.join(folder, name))
+                except OSError:
+                    pass
+    
+    def _prune(self):
+        """Drop the least recently written entries beyond max_entries"""
+        folder = os.path.join(self.directory, "entries")
+        paths = [os.path.join(folder, name) for name in os.listdir(folder)]
+        if len(paths) <= self.max_entries:
+            return
+        paths.sort(key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0)
+        for path in paths[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def _write_atomic(self, path: str, content: str):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, "entries", hashlib.sha256(key.encode()).hexdigest() + ".json")
+    
+    def _version_path(self, scope: str) -> str:
+        return os.path.join(self.directory, "versions", hashlib.sha256(scope.encode()).hexdigest())
+
+
+class SharedStateBackend:
+    """Store in the shared state database, shareable between worker processes on one host"""
+    
+    def __init__(self, state, max_entries: int, prune_every: int = 100):
+        self.state = state
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+    
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        value = self.state.get_entry(key)
+        return json.loads(value) if value is not None else None
+    
+    def set(self, key: str, entry: Dict[str, str]):
+        self.state.set_entry(key, json.dumps(entry))
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.state.prune_entries(self.max_entries)
+    
+    def get_version(self, scope: str) -> str:
+        return self.state.get_version(f"response:{scope}")
+    
+    def bump_version(self, scope: str):
+        self.state.bump_version(f"response:{scope}")
+    
+    def clear(self):
+        self.state.clear_entries()
+
+
+class ResponseCache:
+    """
+    Per-user JSON response cache with ETag support
+    
+    Entries are keyed by user, path, query string and the organization's data
+    version. Any write that changes decisions, analyses or explanations bumps
+    the version, so older entries are never served again and age out of the
+    bounded backend. Responses that also depend on the clock pass a vary
+    value (such as the current date) that is added to the key.
+    """
+    
+    def __init__(self, backend=None, enabled: bool = True):
+        self.backend = backend or MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+        self.enabled = enabled
+    
+    def respond(
+        self,
+        request: Request,
+        user: Any,
+        compute: Callable[[], Any],
+        vary: str = ""
+    ) -> Response:
+        """Serve a cached body (or 304) for the request, computing it on a miss"""
+        if not self.enabled:
+            return self._build_response(request, self._encode(compute()))
+        
+        key = self._key(request, user, vary)
+        entry = self.backend.get(key)
+        record_cache("response", hit=entry is not None)
+        
+        if entry is None:
+            entry = self._encode(compute())
+            self.backend.set(key, entry)
+        
+        return self._build_response(request, entry)
+    
+    def invalidate(self, organization_id: Optional[str]):
+        """Bump the data version of an organization"""
+        self.backend.bump_version(self._scope(organization_id))
+    
+    def _key(self, request: Request, user: Any, vary: str = "") -> str:
+        version = self.backend.get_version(self._scope(user.organization_id))
+        return f"{user.id}|{request.url.path}|{request.url.query}|{version}|{vary}"
+    
+    def _scope(self, organization_id: Optional[str]) -> str:
+        return f"org:{organization_id or ''}"
+    
+    def _encode(self, payload: Any) -> Dict[str, str]:
+        body = json.dumps(jsonable_encoder(payload), separators=(",", ":"))
+        etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+        return {"body": body, "etag": etag}
+    
+    def _build_response(self, request: Request, entry: Dict[str, str]) -> Response:
+        headers = {"ETag": entry["etag"], "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            candidates = [tag.strip() for tag in if_none_match.split(",")]
+            if entry["etag"] in candidates or "*" in candidates:
+                return Response(status_code=304, headers=headers)
+        return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+
+def _create_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "disk":
+        return DiskBackend(settings.RESPONSE_CACHE_DIR, settings.RESPONSE_CACHE_MAX_ENTRIES)
+    if settings.RESPONSE_CACHE_BACKEND == "shared":
+        if not isinstance(shared_state, SQLiteState):
+            raise RuntimeError('RESPONSE_CACHE_BACKEND "shared" requires SHARED_STATE_BACKEND "sqlite"')
+        return SharedStateBackend(shared_state, settings.RESPONSE_CACHE_MAX_ENTRIES)
+    return MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+response_cache = ResponseCache(_create_backend(), enabled=settings.RESPONSE_CACHE_ENABLED)
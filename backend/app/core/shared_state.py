@@ -0,0 +1,171 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from .config import settings
+
+
+def _take_token(tokens: float, elapsed: float, rate: float, burst: float) -> Tuple[float, float]:
+    """Refill a token bucket and take one token: (tokens left, seconds to wait, 0 when taken)"""
+    tokens = min(burst, tokens + elapsed * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class LocalState:
+    """In-process state, enough for a single worker"""
+    
+    def __init__(self):
+        self._versions: Dict[str, str] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+    
+    def get_version(self, scope: str) -> str:
+        return self._versions.get(scope, "0")
+    
+    def bump_version(self, scope: str) -> Tuple[str, str]:
+        """Give a scope a new version; returns the previous and the new one"""
+        version = uuid.uuid4().hex
+        with self._lock:
+            previous = self._versions.get(scope, "0")
+            self._versions[scope] = version
+        return previous, version
+    
+    def take_token(self, name: str, rate: float, burst: float) -> float:
+        """Take a token from a bucket refilled at rate per second; seconds to wait if none is left"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(name, (burst, now))
+            tokens, wait = _take_token(tokens, now - updated, rate, burst)
+            self._buckets[name] = (tokens, now)
+        return wait
+    
+    def close(self):
+        pass
+
+
+class SQLiteState:
+    """
+    State in a local SQLite file, shared by the worker processes of one host
+    
+    Each update is one short IMMEDIATE transaction, so read-modify-write
+    steps such as taking a token are atomic across processes. WAL mode keeps
+    readers from waiting on a writer.
+    """
+    
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS versions (scope TEXT PRIMARY KEY, version TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, touched REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_entries_touched ON entries (touched)"
+    ]
+    
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+    
+    def get_version(self, scope: str) -> str:
+        row = self._connect().execute("SELECT version FROM versions WHERE scope = ?", (scope,)).fetchone()
+        return row[0] if row else "0"
+    
+    def bump_version(self, scope: str) -> Tuple[str, str]:
+        """Give a scope a new version; returns the previous and the new one"""
+        version = uuid.uuid4().hex
+        with self._transaction() as conn:
+            row = conn.execute("SELECT version FROM versions WHERE scope = ?", (scope,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO versions (scope, version) VALUES (?, ?)",
+                (scope, version)
+            )
+        return (row[0] if row else "0"), version
+    
+    def take_token(self, name: str, rate: float, burst: float) -> float:
+        """Take a token from a bucket refilled at rate per second; seconds to wait if none is left"""
+        # Wall clock, since the bucket is shared between processes
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens, wait = _take_token(tokens, max(0.0, now - updated), rate, burst)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (name, tokens, now)
+            )
+        return wait
+    
+    def get_entry(self, key: str) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_entry(self, key: str, value: str):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, touched) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+    
+    def prune_entries(self, max_entries: int):
+        """Drop the least recently written entries beyond max_entries"""
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY touched DESC LIMIT -1 OFFSET ?)",
+                (max_entries,)
+            )
+    
+    def clear_entries(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM versions")
+    
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit, with explicit transactions for updates
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def _create_state():
+    if settings.SHARED_STATE_BACKEND == "sqlite":
+        return SQLiteState(settings.SHARED_STATE_PATH)
+    return LocalState()
+
+
+shared_state = _create_state()
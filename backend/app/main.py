@@ -1,17 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api.v1 import auth, decisions, analytics
+from app.core.database import engine
+from app.core.migrations import run_migrations
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.profiling import ProfilingMiddleware
+from app.core.shared_state import shared_state
+from app.services.container import services
+from app.api.v1 import auth, decisions, analytics, admin, policies, bonus, ratings, promotions
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare the schema and service singletons before serving requests"""
+    if settings.AUTO_MIGRATE:
+        run_migrations()
+    services.init()
+    yield
+    # Runs once uvicorn has drained in-flight requests (or the grace period ran out)
+    services.claims.release_all()
+    shared_state.close()
+    engine.dispose()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    description="Ethical HR Decision Intelligence Platform"
+    description="Ethical HR Decision Intelligence Platform",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -22,11 +41,18 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(decisions.router, prefix="/api/v1/decisions", tags=["Decisions"])
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
+app.include_router(policies.router, prefix="/api/v1/policies", tags=["Scoring Policies"])
+app.include_router(bonus.router, prefix="/api/v1/bonus", tags=["Bonus Distributions"])
+app.include_router(ratings.router, prefix="/api/v1/ratings", tags=["Performance Ratings"])
+app.include_router(promotions.router, prefix="/api/v1/promotions", tags=["Promotions"])
 
 
 @app.get("/")
@@ -45,6 +71,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,7 +1,56 @@
 # Import all models here for Alembic autogenerate
 from app.models.user import User
-from app.models.decision import Decision
-from app.models.bias_analysis import BiasAnalysis, Explanation
-from app.models.audit_log import AuditLog
+from app.models.decision import (
+    Decision,
+    DecisionAttributes,
+    DecisionCohortMember,
+    DecisionClaim,
+    DecisionIdempotencyKey
+)
+from app.models.bias_analysis import BiasAnalysis, AnalysisScoreFeatures, Explanation, PromptTemplate
+from app.models.audit_log import AuditLog, AuditArchivePartition
+from app.models.disparity_scan import DisparityScanResult
+from app.models.outcome_metrics import OutcomeFairnessResult
+from app.models.scoring_policy import ScoringPolicy
+from app.models.performance import (
+    Employee,
+    Project,
+    Task,
+    TaskAssignment,
+    ManagerRating,
+    PeerRating,
+    Kpi,
+    EmployeeRatingSummary
+)
+from app.models.bonus import BonusDistribution, BonusAllocation
+from app.models.promotion import PromotionDecision, PromotionCandidate
 
-__all__ = ["User", "Decision", "BiasAnalysis", "Explanation", "AuditLog"]
+__all__ = [
+    "User",
+    "Decision",
+    "DecisionAttributes",
+    "DecisionCohortMember",
+    "DecisionClaim",
+    "DecisionIdempotencyKey",
+    "BiasAnalysis",
+    "AnalysisScoreFeatures",
+    "Explanation",
+    "PromptTemplate",
+    "AuditLog",
+    "AuditArchivePartition",
+    "DisparityScanResult",
+    "OutcomeFairnessResult",
+    "ScoringPolicy",
+    "Employee",
+    "Project",
+    "Task",
+    "TaskAssignment",
+    "ManagerRating",
+    "PeerRating",
+    "Kpi",
+    "EmployeeRatingSummary",
+    "BonusDistribution",
+    "BonusAllocation",
+    "PromotionDecision",
+    "PromotionCandidate"
+]
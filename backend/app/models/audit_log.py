@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Integer, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -7,7 +7,13 @@ from app.core.database import Base
 
 
 class AuditLog(Base):
-    """Audit log model"""
+    """
+    Audit log model
+    
+    The table is the hot tier: months older than AUDIT_HOT_MONTHS are moved
+    to archive files by app.services.audit_archive, which also reads a
+    decision's history across both tiers.
+    """
     __tablename__ = "audit_logs"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -22,5 +28,25 @@ class AuditLog(Base):
     # Relationships
     decision = relationship("Decision", back_populates="audit_logs")
     
+    __table_args__ = (
+        Index("ix_audit_logs_decision_created", "decision_id", "created_at"),
+    )
+    
     def __repr__(self):
         return f"<AuditLog {self.action} at {self.created_at}>"
+
+
+class AuditArchivePartition(Base):
+    """One month of audit logs moved from the hot table to an archive file"""
+    __tablename__ = "audit_archive_partitions"
+    
+    month = Column(String(7), primary_key=True)  # YYYY-MM
+    file_name = Column(String, nullable=False)  # In AUDIT_ARCHIVE_DIR
+    row_count = Column(Integer, nullable=False)
+    decision_count = Column(Integer, nullable=False)
+    first_created_at = Column(DateTime, nullable=False)
+    last_created_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)  # Last (re)write of the file
+    
+    def __repr__(self):
+        return f"<AuditArchivePartition {self.month} ({self.row_count} rows)>"
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, String, DateTime, Float, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, Float, ForeignKey, JSON, Boolean, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Callable, Dict, Optional
 import uuid
 import enum
 
+from app.core.compression import compress_text, decompress_text
 from app.core.database import Base
 
 
@@ -25,6 +27,9 @@ class BiasAnalysis(Base):
     detected_patterns = Column(JSON)  # Specific bias patterns found
     fairness_metrics = Column(JSON)  # Demographic parity, equal opportunity, etc.
     comparable_outcomes = Column(JSON)  # How this decision compares to peers
+    input_hash = Column(String(64))  # Hash of decision data, cohort and analysis parameters
+    stale = Column(Boolean, default=False, index=True)  # Inputs changed since the last run
+    scoring_policy_id = Column(String, ForeignKey("scoring_policies.id"))  # NULL means the default policy
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -34,8 +39,52 @@ class BiasAnalysis(Base):
         return f"<BiasAnalysis {self.id} - Risk: {self.risk_level}>"
 
 
+class AnalysisScoreFeatures(Base):
+    """Packed scoring inputs of a decision's analysis, scanned by bulk re-scoring and what-if runs"""
+    __tablename__ = "analysis_score_features"
+    
+    decision_id = Column(String, ForeignKey("decisions.id", ondelete="CASCADE"), primary_key=True)
+    organization_id = Column(String)
+    decision_type = Column(String(20), nullable=False)
+    features = Column(LargeBinary, nullable=False)  # FEATURE_DTYPE record from fairness_metrics
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_analysis_score_features_scope", "organization_id", "decision_type", "updated_at"),
+    )
+    
+    def __repr__(self):
+        return f"<AnalysisScoreFeatures {self.decision_id}>"
+
+
+# Template bodies by hash; a hash always names the same body, so entries never go stale
+_template_bodies: Dict[str, str] = {}
+
+
+class PromptTemplate(Base):
+    """Instruction scaffold shared by many explanation prompts, stored once"""
+    __tablename__ = "prompt_templates"
+    
+    hash = Column(String(64), primary_key=True)  # SHA-256 of body
+    body = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PromptTemplate {self.hash[:12]}>"
+
+
 class Explanation(Base):
-    """AI-generated explanation model"""
+    """
+    AI-generated explanation model
+    
+    The prompt and raw response are stored compressed; the prompt against
+    its PromptTemplate as preset dictionary, so the shared scaffold is kept
+    once and each row holds little more than the profile and metrics.
+    gemini_prompt and gemini_response read and write plain text, decoded
+    on first access and kept while the stored bytes are unchanged. Rows
+    written before compression keep their text in the legacy columns until
+    app.services.explanation_storage moves it.
+    """
     __tablename__ = "explanations"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -43,12 +92,68 @@ class Explanation(Base):
     justification = Column(String, nullable=False)  # Plain-language explanation
     key_factors = Column(JSON)  # Important decision factors
     alternatives = Column(JSON)  # Alternative options considered
-    gemini_prompt = Column(String)  # Original prompt sent to Gemini
-    gemini_response = Column(String)  # Raw Gemini response
+    legacy_prompt = Column("gemini_prompt", String)  # Plain-text prompt of rows not yet compressed
+    legacy_response = Column("gemini_response", String)  # Plain-text response of rows not yet compressed
+    prompt_template_hash = Column(String(64), ForeignKey("prompt_templates.hash"))
+    prompt_data = Column(LargeBinary)  # Prompt sent to Gemini, compressed against the template
+    response_data = Column(LargeBinary)  # Raw Gemini response, compressed
+    source = Column(String(20))  # gemini, template, or fallback
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     decision = relationship("Decision", back_populates="explanation")
+    prompt_template = relationship("PromptTemplate")
+    
+    @property
+    def gemini_prompt(self) -> Optional[str]:
+        """Original prompt sent to Gemini"""
+        if self.prompt_data is None:
+            return self.legacy_prompt
+        return self._decoded("prompt", self.prompt_data, self._template_body)
+    
+    @gemini_prompt.setter
+    def gemini_prompt(self, prompt: Optional[str]):
+        self.store_prompt(prompt, self.prompt_template)
+    
+    def store_prompt(self, prompt: Optional[str], template: Optional[PromptTemplate] = None):
+        """Store a prompt compressed against the template it was built from"""
+        if prompt is None:
+            self.prompt_template = None
+            self.prompt_data = None
+        else:
+            self.prompt_template = template
+            self.prompt_template_hash = template.hash if template is not None else None
+            self.prompt_data = compress_text(prompt, template.body if template is not None else None)
+        self.legacy_prompt = None
+    
+    def _decoded(self, field: str, data: bytes, dictionary: Optional[Callable[[], Optional[str]]] = None) -> str:
+        """Text of a compressed column, decoded once for the bytes it holds"""
+        cache = self.__dict__.setdefault("_decoded_text", {})
+        cached = cache.get(field)
+        if cached is None or cached[0] is not data:
+            cached = cache[field] = (data, decompress_text(data, dictionary() if dictionary else None))
+        return cached[1]
+    
+    def _template_body(self) -> Optional[str]:
+        """Compression dictionary of the prompt, loaded once per process"""
+        if self.prompt_template_hash is None:
+            return None
+        body = _template_bodies.get(self.prompt_template_hash)
+        if body is None:
+            body = _template_bodies[self.prompt_template_hash] = self.prompt_template.body
+        return body
+    
+    @property
+    def gemini_response(self) -> Optional[str]:
+        """Raw Gemini response"""
+        if self.response_data is None:
+            return self.legacy_response
+        return self._decoded("response", self.response_data)
+    
+    @gemini_response.setter
+    def gemini_response(self, response: Optional[str]):
+        self.response_data = compress_text(response) if response is not None else None
+        self.legacy_response = None
     
     def __repr__(self):
         return f"<Explanation {self.id}>"
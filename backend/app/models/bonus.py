@@ -0,0 +1,59 @@
+from sqlalchemy import Column, String, DateTime, Date, Float, Numeric, ForeignKey, JSON, Index, UniqueConstraint
+from datetime import datetime
+import uuid
+import enum
+
+from app.core.database import Base
+
+
+class BonusDistributionStatus(str, enum.Enum):
+    """Bonus distribution status enumeration"""
+    DRAFT = "draft"
+    CALCULATED = "calculated"
+    APPROVED = "approved"
+    PAID = "paid"
+
+
+class BonusDistribution(Base):
+    """A bonus pool and the filters selecting its projects and employees"""
+    __tablename__ = "bonus_distributions"
+    __table_args__ = (
+        Index("ix_bonus_distributions_org_created", "organization_id", "created_at"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id = Column(String)
+    name = Column(String, nullable=False)
+    total_amount = Column(Numeric(12, 2, asdecimal=False), nullable=False)
+    date_range_start = Column(Date)  # Projects starting on or after
+    date_range_end = Column(Date)  # Projects ending on or before
+    eligible_departments = Column(JSON)  # NULL means all departments
+    eligible_employees = Column(JSON)  # NULL means everyone in the selected departments
+    status = Column(String(20), default=BonusDistributionStatus.DRAFT.value, index=True)
+    created_by = Column(String, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<BonusDistribution {self.name} {self.status}>"
+
+
+class BonusAllocation(Base):
+    """One employee's share of a bonus pool, with its breakdown and bias screening"""
+    __tablename__ = "bonus_allocations"
+    __table_args__ = (
+        UniqueConstraint("distribution_id", "employee_id", name="uq_bonus_allocations_employee"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    distribution_id = Column(String, ForeignKey("bonus_distributions.id", ondelete="CASCADE"), nullable=False, index=True)
+    employee_id = Column(String, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False, index=True)
+    contribution_percentage = Column(Numeric(5, 2, asdecimal=False), nullable=False)
+    bonus_amount = Column(Numeric(12, 2, asdecimal=False), nullable=False)
+    calculation_details = Column(JSON, default=dict)  # Per-project breakdown, for transparency
+    risk_score = Column(Float)  # Bias analysis of the allocation as a compensation decision
+    risk_level = Column(String(20))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<BonusAllocation {self.employee_id} {self.bonus_amount}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, Text, JSON
+from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, Text, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -42,6 +42,81 @@ class Decision(Base):
     bias_analysis = relationship("BiasAnalysis", back_populates="decision", uselist=False)
     explanation = relationship("Explanation", back_populates="decision", uselist=False)
     audit_logs = relationship("AuditLog", back_populates="decision")
+    attributes = relationship(
+        "DecisionAttributes", back_populates="decision", uselist=False, cascade="all, delete-orphan"
+    )
+    cohort_members = relationship(
+        "DecisionCohortMember",
+        foreign_keys="DecisionCohortMember.decision_id",
+        cascade="all, delete-orphan"
+    )
     
     def __repr__(self):
         return f"<Decision {self.id} - {self.decision_type.value}>"
+
+
+class DecisionAttributes(Base):
+    """Typed copy of the hot employee_data attributes for indexed SQL filtering"""
+    __tablename__ = "decision_attributes"
+    
+    decision_id = Column(String, ForeignKey("decisions.id", ondelete="CASCADE"), primary_key=True)
+    organization_id = Column(String)
+    decision_type = Column(String(20), nullable=False)
+    department = Column(String)
+    experience_years = Column(Float)
+    tenure_years = Column(Float)
+    performance_rating = Column(Float)
+    role_level = Column(Float)
+    gender = Column(String(50))
+    age_group = Column(String(50))
+    ethnicity = Column(String(50))
+    outcome = Column(Float)  # Normalized decision outcome (1/0 for selections)
+    
+    # Relationships
+    decision = relationship("Decision", back_populates="attributes")
+    
+    __table_args__ = (
+        Index("ix_decision_attributes_org_type_role", "organization_id", "decision_type", "role_level"),
+        Index("ix_decision_attributes_org_department", "organization_id", "department"),
+    )
+    
+    def __repr__(self):
+        return f"<DecisionAttributes {self.decision_id}>"
+
+
+class DecisionCohortMember(Base):
+    """Server-selected comparable peer, stored by reference to the peer's decision"""
+    __tablename__ = "decision_cohort_members"
+    
+    decision_id = Column(String, ForeignKey("decisions.id", ondelete="CASCADE"), primary_key=True)
+    member_decision_id = Column(String, ForeignKey("decisions.id", ondelete="CASCADE"), primary_key=True)
+    
+    def __repr__(self):
+        return f"<DecisionCohortMember {self.decision_id} -> {self.member_decision_id}>"
+
+
+class DecisionClaim(Base):
+    """Short-lived claim of a decision by one request, so workers never analyze or explain it at once"""
+    __tablename__ = "decision_claims"
+    
+    decision_id = Column(String, ForeignKey("decisions.id", ondelete="CASCADE"), primary_key=True)
+    operation = Column(String(20), nullable=False)
+    owner = Column(String(200), nullable=False, index=True)  # host:pid:token of the claiming request
+    claimed_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<DecisionClaim {self.decision_id} {self.operation} by {self.owner}>"
+
+
+class DecisionIdempotencyKey(Base):
+    """Client-supplied key of a bulk-created decision, so retried uploads are not duplicated"""
+    __tablename__ = "decision_idempotency_keys"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    idempotency_key = Column(String(255), primary_key=True)
+    decision_id = Column(String, ForeignKey("decisions.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<DecisionIdempotencyKey {self.idempotency_key} -> {self.decision_id}>"
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, String, DateTime, Float, Integer
+from datetime import datetime
+import uuid
+
+from app.core.database import Base
+
+
+class DisparityScanResult(Base):
+    """Org-wide disparity scan summary, one row per decision type / attribute / department / group"""
+    __tablename__ = "disparity_scan_results"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    scan_id = Column(String, nullable=False, index=True)
+    organization_id = Column(String, index=True)
+    decision_type = Column(String(20), nullable=False)
+    attribute = Column(String(50), nullable=False)  # gender, age_group, ethnicity
+    department = Column(String)  # NULL means all departments
+    group_value = Column(String)
+    decision_count = Column(Integer)
+    positive_count = Column(Integer)  # Only for binary outcomes
+    selection_rate = Column(Float)  # Only for binary outcomes
+    mean_outcome = Column(Float)
+    disparity_ratio = Column(Float)  # Group rate (or mean) relative to the best group
+    z_score_mean = Column(Float)
+    z_score_std = Column(Float)
+    z_score_p50 = Column(Float)
+    z_score_p90 = Column(Float)
+    outlier_share = Column(Float)  # Share of analyses with |z| above the policy's z_score.moderate
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f"<DisparityScanResult {self.decision_type}/{self.attribute}={self.group_value}>"
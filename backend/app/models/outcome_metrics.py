@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, DateTime, Float, Integer, JSON
+from datetime import datetime
+import uuid
+
+from app.core.database import Base
+
+
+class OutcomeFairnessResult(Base):
+    """Outcome-based fairness metrics, one row per decision type / later outcome / attribute / group"""
+    __tablename__ = "outcome_fairness_results"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    run_id = Column(String, nullable=False, index=True)
+    organization_id = Column(String, index=True)
+    decision_type = Column(String(20), nullable=False)
+    outcome = Column(String(20), nullable=False)  # retention, rating
+    attribute = Column(String(50), nullable=False)  # gender, age_group, ethnicity
+    group_value = Column(String)
+    decision_count = Column(Integer)  # Finalized decisions with a known later outcome
+    true_positive = Column(Integer)
+    false_positive = Column(Integer)
+    true_negative = Column(Integer)
+    false_negative = Column(Integer)
+    true_positive_rate = Column(Float)
+    false_positive_rate = Column(Float)
+    precision = Column(Float)
+    equal_opportunity_gap = Column(Float)  # Highest group TPR minus this group's TPR
+    equalized_odds_gap = Column(Float)  # Larger of the TPR gap and the FPR gap to the lowest group FPR
+    calibration_error = Column(Float)  # Count-weighted gap to the all-group outcome rate per score bin
+    calibration = Column(JSON)  # Per score bin: decision count and later outcome rate
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f"<OutcomeFairnessResult {self.decision_type}/{self.outcome}/{self.attribute}={self.group_value}>"
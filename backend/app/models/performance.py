@@ -0,0 +1,152 @@
+from sqlalchemy import Column, String, DateTime, Date, Integer, Float, ForeignKey, Index
+from datetime import datetime
+import uuid
+
+from app.core.database import Base
+
+# Project-based performance evaluation tables (see supabase-migration.sql).
+# Only the columns the backend reads are mapped; organization_id scopes the
+# rows to an organization like every other backend table.
+
+
+class Employee(Base):
+    """Employee of the org structure, with or without a login"""
+    __tablename__ = "employees"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id = Column(String, index=True)
+    name = Column(String, nullable=False)
+    email = Column(String)
+    role_title = Column(String, nullable=False)
+    department_id = Column(String, index=True)
+    status = Column(String, default="active")  # active, on_leave, terminated
+    hire_date = Column(Date)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Employee {self.name}>"
+
+
+class Project(Base):
+    """Project whose weightage (1-10) sets its share of a bonus pool"""
+    __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_org_dates", "organization_id", "start_date", "end_date"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id = Column(String)
+    name = Column(String, nullable=False)
+    department_id = Column(String)
+    weightage = Column(Integer, nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    status = Column(String, default="completed")  # completed, in_progress
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Project {self.name} w{self.weightage}>"
+
+
+class Task(Base):
+    """Task within a project; its weightage (1-10) splits the project between assignees"""
+    __tablename__ = "tasks"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    weightage = Column(Integer, nullable=False)
+    assigned_to_id = Column(String, ForeignKey("employees.id"), index=True)  # Single assignee, predates task_assignments
+    status = Column(String, default="completed")
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Task {self.name} w{self.weightage}>"
+
+
+class TaskAssignment(Base):
+    """Assignee of a task with several assignees"""
+    __tablename__ = "task_assignments"
+    
+    task_id = Column(String, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    employee_id = Column(String, ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    assigned_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<TaskAssignment {self.task_id} -> {self.employee_id}>"
+
+
+class ManagerRating(Base):
+    """Manager's 0-5 scores of an employee on a project"""
+    __tablename__ = "manager_ratings"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    employee_id = Column(String, ForeignKey("employees.id"), nullable=False, index=True)
+    rated_by_id = Column(String, ForeignKey("employees.id"), nullable=False)
+    volume_score = Column(Float, nullable=False)
+    quality_score = Column(Float, nullable=False)
+    speed_score = Column(Float, nullable=False)
+    complexity_score = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ManagerRating {self.employee_id} on {self.project_id}>"
+
+
+class PeerRating(Base):
+    """Teammate's 0-5 scores of an employee on a project"""
+    __tablename__ = "peer_ratings"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    employee_id = Column(String, ForeignKey("employees.id"), nullable=False, index=True)
+    rated_by_id = Column(String, ForeignKey("employees.id"), nullable=False)
+    volume_score = Column(Float, nullable=False)
+    quality_score = Column(Float, nullable=False)
+    speed_score = Column(Float, nullable=False)
+    complexity_score = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PeerRating {self.employee_id} on {self.project_id}>"
+
+
+class Kpi(Base):
+    """Hard metric of an employee on a project"""
+    __tablename__ = "kpis"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = Column(String, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    employee_id = Column(String, ForeignKey("employees.id"), nullable=False, index=True)
+    metric_category = Column(String, nullable=False)  # Volume, Quality, Speed, Complexity
+    metric_name = Column(String, nullable=False)
+    metric_value = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Kpi {self.metric_name}={self.metric_value}>"
+
+
+class EmployeeRatingSummary(Base):
+    """Aggregated 0-5 scores of an employee over the projects of a rating period"""
+    __tablename__ = "employee_rating_summaries"
+    __table_args__ = (
+        Index("ix_employee_rating_summaries_org_period", "organization_id", "period"),
+    )
+    
+    employee_id = Column(String, ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    period = Column(String(32), primary_key=True)  # "<start>..<end>", either side empty when open
+    organization_id = Column(String)
+    volume_score = Column(Float)
+    quality_score = Column(Float)
+    speed_score = Column(Float)
+    complexity_score = Column(Float)
+    performance_rating = Column(Float)  # Mean of the scored dimensions
+    project_count = Column(Integer, nullable=False)
+    rating_count = Column(Integer, nullable=False)  # Manager and peer ratings plus KPIs
+    ratings_through = Column(DateTime)  # Newest rating or KPI included
+    computed_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<EmployeeRatingSummary {self.employee_id} {self.period}>"
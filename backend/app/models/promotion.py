@@ -0,0 +1,54 @@
+from sqlalchemy import Column, String, DateTime, Integer, Float, Boolean, ForeignKey, JSON, Index
+from datetime import datetime
+import uuid
+import enum
+
+from app.core.database import Base
+
+
+class PromotionDecisionStatus(str, enum.Enum):
+    """Promotion decision status enumeration"""
+    DRAFT = "draft"
+    CALCULATED = "calculated"
+    FINALIZED = "finalized"
+
+
+class PromotionDecision(Base):
+    """A promotion round: the slots to fill and the criteria candidates were ranked by"""
+    __tablename__ = "promotion_decisions"
+    __table_args__ = (
+        Index("ix_promotion_decisions_org_created", "organization_id", "created_at"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id = Column(String)
+    name = Column(String, nullable=False)
+    total_slots = Column(Integer, nullable=False)
+    status = Column(String(20), default=PromotionDecisionStatus.DRAFT.value, index=True)
+    criteria_snapshot = Column(JSON)  # Eligibility, rating period and fairness settings of the last ranking
+    created_by = Column(String, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PromotionDecision {self.name} {self.total_slots} slots>"
+
+
+class PromotionCandidate(Base):
+    """A ranked candidate of a promotion round"""
+    __tablename__ = "promotion_candidates"
+    __table_args__ = (
+        Index("ix_promotion_candidates_decision_rank", "decision_id", "rank"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    decision_id = Column(String, ForeignKey("promotion_decisions.id", ondelete="CASCADE"), nullable=False)
+    employee_id = Column(String, ForeignKey("employees.id"), nullable=False, index=True)
+    score = Column(Float, nullable=False)
+    rank = Column(Integer, nullable=False)  # 1 is best; the recommended slate comes first
+    is_recommended = Column(Boolean, default=False)
+    calculation_details = Column(JSON, default=dict)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PromotionCandidate {self.employee_id} #{self.rank}>"
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, DateTime, Integer, Boolean, ForeignKey, JSON, Index, UniqueConstraint
+from datetime import datetime
+import uuid
+
+from app.core.database import Base
+
+
+class ScoringPolicy(Base):
+    """Versioned bias scoring rules of an organization, optionally for one decision type"""
+    __tablename__ = "scoring_policies"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "decision_type", "version", name="uq_scoring_policies_version"),
+        Index("ix_scoring_policies_scope", "organization_id", "decision_type", "is_active"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    organization_id = Column(String)
+    decision_type = Column(String(20))  # NULL applies to every decision type
+    version = Column(Integer, nullable=False)
+    rules = Column(JSON, nullable=False)  # Full rule set, defaults filled in
+    description = Column(String)
+    is_active = Column(Boolean, default=False)
+    created_by = Column(String, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ScoringPolicy {self.decision_type or 'all'} v{self.version}>"
@@ -0,0 +1,52 @@
+import argparse
+import logging
+import os
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.migrations import run_migrations
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """
+    Production entry point: one uvicorn worker process per core
+    
+    State that must agree between workers (response cache versions, cohort
+    pool versions, the LLM rate limit) moves to the shared SQLite store, and
+    the schema is migrated once here instead of by every worker. On SIGTERM
+    uvicorn stops accepting connections and gives in-flight requests
+    SHUTDOWN_GRACE_SECONDS to finish before the workers exit.
+    """
+    parser = argparse.ArgumentParser(description="Run the GlassBox API with multiple workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WORKERS or os.cpu_count() or 1)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    if args.workers > 1:
+        # Workers are fresh processes that read their settings from the environment
+        if settings.SHARED_STATE_BACKEND == "memory":
+            logger.info("Sharing state between %d workers in %s", args.workers, settings.SHARED_STATE_PATH)
+            os.environ["SHARED_STATE_BACKEND"] = "sqlite"
+        if settings.RESPONSE_CACHE_BACKEND == "memory":
+            os.environ["RESPONSE_CACHE_BACKEND"] = "shared"
+    
+    if settings.AUTO_MIGRATE:
+        run_migrations()
+        os.environ["AUTO_MIGRATE"] = "False"
+    
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=settings.SHUTDOWN_GRACE_SECONDS
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+import json
+import logging
+import os
+import struct
+import uuid
+from datetime import datetime
+import numpy as np
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Iterable
+
+from app.core.compression import compress_text, decompress_text
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.models.audit_log import AuditLog, AuditArchivePartition
+
+logger = logging.getLogger(__name__)
+
+# File layout (little endian):
+#   magic (8 bytes) | format version (uint32) | header length (uint32) | JSON header
+#   padding to 8 bytes, then the distinct decision ids (fixed-width bytes, sorted),
+#   their row bounds (int64, one more than the ids) and the compressed row blocks
+# Rows are sorted by decision and time, so a decision's history is one row
+# range; each block holds block_rows rows as a JSON object of column lists
+MAGIC = b"GBAUDLOG"
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<8sII")
+ALIGNMENT = 8
+
+COLUMNS = ["id", "decision_id", "user_id", "action", "details", "ip_address", "user_agent", "created_at"]
+
+# Decision ids per IN list when reading hot rows
+HOT_QUERY_CHUNK = 500
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _decision_key(decision_id: Optional[str]) -> bytes:
+    # Entries without a decision (e.g. policy changes) sort first under the empty id
+    return (decision_id or "").encode()
+
+
+def encode_archive(rows: List[Dict[str, Any]], block_rows: int) -> bytes:
+    """Serialize audit rows (dicts with every COLUMNS key) to the archive format"""
+    rows = sorted(rows, key=lambda row: (_decision_key(row["decision_id"]), row["created_at"], row["id"]))
+    
+    # Decision index: each distinct id and where its rows start
+    ids, starts = [], []
+    for i, row in enumerate(rows):
+        key = _decision_key(row["decision_id"])
+        if not ids or key != ids[-1]:
+            ids.append(key)
+            starts.append(i)
+    id_dtype = f"S{max([len(key) for key in ids] + [1])}"
+    id_data = np.array(ids, dtype=id_dtype).tobytes()
+    bounds_data = np.array(starts + [len(rows)], dtype="<i8").tobytes()
+    
+    blocks, offset = [], 0
+    sections = []
+    for data in [id_data, bounds_data]:
+        sections.append((offset, data))
+        offset = _align(offset + len(data))
+    for start in range(0, len(rows), block_rows):
+        chunk = rows[start:start + block_rows]
+        columns = {name: [row[name] for row in chunk] for name in COLUMNS}
+        columns["created_at"] = [value.isoformat() for value in columns["created_at"]]
+        data = compress_text(json.dumps(columns, separators=(",", ":"), default=str))
+        blocks.append([offset, len(data)])
+        sections.append((offset, data))
+        offset += len(data)
+    
+    header = json.dumps({
+        "rows": len(rows),
+        "block_rows": block_rows,
+        "ids": {"dtype": id_dtype, "count": len(ids), "offset": sections[0][0]},
+        "bounds": {"offset": sections[1][0]},
+        "blocks": blocks
+    }).encode()
+    data_start = _align(PREAMBLE.size + len(header))
+    
+    encoded = bytearray(data_start + offset)
+    PREAMBLE.pack_into(encoded, 0, MAGIC, FORMAT_VERSION, len(header))
+    encoded[PREAMBLE.size:PREAMBLE.size + len(header)] = header
+    for section_offset, data in sections:
+        encoded[data_start + section_offset:data_start + section_offset + len(data)] = data
+    return bytes(encoded)
+
+
+def write_archive(path: str, rows: List[Dict[str, Any]], block_rows: int):
+    """Write an archive file (atomically replaces path)"""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_archive(rows, block_rows))
+    os.replace(tmp_path, path)
+
+
+class AuditArchive:
+    """
+    Memory-mapped archive file of one month
+    
+    Raises:
+        ValueError: If the file is not an audit archive or uses an unknown version
+    """
+    
+    def __init__(self, path: str):
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(raw) < PREAMBLE.size:
+            raise ValueError(f"{path} is not an audit archive")
+        magic, version, header_length = PREAMBLE.unpack_from(raw, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an audit archive")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported audit archive version {version}")
+        
+        header = json.loads(bytes(raw[PREAMBLE.size:PREAMBLE.size + header_length]))
+        data_start = _align(PREAMBLE.size + header_length)
+        ids = header["ids"]
+        id_dtype = np.dtype(ids["dtype"])
+        id_start = data_start + ids["offset"]
+        bounds_start = data_start + header["bounds"]["offset"]
+        
+        self.raw = raw
+        self.rows = header["rows"]
+        self.block_rows = header["block_rows"]
+        self.ids = raw[id_start:id_start + ids["count"] * id_dtype.itemsize].view(id_dtype)
+        self.bounds = raw[bounds_start:bounds_start + (ids["count"] + 1) * 8].view("<i8")
+        self.blocks = [(data_start + offset, length) for offset, length in header["blocks"]]
+    
+    def lookup(self, decision_ids: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Rows of the given decisions, oldest first; decisions without rows are left out"""
+        # Longer ids would match a truncated stored id, and cannot be stored here anyway
+        wanted = [d for d in dict.fromkeys(decision_ids) if len(_decision_key(d)) <= self.ids.dtype.itemsize]
+        if not wanted or not len(self.ids):
+            return {}
+        keys = np.array([_decision_key(d) for d in wanted], dtype=self.ids.dtype)
+        positions = np.minimum(np.searchsorted(self.ids, keys), len(self.ids) - 1)
+        found = np.flatnonzero(self.ids[positions] == keys)
+        
+        decoded: Dict[int, Dict[str, list]] = {}
+        result = {}
+        for i in found.tolist():
+            start, end = int(self.bounds[positions[i]]), int(self.bounds[positions[i] + 1])
+            result[wanted[i]] = [self._row(decoded, r) for r in range(start, end)]
+        return result
+    
+    def all_rows(self) -> List[Dict[str, Any]]:
+        decoded: Dict[int, Dict[str, list]] = {}
+        return [self._row(decoded, r) for r in range(self.rows)]
+    
+    def _row(self, decoded: Dict[int, Dict[str, list]], r: int) -> Dict[str, Any]:
+        block, position = divmod(r, self.block_rows)
+        columns = decoded.get(block)
+        if columns is None:
+            offset, length = self.blocks[block]
+            columns = decoded[block] = json.loads(decompress_text(bytes(self.raw[offset:offset + length])))
+        row = {name: columns[name][position] for name in COLUMNS}
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+        return row
+
+
+class AuditArchiveService:
+    """
+    Tiered audit log storage
+    
+    The audit_logs table holds the current month and the AUDIT_HOT_MONTHS
+    before it, so inserts and recent-history queries work on a table whose
+    size does not grow with the total history. rollover() moves each older
+    month into one compressed columnar file, indexed by decision, and
+    records it in audit_archive_partitions. history() reads a decision's
+    entries from the table and, only when the decision predates the hot
+    window, from the month files that can hold it.
+    """
+    
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        hot_months: Optional[int] = None,
+        block_rows: Optional[int] = None
+    ):
+        self.directory = directory or settings.AUDIT_ARCHIVE_DIR
+        self.hot_months = hot_months if hot_months is not None else settings.AUDIT_HOT_MONTHS
+        self.block_rows = block_rows or settings.AUDIT_ARCHIVE_BLOCK_ROWS
+        self._archives: Dict[str, tuple] = {}  # month -> (archived_at, AuditArchive)
+    
+    def history(self, db: Session, decision_id: str, since: Optional[datetime] = None) -> List[AuditLog]:
+        """
+        A decision's audit entries across both tiers, oldest first
+        
+        Args:
+            db: Database session
+            decision_id: Decision to read
+            since: When the decision was created; archived months before it
+                are skipped (None reads every archived month)
+        """
+        return self.histories(db, {decision_id: since})[decision_id]
+    
+    def histories(self, db: Session, decisions: Dict[str, Optional[datetime]]) -> Dict[str, List[AuditLog]]:
+        """
+        Audit entries of many decisions, oldest first
+        
+        Args:
+            db: Database session
+            decisions: Creation time (or None) per decision id
+        
+        Returns:
+            Entries per decision id; archived ones are detached AuditLog
+            objects, not in the session
+        """
+        result: Dict[str, List[AuditLog]] = {decision_id: [] for decision_id in decisions}
+        if not decisions:
+            return result
+        ids = list(decisions)
+        for start in range(0, len(ids), HOT_QUERY_CHUNK):
+            for log in db.query(AuditLog).filter(
+                AuditLog.decision_id.in_(ids[start:start + HOT_QUERY_CHUNK])
+            ).order_by(AuditLog.created_at):
+                result[log.decision_id].append(log)
+        
+        earliest = [since for since in decisions.values() if since is not None]
+        partitions = db.query(AuditArchivePartition)
+        if len(earliest) == len(decisions) and earliest:
+            partitions = partitions.filter(AuditArchivePartition.last_created_at >= min(earliest))
+        partitions = partitions.order_by(AuditArchivePartition.month).all()
+        if not partitions:
+            return result
+        
+        with stage_timer("audit_archive_read"):
+            for partition in partitions:
+                wanted = [
+                    decision_id for decision_id, since in decisions.items()
+                    if since is None or since <= partition.last_created_at
+                ]
+                archive = self._open(partition)
+                if archive is None or not wanted:
+                    continue
+                for decision_id, rows in archive.lookup(wanted).items():
+                    # A rollover interrupted before its commit leaves rows in both tiers
+                    hot_ids = {log.id for log in result[decision_id]}
+                    archived = [AuditLog(**row) for row in rows if row["id"] not in hot_ids]
+                    result[decision_id] = archived + result[decision_id]
+        
+        for decision_id, logs in result.items():
+            logs.sort(key=lambda log: log.created_at)
+        return result
+    
+    def rollover(self, db: Session, now: Optional[datetime] = None) -> List[AuditArchivePartition]:
+        """
+        Move every full month before the hot window to archive files (commits)
+        
+        Months are moved oldest first, each in its own transaction after its
+        file is written. Rows that arrive for an already archived month are
+        merged into its file.
+        
+        Returns:
+            The partitions written
+        """
+        cutoff = _add_months(_month_start(now or datetime.utcnow()), -self.hot_months)
+        written = []
+        while True:
+            oldest = db.query(func.min(AuditLog.created_at)).filter(AuditLog.created_at < cutoff).scalar()
+            if oldest is None:
+                break
+            month = _month_start(oldest)
+            with stage_timer("audit_rollover_month"):
+                written.append(self._archive_month(db, month, _add_months(month, 1)))
+        return written
+    
+    def _archive_month(self, db: Session, month: datetime, end: datetime) -> AuditArchivePartition:
+        in_month = [AuditLog.created_at >= month, AuditLog.created_at < end]
+        rows = [
+            dict(zip(COLUMNS, row))
+            for row in db.query(*[getattr(AuditLog, name) for name in COLUMNS]).filter(*in_month)
+        ]
+        
+        label = month.strftime("%Y-%m")
+        partition = db.get(AuditArchivePartition, label)
+        if partition is None:
+            partition = AuditArchivePartition(month=label, file_name=f"audit-{label}.gba")
+            db.add(partition)
+        else:
+            # Keep each entry once, also when a previous run wrote the file but did not commit
+            archive = self._open(partition)
+            if archive is not None:
+                moving = {row["id"] for row in rows}
+                rows += [row for row in archive.all_rows() if row["id"] not in moving]
+        
+        os.makedirs(self.directory, exist_ok=True)
+        write_archive(os.path.join(self.directory, partition.file_name), rows, self.block_rows)
+        
+        partition.row_count = len(rows)
+        partition.decision_count = len({row["decision_id"] for row in rows})
+        partition.first_created_at = min(row["created_at"] for row in rows)
+        partition.last_created_at = max(row["created_at"] for row in rows)
+        partition.archived_at = datetime.utcnow()
+        db.execute(delete(AuditLog).where(*in_month))
+        db.commit()
+        logger.info("Archived %d audit entries of %s", len(rows), label)
+        return partition
+    
+    def _open(self, partition: AuditArchivePartition) -> Optional[AuditArchive]:
+        """Memory-mapped archive of a partition, reopened after it is rewritten"""
+        cached = self._archives.get(partition.month)
+        if cached is not None and cached[0] == partition.archived_at:
+            return cached[1]
+        path = os.path.join(self.directory, partition.file_name)
+        try:
+            archive = AuditArchive(path)
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping unreadable audit archive %s: %s", path, e)
+            return None
+        self._archives[partition.month] = (partition.archived_at, archive)
+        return archive
+
+
+if __name__ == "__main__":
+    # Nightly job entry point: move months past the hot window to archive files.
+    # The API never rolls over by itself; run this from cron, or with --every-hours
+    # as the one long-running job of a deployment (the audit_rollover compose service)
+    import argparse
+    import time
+    from app.core.database import SessionLocal
+    
+    parser = argparse.ArgumentParser(description="Move audit months past the hot window to archive files")
+    parser.add_argument("--every-hours", type=float, help="keep running, rolling over at this interval")
+    args = parser.parse_args()
+    
+    service = AuditArchiveService()
+    while True:
+        db = SessionLocal()
+        try:
+            for partition in service.rollover(db):
+                print(f"Archived {partition.row_count} audit entries of {partition.month}", flush=True)
+        finally:
+            db.close()
+        if not args.every_hours:
+            break
+        time.sleep(args.every_hours * 3600)
@@ -1,6 +1,87 @@
+import copy
+import itertools
 import numpy as np
 from typing import List, Dict, Any, Optional
-from collections import defaultdict
+
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.services.cohort_store import ColumnarCohort, Cohort
+from app.services.quantile_sketch import QuantileSketch
+from app.services.scoring_rules import ScoringRules
+from app.services.significance import (
+    wilson_interval,
+    two_by_two_tests,
+    bootstrap_rate_ratio
+)
+
+
+# Outcome field name per decision type
+OUTCOME_KEYS = {
+    "hiring": "selected",
+    "promotion": "promoted",
+    "appraisal": "performance_rating",
+    "compensation": "salary_increase",
+    "retention": "retained"
+}
+
+# Decision types whose outcome is a yes/no selection
+BINARY_OUTCOME_TYPES = {"hiring", "promotion", "retention"}
+
+# Protected attributes (if disclosed)
+PROTECTED_ATTRIBUTES = ["gender", "age_group", "ethnicity"]
+
+# Bump when a change to the analysis should invalidate stored results
+ANALYSIS_VERSION = 5
+
+# Joins attribute names and group values of an intersection, e.g. "gender:ethnicity"
+INTERSECTION_SEPARATOR = ":"
+
+# Attributes compared for similar peers, and how close counts as similar
+SIMILARITY_ATTRIBUTES = ["experience_years", "tenure_years", "performance_rating", "role_level"]
+SIMILARITY_WINDOW = 1
+
+# Outcome strings of yes/no decisions, matched case-insensitively
+POSITIVE_OUTCOMES = {"yes", "selected", "promoted", "retained", "true"}
+NEGATIVE_OUTCOMES = {"no", "rejected", "not promoted", "not retained", "false"}
+
+
+def outcome_value(outcome: Any) -> float:
+    """
+    Outcome as a number (NaN when it cannot be interpreted)
+    
+    The one normalizer for stored outcomes: the analysis, the attributes
+    sidecar and everything reading the sidecar must agree on what counts as
+    a selection.
+    """
+    if isinstance(outcome, bool):
+        return 1.0 if outcome else 0.0
+    if isinstance(outcome, (int, float)):
+        return float(outcome)
+    if isinstance(outcome, str):
+        lowered = outcome.strip().lower()
+        if lowered in POSITIVE_OUTCOMES:
+            return 1.0
+        if lowered in NEGATIVE_OUTCOMES:
+            return 0.0
+        try:
+            return float(lowered)
+        except ValueError:
+            pass
+    return np.nan
+
+
+def _number(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+
+def _numeric_column(cohort: ColumnarCohort, name: str) -> Optional[np.ndarray]:
+    """Float values of an attribute (NaN where absent or non-numeric)"""
+    column = cohort.column(name)
+    if column is None:
+        return None
+    if column.kind == "numeric":
+        return column.values
+    return column.map(_number)
 
 
 class BiasAnalysisResult:
@@ -24,47 +105,70 @@ class BiasDetectionService:
     """Service for detecting bias in HR decisions"""
     
     def __init__(self):
-        self.risk_thresholds = {
-            "low": 0.3,
-            "moderate": 0.6,
-            "high": 1.0
+        self.rules = ScoringRules()  # Default policy when none is given
+        self.significance_level = settings.PARITY_SIGNIFICANCE_LEVEL
+        self.confidence_level = settings.PARITY_CONFIDENCE_LEVEL
+        self.bootstrap_iterations = settings.PARITY_BOOTSTRAP_ITERATIONS
+        self.bootstrap_seed = settings.PARITY_BOOTSTRAP_SEED
+        self.bootstrap_time_budget_ms = settings.PARITY_BOOTSTRAP_TIME_BUDGET_MS
+        self.min_cell_size = settings.PARITY_MIN_CELL_SIZE
+    
+    def parameters(self) -> Dict[str, Any]:
+        """Everything besides the inputs that determines an analysis result"""
+        return {
+            "version": ANALYSIS_VERSION,
+            "significance_level": self.significance_level,
+            "confidence_level": self.confidence_level,
+            "bootstrap_iterations": self.bootstrap_iterations,
+            "bootstrap_seed": self.bootstrap_seed,
+            "min_cell_size": self.min_cell_size
         }
     
     def analyze_bias(
         self,
         decision_data: Dict[str, Any],
-        comparable_cohort: List[Dict[str, Any]],
-        decision_type: str
+        comparable_cohort: Cohort,
+        decision_type: str,
+        rules: Optional[ScoringRules] = None
     ) -> BiasAnalysisResult:
         """
         Analyze decision for potential bias
         
         Args:
             decision_data: The decision being evaluated
-            comparable_cohort: List of comparable employee/candidate profiles
+            comparable_cohort: Comparable employee/candidate profiles, as a
+                JSON list or a stored columnar cohort
             decision_type: Type of decision (hiring, promotion, etc.)
-            
+            rules: Scoring policy (defaults to the built-in policy)
+        
         Returns:
             BiasAnalysisResult with risk score, patterns, and metrics
         """
+        rules = rules or self.rules
+        comparable_cohort = ColumnarCohort.wrap(comparable_cohort)
+        
         # Calculate fairness metrics
-        fairness_metrics = self._calculate_fairness_metrics(
-            decision_data, comparable_cohort, decision_type
-        )
+        with stage_timer("fairness_metrics"):
+            fairness_metrics = self._calculate_fairness_metrics(
+                decision_data, comparable_cohort, decision_type, rules
+            )
         
         # Detect outcome deviations
-        comparable_outcomes = self._analyze_outcome_deviations(
-            decision_data, comparable_cohort
-        )
+        with stage_timer("outcome_deviations"):
+            comparable_outcomes = self._analyze_outcome_deviations(
+                decision_data, comparable_cohort
+            )
         
         # Identify specific patterns
-        detected_patterns = self._detect_patterns(
-            decision_data, comparable_cohort, fairness_metrics
-        )
+        with stage_timer("pattern_detection"):
+            detected_patterns = self._detect_patterns(
+                decision_data, comparable_cohort, fairness_metrics, rules
+            )
         
         # Calculate composite risk score
-        risk_score = self._calculate_risk_score(fairness_metrics, detected_patterns)
-        risk_level = self._determine_risk_level(risk_score)
+        with stage_timer("risk_score"):
+            risk_score = self._calculate_risk_score(fairness_metrics, detected_patterns, rules)
+            risk_level = self._determine_risk_level(risk_score, rules)
         
         return BiasAnalysisResult(
             risk_score=risk_score,
@@ -74,110 +178,238 @@ class BiasDetectionService:
             comparable_outcomes=comparable_outcomes
         )
     
+    def analyze_pool(
+        self,
+        decisions: List[Dict[str, Any]],
+        comparable_cohort: Cohort,
+        decision_type: str,
+        rules: Optional[ScoringRules] = None
+    ) -> List[BiasAnalysisResult]:
+        """
+        Analyze many decisions against one shared cohort
+        
+        Demographic parity and the cohort's outcome statistics depend on the
+        cohort alone, so they are computed once: parity per set of disclosed
+        protected attributes, the statistics for all decisions. Z-scores,
+        percentile ranks and similar-peer counts are then computed for every
+        decision at once. Each result equals analyze_bias for that decision.
+        """
+        rules = rules or self.rules
+        comparable_cohort = ColumnarCohort.wrap(comparable_cohort)
+        parity: Dict[tuple, Dict[str, Any]] = {}
+        
+        outcome_key = self._get_outcome_key(decision_type)
+        statistics = self._cohort_outcome_statistics(comparable_cohort, decision_type)
+        positions = self._outcome_positions(
+            statistics, [decision_data.get(outcome_key) for decision_data in decisions]
+        )
+        deviations = self._outcome_deviations(decisions, comparable_cohort)
+        
+        results = []
+        for decision_data, position, comparable_outcomes in zip(decisions, positions, deviations):
+            disclosed = tuple(attr for attr in PROTECTED_ATTRIBUTES if attr in decision_data)
+            if disclosed not in parity:
+                parity[disclosed] = self._analyze_demographic_parity(decision_data, comparable_cohort, rules)
+            
+            # Only the top level is decision-specific; the group statistics are shared read-only
+            fairness_metrics = {**position, "demographic_analysis": dict(parity[disclosed])}
+            detected_patterns = self._detect_patterns(decision_data, comparable_cohort, fairness_metrics, rules)
+            risk_score = self._calculate_risk_score(fairness_metrics, detected_patterns, rules)
+            results.append(BiasAnalysisResult(
+                risk_score=risk_score,
+                risk_level=self._determine_risk_level(risk_score, rules),
+                detected_patterns=detected_patterns,
+                fairness_metrics=fairness_metrics,
+                comparable_outcomes=comparable_outcomes
+            ))
+        return results
+    
+    def rescore(
+        self,
+        fairness_metrics: Dict[str, Any],
+        comparable_outcomes: Dict[str, Any],
+        rules: ScoringRules
+    ) -> BiasAnalysisResult:
+        """
+        Re-apply a scoring policy to a stored analysis without its cohort
+        
+        Every rule acts on fairness_metrics alone, so the parity flags,
+        patterns and risk score can be derived again from the stored copy.
+        """
+        fairness_metrics = copy.deepcopy(fairness_metrics)
+        demo_analysis = fairness_metrics.get("demographic_analysis")
+        if demo_analysis and "significance" in demo_analysis:
+            self._apply_parity_rules(demo_analysis, rules)
+        
+        detected_patterns = self._detect_patterns({}, [], fairness_metrics, rules)
+        risk_score = self._calculate_risk_score(fairness_metrics, detected_patterns, rules)
+        
+        return BiasAnalysisResult(
+            risk_score=risk_score,
+            risk_level=self._determine_risk_level(risk_score, rules),
+            detected_patterns=detected_patterns,
+            fairness_metrics=fairness_metrics,
+            comparable_outcomes=comparable_outcomes
+        )
+    
     def _calculate_fairness_metrics(
         self,
         decision_data: Dict[str, Any],
-        comparable_cohort: List[Dict[str, Any]],
-        decision_type: str
+        comparable_cohort: Cohort,
+        decision_type: str,
+        rules: Optional[ScoringRules] = None,
+        demographic_analysis: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Calculate fairness metrics"""
-        metrics = {}
+        """Calculate fairness metrics (demographic_analysis reuses a parity result of the same cohort)"""
+        cohort = ColumnarCohort.wrap(comparable_cohort)
         
         # Get decision outcome (e.g., selected, promoted, rating)
-        outcome_key = self._get_outcome_key(decision_type)
-        decision_outcome = decision_data.get(outcome_key)
-        
-        # Calculate cohort statistics
-        cohort_outcomes = [emp.get(outcome_key) for emp in comparable_cohort if outcome_key in emp]
-        
-        if cohort_outcomes:
-            # Convert to numeric if possible
-            numeric_outcomes = []
-            for outcome in cohort_outcomes:
-                if isinstance(outcome, (int, float)):
-                    numeric_outcomes.append(float(outcome))
-                elif isinstance(outcome, bool):
-                    numeric_outcomes.append(1.0 if outcome else 0.0)
-                elif isinstance(outcome, str) and outcome.lower() in ['yes', 'selected', 'promoted']:
-                    numeric_outcomes.append(1.0)
-                elif isinstance(outcome, str) and outcome.lower() in ['no', 'rejected', 'not promoted']:
-                    numeric_outcomes.append(0.0)
-            
-            if numeric_outcomes:
-                metrics["cohort_mean"] = np.mean(numeric_outcomes)
-                metrics["cohort_std"] = np.std(numeric_outcomes)
-                metrics["cohort_size"] = len(comparable_cohort)
-                
-                # Decision deviation from cohort
-                if isinstance(decision_outcome, (int, float)):
-                    decision_value = float(decision_outcome)
-                elif isinstance(decision_outcome, bool):
-                    decision_value = 1.0 if decision_outcome else 0.0
-                else:
-                    decision_value = metrics["cohort_mean"]  # Default to mean
-                
-                if metrics["cohort_std"] > 0:
-                    metrics["z_score"] = (decision_value - metrics["cohort_mean"]) / metrics["cohort_std"]
-                else:
-                    metrics["z_score"] = 0.0
-                
-                metrics["decision_value"] = decision_value
+        decision_outcome = decision_data.get(self._get_outcome_key(decision_type))
+        statistics = self._cohort_outcome_statistics(cohort, decision_type)
+        metrics = self._outcome_positions(statistics, [decision_outcome])[0]
         
         # Demographic parity (if protected attributes available)
-        metrics["demographic_analysis"] = self._analyze_demographic_parity(
-            decision_data, comparable_cohort
-        )
+        if demographic_analysis is None:
+            demographic_analysis = self._analyze_demographic_parity(decision_data, cohort, rules)
+        metrics["demographic_analysis"] = demographic_analysis
         
         return metrics
     
+    def _cohort_outcome_statistics(self, cohort: ColumnarCohort, decision_type: str) -> Optional[Dict[str, Any]]:
+        """Outcome statistics shared by every decision compared with the cohort (None without outcomes)"""
+        outcome_column = cohort.column(self._get_outcome_key(decision_type))
+        if outcome_column is None:
+            return None
+        
+        # Convert to numeric if possible
+        if outcome_column.kind == "numeric":
+            outcomes = outcome_column.values
+        else:
+            outcomes = outcome_column.map(outcome_value)
+        numeric_outcomes = outcomes[~np.isnan(outcomes)]
+        if not len(numeric_outcomes):
+            return None
+        
+        # Rank-based position, robust to skewed outcomes such as salary increases
+        if outcome_column.kind == "numeric":
+            sketch = outcome_column.sketch()
+        else:
+            sketch = QuantileSketch.from_values(numeric_outcomes)
+        return {
+            "cohort_mean": np.mean(numeric_outcomes),
+            "cohort_std": np.std(numeric_outcomes),
+            "cohort_size": len(cohort),
+            "sketch": sketch
+        }
+    
+    def _outcome_positions(
+        self,
+        statistics: Optional[Dict[str, Any]],
+        decision_outcomes: List[Any]
+    ) -> List[Dict[str, Any]]:
+        """Fairness metrics placing each decision outcome in the cohort, computed as arrays"""
+        if statistics is None:
+            return [{} for _ in decision_outcomes]
+        
+        mean, std = statistics["cohort_mean"], statistics["cohort_std"]
+        decision_values = np.array([outcome_value(outcome) for outcome in decision_outcomes], dtype=float)
+        decision_values[np.isnan(decision_values)] = mean  # Default to mean
+        
+        # Decision deviation from cohort
+        if std > 0:
+            z_scores = ((decision_values - mean) / std).tolist()
+        else:
+            z_scores = [0.0] * len(decision_values)
+        
+        sketch = statistics["sketch"]
+        percentile_ranks = (100 * sketch.ranks(decision_values)).tolist()
+        median = sketch.quantile(0.5)
+        iqr = sketch.quantile(0.75) - sketch.quantile(0.25)
+        
+        return [
+            {
+                "cohort_mean": mean,
+                "cohort_std": std,
+                "cohort_size": statistics["cohort_size"],
+                "z_score": z_score,
+                "percentile_rank": percentile_rank,
+                "cohort_median": median,
+                "cohort_iqr": iqr,
+                "decision_value": decision_value
+            }
+            for z_score, percentile_rank, decision_value in zip(z_scores, percentile_ranks, decision_values.tolist())
+        ]
+    
     def _analyze_outcome_deviations(
         self,
         decision_data: Dict[str, Any],
-        comparable_cohort: List[Dict[str, Any]]
+        comparable_cohort: Cohort
     ) -> Dict[str, Any]:
         """Analyze how this decision compares to peer outcomes"""
-        outcomes = {
-            "total_comparable": len(comparable_cohort),
-            "similar_attributes": [],
-            "deviation_analysis": {}
-        }
+        return self._outcome_deviations([decision_data], ColumnarCohort.wrap(comparable_cohort))[0]
+    
+    def _outcome_deviations(
+        self,
+        decisions: List[Dict[str, Any]],
+        cohort: ColumnarCohort
+    ) -> List[Dict[str, Any]]:
+        """
+        Peers with a similar value of each key attribute, for many decisions
+        
+        Each attribute's cohort values are sorted once with running sums, so
+        a decision's similar count and mean come from two binary searches
+        instead of a scan of the cohort.
+        """
+        deviations = [
+            {"total_comparable": len(cohort), "similar_attributes": [], "deviation_analysis": {}}
+            for _ in decisions
+        ]
         
         # Find employees with very similar profiles
-        key_attributes = ["experience_years", "tenure_years", "performance_rating", "role_level"]
-        
-        for attr in key_attributes:
-            if attr in decision_data:
-                decision_value = decision_data[attr]
-                similar_values = [
-                    emp.get(attr) for emp in comparable_cohort
-                    if attr in emp and abs(emp.get(attr, 0) - decision_value) <= 1
-                ]
-                
-                if similar_values:
-                    outcomes["similar_attributes"].append({
-                        "attribute": attr,
-                        "decision_value": decision_value,
-                        "similar_count": len(similar_values),
-                        "similar_mean": np.mean(similar_values)
-                    })
+        for attr in SIMILARITY_ATTRIBUTES:
+            rows = [i for i, decision_data in enumerate(decisions) if attr in decision_data]
+            values = _numeric_column(cohort, attr) if rows else None
+            if values is None:
+                continue
+            
+            known = np.sort(values[~np.isnan(values)])
+            sums = np.concatenate([[0.0], np.cumsum(known)])
+            targets = np.array([_number(decisions[i][attr]) for i in rows], dtype=float)
+            start = np.searchsorted(known, targets - SIMILARITY_WINDOW, side="left")
+            end = np.searchsorted(known, targets + SIMILARITY_WINDOW, side="right")
+            counts = end - start
+            means = (sums[end] - sums[start]) / np.maximum(counts, 1)
+            
+            for i, target, count, mean in zip(rows, targets.tolist(), counts.tolist(), means.tolist()):
+                if np.isnan(target) or not count:
+                    continue
+                deviations[i]["similar_attributes"].append({
+                    "attribute": attr,
+                    "decision_value": decisions[i][attr],
+                    "similar_count": count,
+                    "similar_mean": mean
+                })
         
-        return outcomes
+        return deviations
     
     def _detect_patterns(
         self,
         decision_data: Dict[str, Any],
-        comparable_cohort: List[Dict[str, Any]],
-        fairness_metrics: Dict[str, Any]
+        comparable_cohort: Cohort,
+        fairness_metrics: Dict[str, Any],
+        rules: Optional[ScoringRules] = None
     ) -> List[Dict[str, Any]]:
         """Detect specific bias patterns"""
+        rules = rules or self.rules
         patterns = []
         
         # Pattern 1: Significant deviation from cohort mean
         z_score = fairness_metrics.get("z_score", 0)
-        if abs(z_score) > 2:
+        severity = rules.z_severity(z_score)
+        if severity:
             patterns.append({
                 "type": "outcome_deviation",
-                "severity": "moderate" if abs(z_score) < 3 else "high",
+                "severity": severity,
                 "description": f"Decision outcome deviates {abs(z_score):.2f} standard deviations from comparable peers",
                 "z_score": z_score
             })
@@ -193,13 +425,13 @@ class BiasDetectionService:
             })
         
         # Pattern 3: Outlier detection
-        if fairness_metrics.get("cohort_size", 0) >= 10:
+        if fairness_metrics.get("cohort_size", 0) >= rules.outlier_min_cohort:
             decision_value = fairness_metrics.get("decision_value")
             if decision_value is not None:
                 cohort_mean = fairness_metrics.get("cohort_mean", 0)
                 cohort_std = fairness_metrics.get("cohort_std", 1)
                 
-                if abs(decision_value - cohort_mean) > 3 * cohort_std:
+                if abs(decision_value - cohort_mean) > rules.outlier_std_multiple * cohort_std:
                     patterns.append({
                         "type": "statistical_outlier",
                         "severity": "high",
@@ -211,101 +443,198 @@ class BiasDetectionService:
     def _analyze_demographic_parity(
         self,
         decision_data: Dict[str, Any],
-        comparable_cohort: List[Dict[str, Any]]
+        comparable_cohort: Cohort,
+        rules: Optional[ScoringRules] = None
     ) -> Dict[str, Any]:
         """Analyze demographic parity if protected attributes are available"""
+        cohort = ColumnarCohort.wrap(comparable_cohort)
         analysis = {"disparity_detected": False}
         
-        # Protected attributes (if disclosed)
-        protected_attrs = ["gender", "age_group", "ethnicity"]
+        protected_attrs = PROTECTED_ATTRIBUTES
         
+        # Factorize each disclosed attribute; 0 marks rows that did not disclose it
+        attrs, attr_names, attr_codes = [], [], []
         for attr in protected_attrs:
-            if attr in decision_data:
-                # Group cohort by this attribute
-                groups = defaultdict(list)
-                for emp in comparable_cohort:
-                    if attr in emp:
-                        groups[emp[attr]].append(emp)
+            column = cohort.column(attr) if attr in decision_data else None
+            if column is None:
+                continue
+            names, codes = column.distinct()
+            if len(names) >= 2:
+                attrs.append(attr)
+                attr_names.append(names)
+                attr_codes.append(codes + 1)
+        
+        if not attrs:
+            return analysis
+        
+        # One multi-key group-by over every attribute; attribute groups and
+        # intersections are then summed from its (few) cells
+        selected = self._selected_mask(cohort)
+        shape = tuple(len(names) + 1 for names in attr_names)
+        cells, cell_index = np.unique(np.ravel_multi_index(attr_codes, shape), return_inverse=True)
+        cell_counts = np.bincount(cell_index, minlength=len(cells))
+        cell_positives = np.bincount(cell_index[selected], minlength=len(cells))
+        cell_codes = np.unravel_index(cells, shape)
+        
+        # Segments of groups compared with each other, tested together in one batch below
+        segments = []  # (name, attributes, group labels, counts, positives, suppressed groups)
+        for i, attr in enumerate(attrs):
+            present = cell_codes[i] > 0
+            codes = cell_codes[i][present] - 1
+            segments.append((
+                attr, [attr], list(attr_names[i]),
+                np.bincount(codes, weights=cell_counts[present], minlength=len(attr_names[i])).astype(np.int64),
+                np.bincount(codes, weights=cell_positives[present], minlength=len(attr_names[i])).astype(np.int64),
+                0
+            ))
+        # An intersection is only reported with two groups of min_cell_size
+        # each, so it is skipped when too few rows disclose all its attributes
+        max_size = len(attrs) if len(cohort) >= 2 * self.min_cell_size else 1
+        for size in range(2, max_size + 1):
+            for combo in itertools.combinations(range(len(attrs)), size):
+                present = np.logical_and.reduce([cell_codes[i] > 0 for i in combo])
+                if cell_counts[present].sum() < 2 * self.min_cell_size:
+                    continue
+                keys, inverse = np.unique(np.ravel_multi_index(
+                    [cell_codes[i][present] - 1 for i in combo], [len(attr_names[i]) for i in combo]
+                ), return_inverse=True)
+                group_counts = np.bincount(inverse, weights=cell_counts[present], minlength=len(keys)).astype(np.int64)
+                group_positives = np.bincount(inverse, weights=cell_positives[present], minlength=len(keys)).astype(np.int64)
                 
-                # Calculate selection rates per group
-                if len(groups) >= 2:
-                    group_stats = {}
-                    for group_name, members in groups.items():
-                        # Count positive outcomes
-                        positive = sum(
-                            1 for m in members
-                            if m.get("outcome") in [True, "selected", "promoted", "yes"]
-                        )
-                        group_stats[group_name] = {
-                            "count": len(members),
-                            "positive": positive,
-                            "rate": positive / len(members) if len(members) > 0 else 0
-                        }
-                    
-                    # Check for significant disparity (80% rule)
-                    rates = [stats["rate"] for stats in group_stats.values()]
-                    if rates:
-                        min_rate = min(rates)
-                        max_rate = max(rates)
-                        
-                        if max_rate > 0 and (min_rate / max_rate) < 0.8:
-                            analysis["disparity_detected"] = True
-                            analysis["severity"] = "moderate"
-                            analysis["description"] = f"Demographic disparity detected in {attr}"
-                            analysis["details"] = group_stats
+                # Small cells are neither compared nor reported
+                kept = group_counts >= self.min_cell_size
+                if kept.sum() < 2:
+                    continue
+                group_codes = np.unravel_index(keys[kept], [len(attr_names[i]) for i in combo])
+                labels = list(zip(*[
+                    [attr_names[i][code] for code in codes.tolist()]
+                    for i, codes in zip(combo, group_codes)
+                ]))
+                segments.append((
+                    INTERSECTION_SEPARATOR.join(attrs[i] for i in combo), [attrs[i] for i in combo], labels,
+                    group_counts[kept], group_positives[kept], int((~kept).sum())
+                ))
+        
+        # Flatten every segment's groups into contiguous arrays
+        counts = np.concatenate([segment[3] for segment in segments])
+        positives = np.concatenate([segment[4] for segment in segments])
+        segment_starts = np.cumsum([0] + [len(segment[2]) for segment in segments[:-1]])
+        segment_ends = np.append(segment_starts[1:], len(counts))
+        rates = positives / counts
+        intervals = wilson_interval(positives, counts, self.confidence_level)
+        
+        # Compare the lowest- and highest-rate group of each segment
+        lo_idx = np.array([s + np.argmin(rates[s:e]) for s, e in zip(segment_starts, segment_ends)])
+        hi_idx = np.array([s + np.argmax(rates[s:e]) for s, e in zip(segment_starts, segment_ends)])
+        tests = two_by_two_tests(
+            positives[lo_idx], counts[lo_idx] - positives[lo_idx],
+            positives[hi_idx], counts[hi_idx] - positives[hi_idx]
+        )
+        
+        bootstrap = None
+        if self.bootstrap_iterations > 0:
+            bootstrap = bootstrap_rate_ratio(
+                positives, counts, segment_starts,
+                iterations=self.bootstrap_iterations,
+                seed=self.bootstrap_seed,
+                time_budget_ms=self.bootstrap_time_budget_ms,
+                confidence=self.confidence_level
+            )
+        
+        # Python numbers once for all groups, rather than per element
+        group_columns = list(zip(
+            counts.tolist(), positives.tolist(), rates.tolist(),
+            intervals["lower"].tolist(), intervals["upper"].tolist()
+        ))
+        p_values, exact = tests["p_value"].tolist(), tests["exact"].tolist()
+        
+        significance, intersectional = {}, {}
+        for i, (name, segment_attrs, labels, _, _, suppressed) in enumerate(segments):
+            start = segment_starts[i]
+            group_stats = {}
+            for label, (count, positive, rate, lower, upper) in zip(labels, group_columns[start:start + len(labels)]):
+                stats = {"count": count, "positive": positive, "rate": rate, "ci_lower": lower, "ci_upper": upper}
+                if len(segment_attrs) > 1:
+                    stats = {"values": dict(zip(segment_attrs, label)), **stats}
+                    label = INTERSECTION_SEPARATOR.join(map(str, label))
+                group_stats[label] = stats
+            
+            min_rate = rates[lo_idx[i]]
+            max_rate = rates[hi_idx[i]]
+            ratio = min_rate / max_rate if max_rate > 0 else 1.0
+            p_value = p_values[i]
+            significant = p_value < self.significance_level
+            
+            result = {
+                "rate_ratio": float(ratio),
+                "test": "fisher_exact" if exact[i] else "chi_square",
+                "p_value": p_value,
+                "significant": bool(significant),
+                "groups": group_stats
+            }
+            if bootstrap is not None:
+                result["bootstrap_ratio_ci"] = [
+                    float(bootstrap["lower"][i]), float(bootstrap["upper"][i])
+                ]
+                result["bootstrap_iterations"] = bootstrap["iterations"]
+            
+            if len(segment_attrs) == 1:
+                significance[name] = result
+            else:
+                intersectional[name] = {"attributes": segment_attrs, **result, "suppressed_groups": suppressed}
+        
+        analysis["significance"] = significance
+        if intersectional:
+            analysis["intersectional"] = intersectional
+        self._apply_parity_rules(analysis, rules or self.rules)
         
         return analysis
     
+    def _apply_parity_rules(self, analysis: Dict[str, Any], rules: ScoringRules):
+        """Set the disparity flag from per-attribute and intersectional results (80% rule by default)"""
+        for key in ["disparity_detected", "severity", "description", "details", "flagged_attributes"]:
+            analysis.pop(key, None)
+        analysis["disparity_detected"] = False
+        
+        # A rate ratio of 1.0 stands for "no group selected", so it never flags
+        results = {**analysis["significance"], **analysis.get("intersectional", {})}
+        flagged = {
+            name: result.get("groups") for name, result in results.items()
+            if rules.parity_flagged(result["rate_ratio"], result["significant"])
+        }
+        if flagged:
+            analysis["disparity_detected"] = True
+            analysis["severity"] = rules.parity_severity
+            analysis["description"] = f"Demographic disparity detected in {', '.join(flagged)}"
+            analysis["flagged_attributes"] = list(flagged)
+            analysis["details"] = flagged
+    
+    def _selected_mask(self, cohort: ColumnarCohort) -> np.ndarray:
+        """Rows whose generic outcome field marks a positive selection"""
+        column = cohort.column("outcome")
+        if column is None:
+            return np.zeros(len(cohort), dtype=bool)
+        return column.map(lambda outcome: outcome_value(outcome) == 1.0, missing=0.0) > 0
+    
     def _calculate_risk_score(
         self,
         fairness_metrics: Dict[str, Any],
-        detected_patterns: List[Dict[str, Any]]
+        detected_patterns: List[Dict[str, Any]],
+        rules: Optional[ScoringRules] = None
     ) -> float:
-        """Calculate composite risk score (0-1)"""
-        risk_components = []
-        
-        # Component 1: Z-score deviation
-        z_score = abs(fairness_metrics.get("z_score", 0))
-        z_risk = min(z_score / 3, 1.0)  # Normalize to 0-1
-        risk_components.append(z_risk * 0.4)  # 40% weight
-        
-        # Component 2: Number and severity of patterns
-        pattern_risk = 0
-        for pattern in detected_patterns:
-            severity = pattern.get("severity", "low")
-            if severity == "high":
-                pattern_risk += 0.3
-            elif severity == "moderate":
-                pattern_risk += 0.15
-            else:
-                pattern_risk += 0.05
-        
-        pattern_risk = min(pattern_risk, 1.0)
-        risk_components.append(pattern_risk * 0.4)  # 40% weight
-        
-        # Component 3: Demographic disparity
+        """Calculate composite risk score (0-1): z-score, pattern and disparity components"""
+        rules = rules or self.rules
         demo_analysis = fairness_metrics.get("demographic_analysis", {})
-        if demo_analysis.get("disparity_detected"):
-            risk_components.append(0.2)  # 20% weight
-        
-        return min(sum(risk_components), 1.0)
+        return rules.risk_score(
+            fairness_metrics.get("z_score", 0),
+            [pattern.get("severity", "low") for pattern in detected_patterns],
+            bool(demo_analysis.get("disparity_detected"))
+        )
     
-    def _determine_risk_level(self, risk_score: float) -> str:
+    def _determine_risk_level(self, risk_score: float, rules: Optional[ScoringRules] = None) -> str:
         """Determine risk level from score"""
-        if risk_score < self.risk_thresholds["low"]:
-            return "low"
-        elif risk_score < self.risk_thresholds["moderate"]:
-            return "moderate"
-        else:
-            return "high"
+        return (rules or self.rules).risk_level(risk_score)
     
     def _get_outcome_key(self, decision_type: str) -> str:
         """Get the outcome field name for a decision type"""
-        outcome_keys = {
-            "hiring": "selected",
-            "promotion": "promoted",
-            "appraisal": "performance_rating",
-            "compensation": "salary_increase",
-            "retention": "retained"
-        }
-        return outcome_keys.get(decision_type, "outcome")
+        return OUTCOME_KEYS.get(decision_type, "outcome")
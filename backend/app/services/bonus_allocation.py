@@ -0,0 +1,186 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+import numpy as np
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional
+
+from app.core.metrics import stage_timer
+from app.models.bonus import BonusDistribution, BonusAllocation, BonusDistributionStatus
+from app.services.bias_detection import BiasDetectionService
+from app.services.contribution_scoring import ContributionInputs, ContributionScorer
+from app.services.rating_aggregation import RatingAggregationService
+from app.services.scoring_policy import ScoringPolicyService
+from app.services.scoring_rules import RISK_LEVELS
+
+# Statuses whose allocations may still be recalculated
+RECALCULABLE = {BonusDistributionStatus.DRAFT.value, BonusDistributionStatus.CALCULATED.value}
+
+
+def apportion(weights: np.ndarray, units: int) -> np.ndarray:
+    """
+    Split an integer number of units in proportion to weights, exactly
+    
+    Largest remainder method: every share is its quota rounded down, and
+    the units left over go to the largest fractional parts (earlier rows
+    win ties), so the shares always sum to units.
+    """
+    if len(weights) == 0:
+        return np.zeros(0, dtype=np.int64)
+    quotas = weights / weights.sum() * units
+    shares = np.floor(quotas).astype(np.int64)
+    order = np.argsort(-(quotas - shares), kind="stable")
+    remainder = int(units - shares.sum())
+    # Float error can leave the floors one unit over or under; fix from the matching end
+    if remainder > 0:
+        shares[order[:remainder]] += 1
+    elif remainder < 0:
+        shares[order[remainder:]] -= 1
+    return shares
+
+
+class BonusAllocationService:
+    """
+    Computes bonus pool splits from project, task and rating data
+    
+    The pool is split in proportion to the employees' contribution scores
+    (see ContributionScorer), to the exact cent. Every allocation is then
+    analyzed as a compensation decision against the rest of the pool.
+    """
+    
+    def __init__(
+        self,
+        bias: BiasDetectionService,
+        policies: ScoringPolicyService,
+        ratings: RatingAggregationService,
+        scorer: ContributionScorer,
+        chunk_size: int = 1000
+    ):
+        self.bias = bias
+        self.policies = policies
+        self.ratings = ratings
+        self.scorer = scorer
+        self.chunk_size = chunk_size
+    
+    def compute(self, inputs: ContributionInputs, total_amount: float) -> Dict[str, Any]:
+        """
+        Contribution scores and pool split in one pass over the arrays
+        
+        Returns:
+            ContributionScorer.score result plus per-employee "cents" and
+            "basis_points" arrays
+        """
+        scored = self.scorer.score(inputs)
+        contribution = scored["contribution"]
+        # Without any contribution the pool is split evenly
+        shares = contribution if contribution.sum() > 0 else np.ones(len(contribution))
+        total_cents = int((Decimal(str(total_amount)) * 100).to_integral_value(ROUND_HALF_UP))
+        
+        return {
+            **scored,
+            "cents": apportion(shares, total_cents),
+            "basis_points": apportion(shares, 10000)
+        }
+    
+    def calculate(
+        self,
+        db: Session,
+        distribution: BonusDistribution,
+        employee_attributes: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Compute, screen and store the allocations of a distribution (commits)
+        
+        Args:
+            db: Database session
+            distribution: A draft or calculated distribution
+            employee_attributes: Optional extra profile fields per employee id
+                (e.g. gender, age_group) used by the bias analysis
+        
+        Returns:
+            Summary with allocation count, allocated total and risk levels
+        
+        Raises:
+            ValueError: If the distribution is already approved or paid
+        """
+        if distribution.status not in RECALCULABLE:
+            raise ValueError(f"Allocations of a {distribution.status} distribution cannot change")
+        
+        with stage_timer("bonus_load"):
+            inputs = self.scorer.load_inputs(
+                db,
+                distribution.organization_id,
+                distribution.date_range_start,
+                distribution.date_range_end,
+                distribution.eligible_departments,
+                distribution.eligible_employees
+            )
+        with stage_timer("bonus_compute"):
+            computed = self.compute(inputs, distribution.total_amount)
+        
+        # Python numbers, so the cohort encodes the amounts as a numeric column
+        amounts = (computed["cents"] / 100).tolist()
+        percentages = (computed["basis_points"] / 100).tolist()
+        contributions = computed["contribution"].tolist()
+        employee_attributes = employee_attributes or {}
+        profiles = [
+            {
+                **employee_attributes.get(employee_id, {}),
+                "employee_id": employee_id,
+                "department": inputs.employee_departments[i],
+                "role_title": inputs.employee_roles[i],
+                "contribution_percentage": percentages[i],
+                "salary_increase": amounts[i]  # Compensation outcome: the bonus amount
+            }
+            for i, employee_id in enumerate(inputs.employee_ids)
+        ]
+        
+        # Ratings of the distribution's period let the analysis compare similar performers
+        self.ratings.fill_performance_ratings(
+            db, distribution.organization_id, profiles, distribution.date_range_start, distribution.date_range_end
+        )
+        
+        # Every allocation is a compensation decision compared with the whole pool
+        with stage_timer("bonus_bias_analysis"):
+            policy = self.policies.resolve(db, distribution.organization_id, "compensation")
+            analyses = self.bias.analyze_pool(profiles, profiles, "compensation", self.policies.rules_for(policy))
+        
+        breakdowns = self.scorer.breakdowns(inputs, computed)
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "distribution_id": distribution.id,
+                "employee_id": employee_id,
+                "contribution_percentage": percentages[i],
+                "bonus_amount": amounts[i],
+                "calculation_details": {
+                    "projects": breakdowns[i],
+                    "total_contribution_score": contributions[i],
+                    "detected_patterns": analyses[i].detected_patterns
+                },
+                "risk_score": analyses[i].risk_score,
+                "risk_level": analyses[i].risk_level,
+                "created_at": now
+            }
+            for i, employee_id in enumerate(inputs.employee_ids)
+        ]
+        
+        # Replace the previous calculation in one transaction
+        with stage_timer("bonus_write"):
+            db.execute(delete(BonusAllocation).where(BonusAllocation.distribution_id == distribution.id))
+            for start in range(0, len(rows), self.chunk_size):
+                db.execute(insert(BonusAllocation), rows[start:start + self.chunk_size])
+            distribution.status = BonusDistributionStatus.CALCULATED.value
+            db.commit()
+        
+        risk_levels = dict.fromkeys(RISK_LEVELS, 0)
+        for analysis in analyses:
+            risk_levels[analysis.risk_level] = risk_levels.get(analysis.risk_level, 0) + 1
+        return {
+            "allocations": len(rows),
+            "projects": len(inputs.project_ids),
+            "total_allocated": int(computed["cents"].sum()) / 100,
+            "risk_distribution": risk_levels
+        }
@@ -0,0 +1,205 @@
+import json
+import uuid
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+
+from app.core.metrics import stage_timer
+from app.models.audit_log import AuditLog
+from app.models.decision import (
+    Decision,
+    DecisionAttributes,
+    DecisionIdempotencyKey,
+    DecisionStatus,
+    DecisionType
+)
+from app.models.user import User
+from app.services.decision_attributes import extract_attributes
+from app.services.rating_aggregation import RatingAggregationService
+
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+# Keys per IN (...) lookup, below SQLite's bound parameter limit
+KEY_LOOKUP_BATCH = 500
+
+
+class BulkCreateResult:
+    """Outcome of a bulk decision creation"""
+    def __init__(self):
+        self.created: List[Dict[str, Any]] = []
+        self.duplicates: List[Dict[str, Any]] = []
+        self.errors: List[Dict[str, Any]] = []
+    
+    def to_dict(self, received: int) -> Dict[str, Any]:
+        return {
+            "received": received,
+            "created": len(self.created),
+            "created_ids": [row["id"] for row in self.created],
+            "duplicates": self.duplicates,
+            "errors": sorted(self.errors, key=lambda error: error["index"])
+        }
+
+
+def parse_bulk_payload(body: bytes, content_type: str) -> List[Any]:
+    """
+    Split a request body into raw rows
+    
+    NDJSON lines that fail to parse are returned as ValueError instances so
+    the caller can report them per row.
+    
+    Raises:
+        ValueError: If a JSON body is malformed or not an array
+    """
+    text = body.decode("utf-8")
+    if content_type.split(";")[0].strip().lower() in NDJSON_CONTENT_TYPES:
+        rows = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                rows.append(ValueError(f"Invalid JSON: {e}"))
+        return rows
+    
+    data = json.loads(text)
+    if isinstance(data, dict) and isinstance(data.get("decisions"), list):
+        data = data["decisions"]
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of decisions or NDJSON")
+    return data
+
+
+def bulk_create_decisions(
+    db: Session,
+    rows: List[Dict[str, Any]],
+    user: User,
+    chunk_size: int = 1000,
+    ratings: Optional[RatingAggregationService] = None
+) -> BulkCreateResult:
+    """
+    Insert validated decisions, their attribute rows and audit entries in chunks
+    
+    Rows carrying an idempotency_key that this user already submitted are
+    reported as duplicates instead of being inserted again. Each chunk is
+    committed on its own, so a retried request only inserts what is missing.
+    
+    Args:
+        db: Database session
+        rows: Validated rows with index, decision_type, employee_data,
+            comparable_cohort and idempotency_key
+        user: The creating user
+        chunk_size: Rows per executemany batch and commit
+        ratings: Fills aggregated performance ratings into profiles naming
+            an employee but lacking a rating, one lookup per chunk
+    
+    Returns:
+        BulkCreateResult with created rows (given their id and attribute
+        values), duplicates and per-row errors
+    """
+    result = BulkCreateResult()
+    existing = _existing_keys(db, user.id, [row["idempotency_key"] for row in rows if row["idempotency_key"]])
+    
+    pending = []
+    seen: Dict[str, int] = {}
+    for row in rows:
+        key = row["idempotency_key"]
+        if key in existing:
+            result.duplicates.append({"index": row["index"], "idempotency_key": key, "id": existing[key]})
+        elif key in seen:
+            result.errors.append({
+                "index": row["index"],
+                "errors": [{"loc": ["idempotency_key"], "msg": f"Duplicate of row {seen[key]} in this request"}]
+            })
+        else:
+            if key:
+                seen[key] = row["index"]
+            pending.append(row)
+    
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        if ratings is not None:
+            ratings.fill_performance_ratings(db, user.organization_id, [
+                profile for row in chunk
+                for profile in [row["employee_data"], *(row["comparable_cohort"] or [])]
+            ])
+        with stage_timer("bulk_insert_chunk"):
+            try:
+                _insert_chunk(db, chunk, user)
+                db.commit()
+            except IntegrityError:
+                # A concurrent request claimed one of the keys; the client can retry safely
+                db.rollback()
+                for row in chunk:
+                    result.errors.append({
+                        "index": row["index"],
+                        "errors": [{"loc": [], "msg": "Conflicting concurrent insert, retry the request"}]
+                    })
+                continue
+        result.created.extend(chunk)
+    
+    return result
+
+
+def _existing_keys(db: Session, user_id: str, keys: List[str]) -> Dict[str, str]:
+    """Idempotency keys already stored for a user, mapped to their decision ids"""
+    found = {}
+    unique_keys = list(dict.fromkeys(keys))
+    for start in range(0, len(unique_keys), KEY_LOOKUP_BATCH):
+        batch = unique_keys[start:start + KEY_LOOKUP_BATCH]
+        found.update(db.query(
+            DecisionIdempotencyKey.idempotency_key,
+            DecisionIdempotencyKey.decision_id
+        ).filter(
+            DecisionIdempotencyKey.user_id == user_id,
+            DecisionIdempotencyKey.idempotency_key.in_(batch)
+        ).all())
+    return found
+
+
+def _insert_chunk(db: Session, chunk: List[Dict[str, Any]], user: User):
+    """executemany inserts for one chunk (caller commits)"""
+    now = datetime.utcnow()
+    decisions, attributes, audit_logs, keys = [], [], [], []
+    for row in chunk:
+        row["id"] = str(uuid.uuid4())
+        decisions.append({
+            "id": row["id"],
+            "decision_type": DecisionType(row["decision_type"]),
+            "employee_data": row["employee_data"],
+            "comparable_cohort": row["comparable_cohort"],
+            "status": DecisionStatus.PENDING,
+            "created_by": user.id,
+            "created_at": now,
+            "organization_id": user.organization_id
+        })
+        row["attributes"] = {
+            "decision_id": row["id"],
+            "organization_id": user.organization_id,
+            "decision_type": row["decision_type"],
+            **extract_attributes(row["employee_data"], row["decision_type"])
+        }
+        attributes.append(row["attributes"])
+        audit_logs.append({
+            "id": str(uuid.uuid4()),
+            "decision_id": row["id"],
+            "user_id": user.id,
+            "action": "decision_created",
+            "details": {"decision_type": row["decision_type"], "source": "bulk"},
+            "created_at": now
+        })
+        if row["idempotency_key"]:
+            keys.append({
+                "user_id": user.id,
+                "idempotency_key": row["idempotency_key"],
+                "decision_id": row["id"],
+                "created_at": now
+            })
+    
+    db.execute(insert(Decision), decisions)
+    db.execute(insert(DecisionAttributes), attributes)
+    db.execute(insert(AuditLog), audit_logs)
+    if keys:
+        db.execute(insert(DecisionIdempotencyKey), keys)
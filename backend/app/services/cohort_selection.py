@@ -0,0 +1,273 @@
+import time
+import threading
+import numpy as np
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.shared_state import shared_state
+from app.models.decision import Decision, DecisionAttributes, DecisionCohortMember, DecisionType
+from app.services.cohort_store import CohortStore, Cohort
+from app.services.decision_attributes import build_decision_attributes
+
+
+class CandidatePool:
+    """Columnar snapshot of an organization's stored decisions of one type"""
+    def __init__(
+        self,
+        decision_ids: np.ndarray,
+        role_level: np.ndarray,
+        department: np.ndarray,
+        experience_years: np.ndarray,
+        tenure_years: np.ndarray,
+        loaded_at: float,
+        version: str
+    ):
+        self.decision_ids = decision_ids
+        self.role_level = role_level
+        self.department = department
+        self.experience_years = experience_years
+        self.tenure_years = tenure_years
+        self.loaded_at = loaded_at
+        self.version = version
+    
+    def extended(self, attributes: List[Dict[str, Any]], version: str) -> "CandidatePool":
+        """
+        Pool with decisions appended, at a new version
+        
+        Decisions already present (a concurrent reload may have picked them
+        up) and decisions without an outcome are skipped, as a reload would
+        skip them.
+        """
+        present = set(self.decision_ids.tolist())
+        rows = [
+            row for row in attributes
+            if row["outcome"] is not None and row["decision_id"] not in present
+        ]
+        
+        def column(name, dtype):
+            return np.array([row[name] for row in rows], dtype=dtype)
+        
+        return CandidatePool(
+            decision_ids=np.concatenate([self.decision_ids, column("decision_id", object)]),
+            role_level=np.concatenate([self.role_level, column("role_level", float)]),
+            department=np.concatenate([self.department, column("department", object)]),
+            experience_years=np.concatenate([self.experience_years, column("experience_years", float)]),
+            tenure_years=np.concatenate([self.tenure_years, column("tenure_years", float)]),
+            loaded_at=self.loaded_at,
+            version=version
+        )
+
+
+class CohortSelectionService:
+    """Service for selecting comparable peers from stored decisions"""
+    
+    def __init__(self):
+        self.min_size = settings.COHORT_MIN_SIZE
+        self.max_size = settings.COHORT_MAX_SIZE
+        self.experience_window = settings.COHORT_EXPERIENCE_WINDOW
+        self.tenure_window = settings.COHORT_TENURE_WINDOW
+        self.pool_ttl = settings.COHORT_POOL_TTL_SECONDS
+        self._pools: Dict[Tuple[Optional[str], str], CandidatePool] = {}
+        self._lock = threading.Lock()
+        self.store = CohortStore(settings.COHORT_STORE_DIR)
+    
+    def select_cohort(self, db: Session, decision: Decision) -> List[str]:
+        """
+        Select comparable peers for a decision
+        
+        Peers share the decision type and organization. Matching starts strict
+        (same role level and department, experience and tenure within the
+        configured windows) and relaxes step by step until at least min_size
+        peers are found. The closest max_size peers are kept.
+        
+        Args:
+            db: Database session
+            decision: The decision needing a cohort
+        
+        Returns:
+            Decision ids of the selected peers
+        """
+        attributes = decision.attributes or build_decision_attributes(decision)
+        pool = self._get_pool(db, decision.organization_id, attributes.decision_type)
+        
+        candidates = pool.decision_ids != decision.id
+        if not candidates.any():
+            return []
+        
+        role_level = attributes.role_level
+        experience = attributes.experience_years
+        tenure = attributes.tenure_years
+        
+        role_match = self._window_mask(pool.role_level, role_level, 0.0)
+        near_role = self._window_mask(pool.role_level, role_level, 1.0)
+        same_department = (
+            pool.department == attributes.department
+            if attributes.department is not None
+            else np.ones(len(pool.decision_ids), dtype=bool)
+        )
+        experience_match = self._window_mask(pool.experience_years, experience, self.experience_window)
+        tenure_match = self._window_mask(pool.tenure_years, tenure, self.tenure_window)
+        
+        # Strictest first; each step drops or widens one criterion
+        steps = [
+            role_match & same_department & experience_match & tenure_match,
+            role_match & experience_match & tenure_match,
+            role_match & experience_match,
+            near_role & experience_match,
+            near_role,
+            np.ones(len(pool.decision_ids), dtype=bool)
+        ]
+        
+        mask = steps[-1] & candidates
+        for step in steps:
+            if np.count_nonzero(step & candidates) >= self.min_size:
+                mask = step & candidates
+                break
+        
+        selected = np.flatnonzero(mask)
+        if len(selected) > self.max_size:
+            distance = self._distance(pool, selected, role_level, experience, tenure)
+            selected = selected[np.argpartition(distance, self.max_size)[:self.max_size]]
+        
+        return pool.decision_ids[selected].tolist()
+    
+    def assign_cohort(self, db: Session, decision: Decision) -> List[str]:
+        """Select a cohort and persist it by reference (caller commits)"""
+        member_ids = self.select_cohort(db, decision)
+        decision.cohort_members = [
+            DecisionCohortMember(member_decision_id=member_id) for member_id in member_ids
+        ]
+        # Any stored copy reflects the previous members
+        self.store.delete(decision.id)
+        return member_ids
+    
+    def resolve_cohort(self, db: Session, decision: Decision) -> Cohort:
+        """
+        Get the comparable cohort profiles for a decision
+        
+        A stored columnar copy is memory-mapped when present. Otherwise a
+        client-supplied cohort wins, falling back to the referenced peers
+        (selected and persisted first if none exist yet), and the result is
+        stored for later analyses.
+        """
+        stored = self.store.load(decision.id)
+        if stored is not None:
+            record_cache("cohort_store", hit=True)
+            return stored
+        record_cache("cohort_store", hit=False)
+        
+        if decision.comparable_cohort:
+            return self.store.save(decision.id, decision.comparable_cohort)
+        
+        if not decision.cohort_members:
+            self.assign_cohort(db, decision)
+            db.commit()
+        
+        member_ids = [member.member_decision_id for member in decision.cohort_members]
+        if not member_ids:
+            return []
+        
+        rows = db.query(Decision.employee_data).filter(Decision.id.in_(member_ids)).all()
+        return self.store.save(decision.id, [employee_data for (employee_data,) in rows])
+    
+    def add_decisions(self, organization_id: Optional[str], decision_type: str, attributes: List[Dict[str, Any]]):
+        """
+        Append newly created decisions to the cached pool (after commit)
+        
+        Other workers see the new version and reload their copies. This
+        worker keeps its pool when no other change came in since it was
+        loaded, so the create-then-analyze flow does not reload on every call.
+        
+        Args:
+            organization_id: Organization of the decisions
+            decision_type: Their decision type
+            attributes: Their attribute values with decision_id (see attribute_values)
+        """
+        previous, version = shared_state.bump_version(self._pool_scope(organization_id, decision_type))
+        key = (organization_id, decision_type)
+        with self._lock:
+            pool = self._pools.pop(key, None)
+            if pool is not None and pool.version == previous:
+                self._pools[key] = pool.extended(attributes, version)
+    
+    def invalidate(self, organization_id: Optional[str], decision_type: Optional[str] = None):
+        """Drop cached candidate pools after decisions are changed (every type when decision_type is None)"""
+        decision_types = [decision_type] if decision_type else [member.value for member in DecisionType]
+        for dtype in decision_types:
+            # Other workers see the new version and reload their copies too
+            shared_state.bump_version(self._pool_scope(organization_id, dtype))
+        with self._lock:
+            for key in list(self._pools):
+                if key[0] == organization_id and key[1] in decision_types:
+                    del self._pools[key]
+    
+    def _get_pool(self, db: Session, organization_id: Optional[str], decision_type: str) -> CandidatePool:
+        """Cached per-org candidate pool, reloaded after the TTL expires or a change elsewhere"""
+        key = (organization_id, decision_type)
+        now = time.monotonic()
+        version = shared_state.get_version(self._pool_scope(organization_id, decision_type))
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is not None and pool.version == version and now - pool.loaded_at < self.pool_ttl:
+                record_cache("cohort_pool", hit=True)
+                return pool
+        record_cache("cohort_pool", hit=False)
+        
+        # Served by ix_decision_attributes_org_type_role
+        rows = db.query(
+            DecisionAttributes.decision_id,
+            DecisionAttributes.role_level,
+            DecisionAttributes.department,
+            DecisionAttributes.experience_years,
+            DecisionAttributes.tenure_years
+        ).filter(
+            DecisionAttributes.organization_id == organization_id,
+            DecisionAttributes.decision_type == decision_type,
+            DecisionAttributes.outcome.isnot(None)
+        ).all()
+        
+        columns = list(zip(*rows)) if rows else [[], [], [], [], []]
+        pool = CandidatePool(
+            decision_ids=np.array(columns[0], dtype=object),
+            role_level=np.array(columns[1], dtype=float),
+            department=np.array(columns[2], dtype=object),
+            experience_years=np.array(columns[3], dtype=float),
+            tenure_years=np.array(columns[4], dtype=float),
+            loaded_at=now,
+            version=version
+        )
+        
+        with self._lock:
+            self._pools[key] = pool
+        return pool
+    
+    def _pool_scope(self, organization_id: Optional[str], decision_type: str) -> str:
+        return f"cohort_pool:{organization_id or ''}:{decision_type}"
+    
+    def _window_mask(self, values: np.ndarray, target: Optional[float], window: float) -> np.ndarray:
+        """Match values within +/- window of target (everything matches an unknown target)"""
+        if target is None:
+            return np.ones(len(values), dtype=bool)
+        return np.abs(values - target) <= window
+    
+    def _distance(
+        self,
+        pool: CandidatePool,
+        selected: np.ndarray,
+        role_level: Optional[float],
+        experience: Optional[float],
+        tenure: Optional[float]
+    ) -> np.ndarray:
+        """Scaled attribute distance used to keep the closest peers"""
+        distance = np.zeros(len(selected))
+        for values, target, scale in [
+            (pool.role_level, role_level, 1.0),
+            (pool.experience_years, experience, self.experience_window),
+            (pool.tenure_years, tenure, self.tenure_window)
+        ]:
+            if target is not None:
+                # Peers missing the attribute rank last
+                distance += np.nan_to_num(np.abs(values[selected] - target) / scale, nan=1e6)
+        return distance
@@ -0,0 +1,389 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import uuid
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+from app.services.quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+# File layout (little endian):
+#   magic (8 bytes) | format version (uint32) | header length (uint32) | JSON header
+#   padding to 8 bytes, then one 8-byte aligned block per column
+# Numeric columns with more values than a sketch holds exactly also get a
+# block of quantile sketch items, described by the column's "sketch" entry
+MAGIC = b"GBCOHORT"
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<8sII")
+ALIGNMENT = 8
+
+FLOAT_DTYPE = "<f8"
+# JSON integers beyond this lose precision as float64
+MAX_EXACT_INTEGER = 2 ** 53
+
+NUMERIC_TYPES = {int, float}
+HASHABLE_TYPES = {str, bool, int, float, type(None)}
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _code_dtype(n_categories: int) -> str:
+    if n_categories < 2 ** 7:
+        return "<i1"
+    if n_categories < 2 ** 15:
+        return "<i2"
+    return "<i4"
+
+
+class CohortColumn:
+    """
+    One attribute of a columnar cohort
+    
+    Numeric columns hold float64 values with NaN where a profile lacks the
+    attribute. Every other column is dictionary encoded: integer codes into a
+    list of distinct JSON values, with -1 where the attribute is absent.
+    """
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        values: np.ndarray,
+        categories: Optional[List[Any]] = None,
+        integer: bool = False,
+        sketch: Optional[QuantileSketch] = None
+    ):
+        self.name = name
+        self.kind = kind
+        self.values = values
+        self.categories = categories
+        self.integer = integer
+        self._sketch = sketch
+    
+    @property
+    def present(self) -> np.ndarray:
+        """Rows that carry this attribute"""
+        if self.kind == "numeric":
+            return ~np.isnan(self.values)
+        return self.values >= 0
+    
+    def distinct(self) -> Tuple[List[Any], np.ndarray]:
+        """
+        Distinct values in order of first appearance, plus per-row codes
+        
+        Returns:
+            (values, codes) where codes index values and are -1 for absent rows
+        """
+        if self.kind == "category":
+            # Categories are encoded in order of first appearance
+            return list(self.categories), self.values.astype(np.int64)
+        
+        present = self.present
+        codes = np.full(len(self.values), -1, dtype=np.int64)
+        unique, first_seen, inverse = np.unique(self.values[present], return_index=True, return_inverse=True)
+        order = np.argsort(first_seen, kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        codes[present] = rank[inverse]
+        return [self._to_python(value) for value in unique[order].tolist()], codes
+    
+    def sketch(self) -> QuantileSketch:
+        """Quantile sketch of a numeric column: stored with the cohort, or built once on first use"""
+        if self._sketch is None:
+            self._sketch = QuantileSketch.from_values(self.values[self.present])
+        return self._sketch
+    
+    def map(self, convert, missing: float = np.nan) -> np.ndarray:
+        """Apply convert to each distinct value and broadcast the float result to rows"""
+        values, codes = self.distinct()
+        mapped = np.array([convert(value) for value in values] + [missing], dtype=float)
+        # Absent rows (-1) pick up the trailing missing value
+        return mapped[codes]
+    
+    def to_list(self) -> List[Any]:
+        """Row values as JSON values (None where absent)"""
+        if self.kind == "numeric":
+            return [None if value != value else self._to_python(value) for value in self.values.tolist()]
+        categories = self.categories
+        return [categories[code] if code >= 0 else None for code in self.values.tolist()]
+    
+    def _to_python(self, value: float) -> Any:
+        return int(value) if self.integer else value
+
+
+class _Absent:
+    """Marks profiles lacking an attribute while encoding"""
+
+
+_ABSENT = _Absent()
+
+
+def _encode_column(name: str, records: List[Dict[str, Any]]) -> Optional[CohortColumn]:
+    """Encode one attribute of a JSON cohort list (None when no profile has it)"""
+    values = [record.get(name, _ABSENT) for record in records]
+    types = set(map(type, values))
+    index = None
+    if _Absent in types:
+        types.discard(_Absent)
+        if not types:
+            return None
+        index = np.array([i for i, value in enumerate(values) if value is not _ABSENT], dtype=np.int64)
+        values = [value for value in values if value is not _ABSENT]
+    
+    if types <= NUMERIC_TYPES:
+        present = np.array(values, dtype=float)
+        # NaN would read back as absent, huge integers as rounded floats
+        if not np.isnan(present).any() and not (np.abs(present) >= MAX_EXACT_INTEGER).any():
+            if index is None:
+                column_values = present
+            else:
+                column_values = np.full(len(records), np.nan)
+                column_values[index] = present
+            return CohortColumn(name, "numeric", column_values, integer=types == {int})
+    
+    if len(types) == 1 and types <= HASHABLE_TYPES:
+        lookup = {value: code for code, value in enumerate(dict.fromkeys(values))}
+        categories = list(lookup)
+        codes = [lookup[value] for value in values]
+    else:
+        # Typed keys keep 1, 1.0 and True as distinct categories
+        categories, lookup, codes = [], {}, []
+        for value in values:
+            value_type = type(value)
+            if value_type in HASHABLE_TYPES:
+                key = (value_type, value)
+            else:
+                key = (value_type, json.dumps(value, sort_keys=True, default=str))
+            code = lookup.get(key)
+            if code is None:
+                code = lookup[key] = len(categories)
+                categories.append(value)
+            codes.append(code)
+    
+    dtype = _code_dtype(len(categories))
+    if index is None:
+        column_values = np.array(codes, dtype=dtype)
+    else:
+        column_values = np.full(len(records), -1, dtype=dtype)
+        column_values[index] = codes
+    return CohortColumn(name, "category", column_values, categories=categories)
+
+
+class ColumnarCohort:
+    """
+    Cohort of peer profiles stored column by column
+    
+    Read from the binary format with read_cohort, every column is a zero-copy
+    view of a read-only memory map. Wrapped around a JSON cohort list, columns
+    are encoded on first access so callers only pay for the attributes they
+    use. to_records converts back to the JSON list.
+    """
+    def __init__(
+        self,
+        rows: int,
+        columns: Dict[str, CohortColumn],
+        records: Optional[List[Dict[str, Any]]] = None,
+        buffer: Optional[np.ndarray] = None
+    ):
+        self.rows = rows
+        self.columns = columns
+        self._records = records
+        self._buffer = buffer
+    
+    def __len__(self) -> int:
+        return self.rows
+    
+    def __contains__(self, name: str) -> bool:
+        return self.column(name) is not None
+    
+    def column(self, name: str) -> Optional[CohortColumn]:
+        column = self.columns.get(name)
+        if column is None and self._records is not None and name not in self.columns:
+            column = self.columns[name] = _encode_column(name, self._records)
+        return column
+    
+    @classmethod
+    def wrap(cls, cohort: Union["ColumnarCohort", List[Dict[str, Any]], None]) -> "ColumnarCohort":
+        """Columnar view of either representation"""
+        if isinstance(cohort, ColumnarCohort):
+            return cohort
+        records = cohort or []
+        return cls(len(records), {}, records=records)
+    
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "ColumnarCohort":
+        """Encode every attribute of a JSON cohort list"""
+        names = dict.fromkeys(name for record in records for name in record)
+        return cls(len(records), {name: _encode_column(name, records) for name in names})
+    
+    def fingerprint(self) -> str:
+        """SHA-256 of the binary encoding, the same for both representations"""
+        data = self._buffer if self._buffer is not None else encode_cohort(self)
+        return hashlib.sha256(data).hexdigest()
+    
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Decode back to a JSON cohort list (absent attributes stay absent)"""
+        if self._records is not None:
+            return list(self._records)
+        records = [{} for _ in range(self.rows)]
+        for name, column in self.columns.items():
+            present = np.flatnonzero(column.present).tolist()
+            values = column.to_list()
+            for i in present:
+                records[i][name] = values[i]
+        return records
+
+
+# Cohorts arrive as JSON profile lists or as columnar cohorts
+Cohort = Union[List[Dict[str, Any]], ColumnarCohort]
+
+
+def encode_cohort(cohort: Cohort) -> bytes:
+    """Serialize a cohort to the binary columnar format"""
+    if not isinstance(cohort, ColumnarCohort):
+        cohort = ColumnarCohort.from_records(cohort)
+    elif cohort._records is not None:
+        # Wrapped lists only have the columns accessed so far
+        cohort = ColumnarCohort.from_records(cohort._records)
+    
+    header_columns, blocks, offset = [], [], 0
+    for column in cohort.columns.values():
+        dtype = FLOAT_DTYPE if column.kind == "numeric" else column.values.dtype.str
+        data = np.ascontiguousarray(column.values, dtype=dtype).tobytes()
+        entry = {"name": column.name, "kind": column.kind, "dtype": dtype, "offset": offset}
+        if column.kind == "numeric":
+            entry["integer"] = column.integer
+        else:
+            entry["categories"] = column.categories
+        header_columns.append(entry)
+        blocks.append((offset, data))
+        offset = _align(offset + len(data))
+        
+        if column.kind == "numeric":
+            sketch = column.sketch()
+            if len(sketch) > sketch.k:
+                items = np.ascontiguousarray(sketch.to_array(), dtype=FLOAT_DTYPE).tobytes()
+                entry["sketch"] = {**sketch.layout(), "offset": offset}
+                blocks.append((offset, items))
+                offset = _align(offset + len(items))
+    
+    header = json.dumps({"rows": cohort.rows, "columns": header_columns}, default=str).encode()
+    data_start = _align(PREAMBLE.size + len(header))
+    
+    encoded = bytearray(data_start + offset)
+    PREAMBLE.pack_into(encoded, 0, MAGIC, FORMAT_VERSION, len(header))
+    encoded[PREAMBLE.size:PREAMBLE.size + len(header)] = header
+    for block_offset, data in blocks:
+        encoded[data_start + block_offset:data_start + block_offset + len(data)] = data
+    return bytes(encoded)
+
+
+def write_cohort(path: str, cohort: Cohort):
+    """Write a cohort in the binary columnar format (atomically replaces path)"""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_cohort(cohort))
+    os.replace(tmp_path, path)
+
+
+def read_cohort(path: str) -> ColumnarCohort:
+    """
+    Memory-map a cohort file
+    
+    Raises:
+        ValueError: If the file is not a cohort file or uses an unknown version
+    """
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    if len(raw) < PREAMBLE.size:
+        raise ValueError(f"{path} is not a cohort file")
+    magic, version, header_length = PREAMBLE.unpack_from(raw, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a cohort file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported cohort format version {version}")
+    
+    header = json.loads(bytes(raw[PREAMBLE.size:PREAMBLE.size + header_length]))
+    data_start = _align(PREAMBLE.size + header_length)
+    rows = header["rows"]
+    
+    columns = {}
+    for entry in header["columns"]:
+        dtype = np.dtype(entry["dtype"])
+        start = data_start + entry["offset"]
+        values = raw[start:start + rows * dtype.itemsize].view(dtype)
+        sketch = None
+        if "sketch" in entry:
+            layout = entry["sketch"]
+            sketch_start = data_start + layout["offset"]
+            items = raw[sketch_start:sketch_start + sum(layout["levels"]) * np.dtype(FLOAT_DTYPE).itemsize].view(FLOAT_DTYPE)
+            sketch = QuantileSketch.from_array(items, layout)
+        columns[entry["name"]] = CohortColumn(
+            entry["name"],
+            entry["kind"],
+            values,
+            categories=entry.get("categories"),
+            integer=entry.get("integer", False),
+            sketch=sketch
+        )
+    return ColumnarCohort(rows, columns, buffer=raw)
+
+
+class CohortStore:
+    """Directory of per-decision cohort files, shared by all worker processes"""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+    
+    def save(self, decision_id: str, cohort: Cohort) -> ColumnarCohort:
+        """Store a cohort and return its memory-mapped view"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(decision_id)
+        write_cohort(path, cohort)
+        return read_cohort(path)
+    
+    def load(self, decision_id: str) -> Optional[ColumnarCohort]:
+        """Memory-map a stored cohort, or None when missing or unreadable"""
+        path = self._path(decision_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            return read_cohort(path)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cohort file %s: %s", path, e)
+            return None
+    
+    def delete(self, decision_id: str):
+        try:
+            os.remove(self._path(decision_id))
+        except OSError:
+            pass
+    
+    def _path(self, decision_id: str) -> str:
+        try:
+            name = str(uuid.UUID(str(decision_id)))
+        except ValueError:
+            # Other ids are hashed so they cannot escape the directory
+            name = hashlib.sha256(str(decision_id).encode()).hexdigest()
+        return os.path.join(self.directory, f"{name}.gbc")
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Convert cohorts between JSON and the columnar format")
+    parser.add_argument("command", choices=["encode", "decode"])
+    parser.add_argument("source")
+    parser.add_argument("target")
+    args = parser.parse_args()
+    
+    if args.command == "encode":
+        with open(args.source) as f:
+            write_cohort(args.target, json.load(f))
+    else:
+        with open(args.target, "w") as f:
+            json.dump(read_cohort(args.source).to_records(), f)
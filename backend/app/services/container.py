@@ -0,0 +1,101 @@
+from app.services.audit_archive import AuditArchiveService
+from app.services.bias_detection import BiasDetectionService
+from app.services.bonus_allocation import BonusAllocationService
+from app.services.explainability import ExplainabilityService
+from app.services.explanation_storage import ExplanationStore
+from app.services.cohort_selection import CohortSelectionService
+from app.services.contribution_scoring import ContributionScorer
+from app.services.counterfactual import CounterfactualService
+from app.services.decision_claims import DecisionClaimService
+from app.services.org_scan import OrgDisparityScanner
+from app.services.outcome_metrics import OutcomeFairnessScanner
+from app.services.promotion_ranking import PromotionRankingService
+from app.services.rating_aggregation import RatingAggregationService
+from app.services.reanalysis import ReanalysisService
+from app.services.scoring_policy import ScoringPolicyService
+
+
+class ServiceContainer:
+    """Process-wide service singletons, built in the app lifespan"""
+    
+    def __init__(self):
+        self._instances = {}
+    
+    def init(self):
+        """Build every service up front"""
+        for name in ["bias", "explainability", "explanation_store", "cohort", "org_scanner", "outcome_metrics", "policies", "analysis", "claims", "ratings", "scorer", "bonus", "promotions", "counterfactuals", "audit"]:
+            getattr(self, name)
+    
+    def reset(self):
+        """Drop all instances so the next access rebuilds them"""
+        self._instances.clear()
+    
+    def _get(self, name: str, factory):
+        # Built on first access when used outside the app lifespan (scripts, benchmarks)
+        instance = self._instances.get(name)
+        if instance is None:
+            instance = self._instances[name] = factory()
+        return instance
+    
+    @property
+    def bias(self) -> BiasDetectionService:
+        return self._get("bias", BiasDetectionService)
+    
+    @property
+    def explainability(self) -> ExplainabilityService:
+        return self._get("explainability", ExplainabilityService)
+    
+    @property
+    def explanation_store(self) -> ExplanationStore:
+        return self._get("explanation_store", ExplanationStore)
+    
+    @property
+    def cohort(self) -> CohortSelectionService:
+        return self._get("cohort", CohortSelectionService)
+    
+    @property
+    def org_scanner(self) -> OrgDisparityScanner:
+        return self._get("org_scanner", lambda: OrgDisparityScanner(self.policies))
+    
+    @property
+    def outcome_metrics(self) -> OutcomeFairnessScanner:
+        return self._get("outcome_metrics", OutcomeFairnessScanner)
+    
+    @property
+    def policies(self) -> ScoringPolicyService:
+        return self._get("policies", lambda: ScoringPolicyService(self.bias))
+    
+    @property
+    def analysis(self) -> ReanalysisService:
+        return self._get("analysis", lambda: ReanalysisService(self.bias, self.cohort, self.policies))
+    
+    @property
+    def claims(self) -> DecisionClaimService:
+        return self._get("claims", DecisionClaimService)
+    
+    @property
+    def ratings(self) -> RatingAggregationService:
+        return self._get("ratings", RatingAggregationService)
+    
+    @property
+    def scorer(self) -> ContributionScorer:
+        return self._get("scorer", ContributionScorer)
+    
+    @property
+    def bonus(self) -> BonusAllocationService:
+        return self._get("bonus", lambda: BonusAllocationService(self.bias, self.policies, self.ratings, self.scorer))
+    
+    @property
+    def promotions(self) -> PromotionRankingService:
+        return self._get("promotions", lambda: PromotionRankingService(self.bias, self.policies, self.scorer))
+    
+    @property
+    def audit(self) -> AuditArchiveService:
+        return self._get("audit", AuditArchiveService)
+    
+    @property
+    def counterfactuals(self) -> CounterfactualService:
+        return self._get("counterfactuals", lambda: CounterfactualService(self.policies))
+
+
+services = ServiceContainer()
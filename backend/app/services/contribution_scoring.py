@@ -0,0 +1,234 @@
+from datetime import date
+import numpy as np
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+
+from app.models.performance import Employee, Project, Task, TaskAssignment, ManagerRating, PeerRating, Kpi
+from app.services.rating_aggregation import project_period_filters
+
+# Score on the 0-5 scale assumed when a project has no manager rating, peer rating or KPI for an employee
+DEFAULT_SCORE = 3.0
+
+# Weights of the manager rating, peer rating and KPI average in the performance score
+SCORE_WEIGHTS = (0.4, 0.3, 0.3)
+
+
+class ContributionInputs:
+    """Columnar inputs of a contribution scoring; index arrays point into the id arrays"""
+    def __init__(
+        self,
+        employee_ids: np.ndarray,
+        employee_departments: np.ndarray,
+        employee_roles: np.ndarray,
+        project_ids: np.ndarray,
+        project_names: np.ndarray,
+        project_weights: np.ndarray,
+        task_project: np.ndarray,
+        task_weights: np.ndarray,
+        assignment_task: np.ndarray,
+        assignment_employee: np.ndarray,
+        scores: Dict[str, Dict[str, np.ndarray]]
+    ):
+        self.employee_ids = employee_ids
+        self.employee_departments = employee_departments
+        self.employee_roles = employee_roles
+        self.project_ids = project_ids
+        self.project_names = project_names
+        self.project_weights = project_weights
+        self.task_project = task_project
+        self.task_weights = task_weights
+        self.assignment_task = assignment_task
+        self.assignment_employee = assignment_employee
+        self.scores = scores  # manager, peer, kpi: {"employee", "project", "value"}
+
+
+class ContributionScorer:
+    """
+    Project contribution scores shared by bonus pools and promotion slates
+    
+    An employee's contribution on a project is the project's share of the
+    total project weightage, times the employee's share of the project's
+    task weightage, times a 0-1 performance multiplier blending manager
+    ratings, peer ratings and KPIs. Contributions are summed per employee.
+    """
+    
+    def load_inputs(
+        self,
+        db: Session,
+        organization_id: Optional[str],
+        period_start: Optional[date] = None,
+        period_end: Optional[date] = None,
+        eligible_departments: Optional[List[str]] = None,
+        eligible_employees: Optional[List[str]] = None
+    ) -> ContributionInputs:
+        """
+        Read active employees, the period's projects, tasks and scores as arrays
+        
+        Args:
+            db: Database session
+            organization_id: Organization of the employees and projects
+            period_start: Earliest project start date (None: no bound)
+            period_end: Latest project end date (None: no bound)
+            eligible_departments: Departments to include (None: all)
+            eligible_employees: Employee ids to include (None: all)
+        """
+        employees = db.query(
+            Employee.id, Employee.department_id, Employee.role_title
+        ).filter(
+            Employee.organization_id == organization_id,
+            Employee.status == "active"
+        ).order_by(Employee.id).all()
+        employee_ids = np.array([row[0] for row in employees], dtype=object)
+        departments = np.array([row[1] for row in employees], dtype=object)
+        eligible = np.ones(len(employees), dtype=bool)
+        if eligible_departments:
+            eligible &= np.isin(departments, eligible_departments)
+        if eligible_employees:
+            eligible &= np.isin(employee_ids, eligible_employees)
+        employee_ids = employee_ids[eligible]
+        employee_index = {employee_id: i for i, employee_id in enumerate(employee_ids)}
+        
+        project_filters = project_period_filters(organization_id, period_start, period_end)
+        
+        projects = db.query(Project.id, Project.name, Project.weightage).filter(
+            *project_filters
+        ).order_by(Project.id).all()
+        project_index = {row[0]: i for i, row in enumerate(projects)}
+        
+        tasks = db.query(Task.id, Task.project_id, Task.weightage, Task.assigned_to_id).join(
+            Project, Project.id == Task.project_id
+        ).filter(*project_filters).all()
+        task_index = {row[0]: i for i, row in enumerate(tasks)}
+        assignments = [(row[0], row[3]) for row in tasks if row[3] is not None]
+        assignments.extend(db.query(TaskAssignment.task_id, TaskAssignment.employee_id).join(
+            Task, Task.id == TaskAssignment.task_id
+        ).join(
+            Project, Project.id == Task.project_id
+        ).filter(*project_filters).all())
+        
+        scores = {}
+        for name, model in [("manager", ManagerRating), ("peer", PeerRating)]:
+            # Complexity is rated but, as in the original formula, not scored
+            rows = db.query(
+                model.employee_id,
+                model.project_id,
+                (model.volume_score + model.quality_score + model.speed_score) / 3.0
+            ).join(Project, Project.id == model.project_id).filter(*project_filters).all()
+            scores[name] = self._score_arrays(rows, employee_index, project_index)
+        rows = db.query(Kpi.employee_id, Kpi.project_id, Kpi.metric_value).join(
+            Project, Project.id == Kpi.project_id
+        ).filter(*project_filters).all()
+        scores["kpi"] = self._score_arrays(rows, employee_index, project_index)
+        
+        assignment_task = np.array([task_index[task_id] for task_id, _ in assignments], dtype=np.int64)
+        assignment_employee = np.array(
+            [employee_index.get(employee_id, -1) for _, employee_id in assignments], dtype=np.int64
+        )
+        return ContributionInputs(
+            employee_ids=employee_ids,
+            employee_departments=departments[eligible],
+            employee_roles=np.array([row[2] for row in employees], dtype=object)[eligible],
+            project_ids=np.array([row[0] for row in projects], dtype=object),
+            project_names=np.array([row[1] for row in projects], dtype=object),
+            project_weights=np.array([row[2] or 0 for row in projects], dtype=float),
+            task_project=np.array([project_index[row[1]] for row in tasks], dtype=np.int64),
+            task_weights=np.array([row[2] or 1 for row in tasks], dtype=float),
+            assignment_task=assignment_task,
+            assignment_employee=assignment_employee,
+            scores=scores
+        )
+    
+    def score(self, inputs: ContributionInputs) -> Dict[str, Any]:
+        """
+        Contribution scores in one pass over the arrays
+        
+        Returns:
+            Dict with the per-employee "contribution" array and per
+            (employee, project) "pairs" arrays for the breakdown
+        """
+        n_employees = len(inputs.employee_ids)
+        n_projects = len(inputs.project_ids)
+        
+        weight_total = inputs.project_weights.sum()
+        normalized_weights = (
+            inputs.project_weights / weight_total * 100 if weight_total > 0 else np.zeros(n_projects)
+        )
+        project_task_total = np.bincount(inputs.task_project, weights=inputs.task_weights, minlength=n_projects)
+        
+        # Distinct (task, employee) assignments of eligible employees
+        keep = inputs.assignment_employee >= 0
+        pairs = np.unique(np.stack([inputs.assignment_task[keep], inputs.assignment_employee[keep]]), axis=1)
+        task, employee = pairs
+        project = inputs.task_project[task]
+        
+        # Task weightage per (employee, project), keyed employee * n_projects + project
+        keys, inverse = np.unique(employee * n_projects + project, return_inverse=True)
+        employee_task_weight = np.bincount(inverse, weights=inputs.task_weights[task], minlength=len(keys))
+        pair_employee, pair_project = np.divmod(keys, max(n_projects, 1))
+        task_total = project_task_total[pair_project]
+        task_ratio = np.divide(employee_task_weight, task_total, out=np.zeros(len(keys)), where=task_total > 0)
+        
+        blended = sum(
+            weight * self._mean_at(inputs.scores[name], keys, n_projects)
+            for weight, name in zip(SCORE_WEIGHTS, ["manager", "peer", "kpi"])
+        )
+        performance_score = blended * 2  # 0-10 scale
+        pair_contribution = normalized_weights[pair_project] * task_ratio * (performance_score / 10)
+        
+        return {
+            "contribution": np.bincount(pair_employee, weights=pair_contribution, minlength=n_employees),
+            "pairs": {
+                "employee": pair_employee,
+                "project": pair_project,
+                "normalized_weight": normalized_weights[pair_project],
+                "employee_task_weight": employee_task_weight,
+                "task_ratio": task_ratio,
+                "performance_score": performance_score,
+                "contribution": pair_contribution
+            }
+        }
+    
+    def _score_arrays(
+        self,
+        rows: List[tuple],
+        employee_index: Dict[str, int],
+        project_index: Dict[str, int]
+    ) -> Dict[str, np.ndarray]:
+        """(employee_id, project_id, value) rows of eligible employees as index arrays"""
+        employee = np.array([employee_index.get(row[0], -1) for row in rows], dtype=np.int64)
+        keep = employee >= 0
+        return {
+            "employee": employee[keep],
+            "project": np.array([project_index[row[1]] for row in rows], dtype=np.int64)[keep],
+            "value": np.array([row[2] for row in rows], dtype=float)[keep]
+        }
+    
+    def _mean_at(self, scores: Dict[str, np.ndarray], keys: np.ndarray, n_projects: int) -> np.ndarray:
+        """Mean score per (employee, project) key, DEFAULT_SCORE where there is none"""
+        score_keys, inverse = np.unique(scores["employee"] * n_projects + scores["project"], return_inverse=True)
+        means = np.bincount(inverse, weights=scores["value"], minlength=len(score_keys)) / np.maximum(
+            np.bincount(inverse, minlength=len(score_keys)), 1
+        )
+        if not len(score_keys):
+            return np.full(len(keys), DEFAULT_SCORE)
+        position = np.minimum(np.searchsorted(score_keys, keys), len(score_keys) - 1)
+        return np.where(score_keys[position] == keys, means[position], DEFAULT_SCORE)
+    
+    def breakdowns(self, inputs: ContributionInputs, scored: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+        """Per-employee project breakdown, for calculation_details"""
+        pairs = scored["pairs"]
+        breakdowns: List[List[Dict[str, Any]]] = [[] for _ in inputs.employee_ids]
+        # Pairs come sorted by employee, then project
+        for j in range(len(pairs["employee"])):
+            project = pairs["project"][j]
+            breakdowns[pairs["employee"][j]].append({
+                "project_id": inputs.project_ids[project],
+                "project_name": inputs.project_names[project],
+                "project_weight": int(inputs.project_weights[project]),
+                "normalized_weight": float(pairs["normalized_weight"][j]),
+                "employee_task_weight": float(pairs["employee_task_weight"][j]),
+                "task_ratio": float(pairs["task_ratio"][j]),
+                "performance_score": float(pairs["performance_score"][j]),
+                "project_contribution": float(pairs["contribution"][j])
+            })
+        return breakdowns
@@ -0,0 +1,152 @@
+import numpy as np
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional
+
+from app.models.bias_analysis import BiasAnalysis
+from app.models.decision import Decision
+from app.services.bias_detection import BINARY_OUTCOME_TYPES
+from app.services.scoring_policy import ScoringPolicyService
+from app.services.scoring_rules import RISK_LEVELS, MetricFeatures, ScoringRules, extract_features
+
+# Candidate outcomes span the cohort mean +/- this many standard deviations beyond the largest z rule
+OUTCOME_GRID_MARGIN = 1.0
+
+# Candidate outcomes per search; the step bounds how far a reported change can be from the true minimum
+OUTCOME_GRID_STEPS = 4000
+
+
+class CounterfactualService:
+    """
+    Smallest changes to a decision that move it across a risk level boundary
+    
+    The risk score of a stored analysis depends on the decision only through
+    its outcome (z-score, outlier check) and on the cohort through the parity
+    flag. A grid of candidate outcomes, each with the cohort's disparity as
+    is and resolved, is scored in one batch with the vectorized policy
+    evaluator, so no cohort is scanned and the search takes milliseconds
+    whatever the cohort size.
+    """
+    
+    def __init__(self, policies: ScoringPolicyService):
+        self.policies = policies
+    
+    def search_decision(self, db: Session, decision: Decision, analysis: BiasAnalysis) -> Dict[str, Any]:
+        """Search a decision's stored analysis under the policy now governing it"""
+        policy = self.policies.resolve(db, decision.organization_id, decision.decision_type.value)
+        result = self.search(
+            analysis.fairness_metrics,
+            self.policies.rules_for(policy),
+            binary=decision.decision_type.value in BINARY_OUTCOME_TYPES
+        )
+        result["scoring_policy_id"] = policy.id if policy is not None else None
+        return result
+    
+    def search(
+        self,
+        fairness_metrics: Optional[Dict[str, Any]],
+        rules: ScoringRules,
+        binary: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Minimal changes crossing each risk level boundary
+        
+        Args:
+            fairness_metrics: Stored metrics of the decision's analysis
+            rules: Scoring policy to evaluate under
+            binary: Whether the outcome is a yes/no selection, so the only
+                candidate outcomes are 0 and 1
+        
+        Returns:
+            Dict with the "current" score and level, the candidate "grid",
+            and per boundary ("moderate", "high") the smallest outcome change
+            that crosses it, with the disparity as is and resolved
+        """
+        base = extract_features(fairness_metrics)
+        evaluator = rules.compile()
+        current = evaluator.evaluate(MetricFeatures(base[None]))
+        current_score = float(current["risk_score"][0, 0])
+        disparity = bool(current["disparity"][0, 0])
+        
+        decision_value = float(base["decision_value"])
+        outcomes = self._candidate_outcomes(base, rules, binary)
+        resolved_options = [False, True] if disparity else [False]
+        
+        # One row per (disparity option, candidate outcome)
+        records = np.tile(np.repeat(base, len(outcomes)), len(resolved_options))
+        if not np.isnan(decision_value):
+            std = float(base["cohort_std"])
+            records["decision_value"] = np.tile(outcomes, len(resolved_options))
+            records["z_score"] = (records["decision_value"] - base["cohort_mean"]) / std if std > 0 else 0.0
+        resolved = np.repeat(resolved_options, len(outcomes))
+        records["min_parity_ratio"][resolved] = np.inf
+        records["min_significant_parity_ratio"][resolved] = np.inf
+        
+        result = evaluator.evaluate(MetricFeatures(records))
+        scores, levels = result["risk_score"][0], result["risk_level"][0]
+        deltas = np.nan_to_num(np.abs(records["decision_value"] - decision_value))
+        
+        boundaries = []
+        for level, threshold in [("moderate", rules.risk_moderate), ("high", rules.risk_high)]:
+            above = current_score >= threshold
+            crossing = (scores >= threshold) != above
+            changes = []
+            for option in resolved_options:
+                candidates = np.flatnonzero(crossing & (resolved == option))
+                if not len(candidates):
+                    continue
+                # Smallest outcome change; the first candidate wins ties
+                best = candidates[np.argmin(deltas[candidates])]
+                changes.append(self._change(records[best], decision_value, option, scores[best], levels[best]))
+            boundaries.append({
+                "boundary": level,
+                "threshold": threshold,
+                "direction": "below" if above else "above",
+                "changes": changes
+            })
+        
+        return {
+            "current": {
+                "decision_value": None if np.isnan(decision_value) else decision_value,
+                "risk_score": current_score,
+                "risk_level": RISK_LEVELS[int(current["risk_level"][0, 0])],
+                "disparity_detected": disparity
+            },
+            "grid": {
+                "candidates": len(records),
+                "outcome_step": None if binary or len(outcomes) < 3 else float(outcomes[2] - outcomes[1])
+            },
+            "boundaries": boundaries
+        }
+    
+    def _candidate_outcomes(self, base: np.void, rules: ScoringRules, binary: bool) -> np.ndarray:
+        """Evenly spaced outcomes around the cohort mean (0 and 1 for selections), plus the current one"""
+        decision_value = float(base["decision_value"])
+        if np.isnan(decision_value):
+            return np.array([np.nan])
+        if binary:
+            return np.array([decision_value, 0.0, 1.0])
+        mean, std = float(base["cohort_mean"]), float(base["cohort_std"])
+        scale = std if std > 0 else max(abs(mean), 1.0)
+        reach = max(rules.z_high, rules.z_normalizer, rules.outlier_std_multiple) + OUTCOME_GRID_MARGIN
+        grid = mean + scale * np.linspace(-reach, reach, OUTCOME_GRID_STEPS + 1)
+        # The current outcome comes first, so "no outcome change" wins ties
+        return np.concatenate([[decision_value], grid])
+    
+    def _change(
+        self,
+        record: np.void,
+        decision_value: float,
+        disparity_resolved: bool,
+        risk_score: float,
+        risk_level: int
+    ) -> Dict[str, Any]:
+        outcome = float(record["decision_value"])
+        has_outcome = not np.isnan(decision_value)
+        return {
+            "outcome": outcome if has_outcome else None,
+            "outcome_change": outcome - decision_value if has_outcome else None,
+            "z_score": float(record["z_score"]),
+            "disparity_resolved": disparity_resolved,
+            "risk_score": float(risk_score),
+            "risk_level": RISK_LEVELS[int(risk_level)]
+        }
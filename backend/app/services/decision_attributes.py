@@ -0,0 +1,127 @@
+import numpy as np
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional
+
+from app.models.decision import Decision, DecisionAttributes
+from app.services.bias_detection import OUTCOME_KEYS, outcome_value
+
+# Hot attributes promoted out of the employee_data JSON blob
+NUMERIC_ATTRIBUTES = ["experience_years", "tenure_years", "performance_rating", "role_level"]
+CATEGORICAL_ATTRIBUTES = ["department", "gender", "age_group", "ethnicity"]
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """Coerce numeric-looking values (including CSV strings) to float"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_attributes(employee_data: Dict[str, Any], decision_type: str) -> Dict[str, Any]:
+    """Pull the typed hot attributes out of an employee_data dict"""
+    data = employee_data or {}
+    attributes = {attr: _to_float(data.get(attr)) for attr in NUMERIC_ATTRIBUTES}
+    for attr in CATEGORICAL_ATTRIBUTES:
+        value = data.get(attr)
+        attributes[attr] = str(value) if value is not None else None
+    
+    outcome = outcome_value(data.get(OUTCOME_KEYS.get(decision_type, "outcome")))
+    attributes["outcome"] = None if np.isnan(outcome) else outcome
+    return attributes
+
+
+def build_decision_attributes(decision: Decision) -> DecisionAttributes:
+    """Build the attributes sidecar row for a decision"""
+    decision_type = decision.decision_type.value if hasattr(decision.decision_type, "value") else str(decision.decision_type)
+    return DecisionAttributes(
+        organization_id=decision.organization_id,
+        decision_type=decision_type,
+        **extract_attributes(decision.employee_data, decision_type)
+    )
+
+
+def attribute_values(attributes: DecisionAttributes) -> Dict[str, Any]:
+    """Column values of an attributes row, e.g. to keep after the session expires it"""
+    return {column.name: getattr(attributes, column.name) for column in DecisionAttributes.__table__.columns}
+
+
+def refresh_decision_attributes(decision: Decision):
+    """Bring a decision's attributes row in line with its employee_data"""
+    if decision.attributes is None:
+        decision.attributes = build_decision_attributes(decision)
+        return
+    decision_type = decision.decision_type.value if hasattr(decision.decision_type, "value") else str(decision.decision_type)
+    for attr, value in extract_attributes(decision.employee_data, decision_type).items():
+        setattr(decision.attributes, attr, value)
+
+
+def backfill_decision_attributes(
+    db: Session,
+    organization_id: Optional[str] = None,
+    all_organizations: bool = False,
+    batch_size: int = 1000
+) -> int:
+    """
+    Create missing attribute sidecar rows for existing decisions
+    
+    Args:
+        db: Database session
+        organization_id: Organization to backfill (ignored with all_organizations)
+        all_organizations: Backfill every organization
+        batch_size: Rows inserted per commit
+    
+    Returns:
+        Number of sidecar rows created
+    """
+    query = db.query(
+        Decision.id,
+        Decision.decision_type,
+        Decision.organization_id,
+        Decision.employee_data
+    ).outerjoin(
+        DecisionAttributes, DecisionAttributes.decision_id == Decision.id
+    ).filter(
+        DecisionAttributes.decision_id.is_(None)
+    )
+    
+    if not all_organizations:
+        query = query.filter(Decision.organization_id == organization_id)
+    
+    # Keyset pagination keeps each batch an indexed range scan
+    created = 0
+    last_id = None
+    while True:
+        page = query if last_id is None else query.filter(Decision.id > last_id)
+        batch = page.order_by(Decision.id).limit(batch_size).all()
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        
+        rows = []
+        for decision_id, decision_type, org_id, employee_data in batch:
+            dtype = decision_type.value if hasattr(decision_type, "value") else str(decision_type)
+            rows.append({
+                "decision_id": decision_id,
+                "organization_id": org_id,
+                "decision_type": dtype,
+                **extract_attributes(employee_data, dtype)
+            })
+        db.bulk_insert_mappings(DecisionAttributes, rows)
+        db.commit()
+        created += len(rows)
+    
+    return created
+
+
+if __name__ == "__main__":
+    from app.core.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        created = backfill_decision_attributes(db, all_organizations=True)
+        print(f"Backfilled attributes for {created} decisions")
+    finally:
+        db.close()
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import engine as default_engine
+from app.models.decision import DecisionClaim
+
+# Delay between attempts to take a claim held by another request
+CLAIM_POLL_SECONDS = 0.05
+
+
+class DecisionBusy(Exception):
+    """A decision stayed claimed by another request for the whole wait"""
+    
+    def __init__(self, decision_id: str, operation: str):
+        super().__init__(f"Decision {decision_id} is busy; {operation} is waiting on another request")
+        self.decision_id = decision_id
+        self.operation = operation
+
+
+class DecisionClaimService:
+    """
+    Row-level claims that serialize analysis and explanation per decision
+    
+    A claim is a row keyed by decision id, committed on its own connection
+    before the work starts, so every worker process sharing the database
+    sees it. A second request for the same decision waits until the claim
+    is released and then finds the stored result rather than computing it
+    again. Claims expire, so a crashed worker blocks a decision for at most
+    the TTL.
+    """
+    
+    def __init__(
+        self,
+        engine: Engine = default_engine,
+        ttl_seconds: Optional[float] = None,
+        wait_seconds: Optional[float] = None
+    ):
+        self.engine = engine
+        self.ttl = timedelta(seconds=ttl_seconds if ttl_seconds is not None else settings.DECISION_CLAIM_TTL_SECONDS)
+        self.wait_seconds = wait_seconds if wait_seconds is not None else settings.DECISION_CLAIM_WAIT_SECONDS
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+    
+    def try_claim(self, decision_id: str, operation: str) -> Optional[str]:
+        """Claim a decision; the claim token, or None if another request holds it"""
+        token = uuid.uuid4().hex
+        now = datetime.utcnow()
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(delete(DecisionClaim).where(
+                    DecisionClaim.decision_id == decision_id,
+                    DecisionClaim.expires_at < now
+                ))
+                conn.execute(insert(DecisionClaim).values(
+                    decision_id=decision_id,
+                    operation=operation,
+                    owner=f"{self.owner}:{token}",
+                    claimed_at=now,
+                    expires_at=now + self.ttl
+                ))
+        except IntegrityError:
+            return None
+        return token
+    
+    def release(self, decision_id: str, token: str):
+        """Drop a claim, unless it expired and was taken over since"""
+        with self.engine.begin() as conn:
+            conn.execute(delete(DecisionClaim).where(
+                DecisionClaim.decision_id == decision_id,
+                DecisionClaim.owner == f"{self.owner}:{token}"
+            ))
+    
+    def release_all(self) -> int:
+        """Drop every claim of this worker process, e.g. on shutdown"""
+        with self.engine.begin() as conn:
+            return conn.execute(delete(DecisionClaim).where(
+                DecisionClaim.owner.startswith(f"{self.owner}:", autoescape=True)
+            )).rowcount
+    
+    @asynccontextmanager
+    async def hold(self, decision_id: str, operation: str):
+        """
+        Hold a decision's claim for the duration of the block
+        
+        Raises:
+            DecisionBusy: If another request keeps the claim for longer than
+                the wait
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        token = self.try_claim(decision_id, operation)
+        while token is None:
+            if time.monotonic() >= deadline:
+                raise DecisionBusy(decision_id, operation)
+            await asyncio.sleep(CLAIM_POLL_SECONDS)
+            token = self.try_claim(decision_id, operation)
+        
+        try:
+            yield
+        finally:
+            self.release(decision_id, token)
@@ -1,9 +1,99 @@
-import google.generativeai as genai
 from typing import Dict, Any, List, Optional
 import json
+import logging
 import re
 
 from app.core.config import settings
+from app.core.metrics import stage_timer, LLM_CALLS
+from app.core.rate_limit import RateLimiter, RateLimitExceeded
+from app.services.bias_detection import BINARY_OUTCOME_TYPES, SIMILARITY_WINDOW
+from app.services.scoring_rules import RISK_LEVELS
+
+logger = logging.getLogger(__name__)
+
+# Key factors and alternatives of a template explanation
+MAX_KEY_FACTORS = 5
+MAX_ALTERNATIVES = 3
+
+# Flagged attributes (or intersections) a template justification describes in detail
+MAX_PARITY_DETAILS = 3
+
+# Instruction scaffold of every Gemini prompt; explanation storage keeps it once
+# (by hash) and compresses each stored prompt against it
+PROMPT_TEMPLATE = """You are an ethical AI assistant for GlassBox AI, an HR Decision Intelligence platform. Your role is to provide transparent, unbiased, and factual explanations for HR decisions.
+
+DECISION CONTEXT:
+- Decision Type: {decision_label}
+- Employee/Candidate Profile: {profile}
+- Number of Comparable Peers: {peer_count}
+
+BIAS ANALYSIS RESULTS:
+- Risk Level: {risk_label}
+- Risk Score: {risk_score:.2f}/1.0
+- Detected Patterns: {pattern_count}
+
+FAIRNESS METRICS:
+- Cohort Size: {cohort_size}
+- Cohort Mean Outcome: {cohort_mean}
+- Decision Z-Score: {z_score}
+- Decision Percentile Among Peers: {percentile_rank}
+
+DETECTED PATTERNS:
+{patterns}
+
+TASK:
+Generate a comprehensive, transparent explanation for this {decision_type} decision. Your response MUST include:
+
+1. **JUSTIFICATION** (2-3 paragraphs):
+   - Provide a clear, factual explanation of the decision
+   - Reference objective criteria and comparable outcomes
+   - Acknowledge any uncertainties or limitations
+   - Use non-judgmental, professional language
+   - If bias risks were detected, acknowledge them factually
+
+2. **KEY FACTORS** (List 3-5 factors):
+   - List the most important factors that influenced this decision
+   - For each factor, provide: name, weight/importance (1-10), and brief description
+   - Be specific and quantifiable where possible
+
+3. **ALTERNATIVE PERSPECTIVES** (2-3 alternatives):
+   - Suggest alternative interpretations or approaches
+   - Consider what might lead to a different outcome
+   - Acknowledge valid reasons for different decisions
+
+ETHICAL GUIDELINES:
+- Focus on factors, not people
+- Avoid accusatory or judgmental language
+- Acknowledge uncertainty where it exists
+- Provide balanced, multi-perspective analysis
+- Highlight both supporting and concerning signals
+- Never claim certainty in subjective matters
+
+FORMAT YOUR RESPONSE AS JSON:
+{{
+  "justification": "Your 2-3 paragraph explanation here...",
+  "key_factors": [
+    {{"factor": "Factor name", "weight": 8, "description": "Why this matters..."}},
+    ...
+  ],
+  "alternatives": [
+    "Alternative perspective 1...",
+    ...
+  ]
+}}
+
+Generate the explanation now:"""
+
+
+def _format_number(value: float) -> str:
+    """Thousands separators and at most two decimals"""
+    return f"{value:,.2f}".rstrip("0").rstrip(".")
+
+
+def _ordinal(value: float) -> str:
+    n = int(round(value))
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
 
 
 class ExplanationResult:
@@ -13,66 +103,130 @@ class ExplanationResult:
         justification: str,
         key_factors: List[Dict[str, Any]],
         alternatives: List[str],
-        raw_response: str,
-        prompt: str
+        raw_response: Optional[str],
+        prompt: Optional[str],
+        source: str = "gemini"
     ):
         self.justification = justification
         self.key_factors = key_factors
         self.alternatives = alternatives
         self.raw_response = raw_response
         self.prompt = prompt
+        self.source = source  # gemini, template, or fallback (template because Gemini failed)
 
 
 class ExplainabilityService:
-    """Service for generating AI-powered explanations using Gemini"""
+    """
+    Service for generating explanations, locally or with Gemini
+    
+    Most decisions are low risk and need no more than what the analysis
+    found, so they are explained from templates filled with the stored
+    metrics, patterns and peer comparison, in microseconds and without an
+    LLM call. Decisions at or above EXPLANATION_LLM_MIN_RISK, and any a
+    reviewer asks a detailed explanation for, go to Gemini.
+    """
     
     def __init__(self):
-        if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
-        else:
-            self.model = None
+        self._model = None
+        self._model_loaded = False
+        self.llm_min_risk = settings.EXPLANATION_LLM_MIN_RISK
+        if self.llm_min_risk not in RISK_LEVELS:
+            raise ValueError(f"EXPLANATION_LLM_MIN_RISK must be one of {RISK_LEVELS}")
+        # Shared by every worker when the shared state store is SQLite
+        self.rate_limiter = RateLimiter(
+            "llm",
+            settings.LLM_RATE_LIMIT_PER_MINUTE,
+            settings.LLM_RATE_LIMIT_BURST
+        )
+    
+    @property
+    def model(self):
+        """Gemini model, configured on first use so the SDK import stays off the startup path"""
+        if not self._model_loaded:
+            if settings.GEMINI_API_KEY:
+                import google.generativeai as genai
+                genai.configure(api_key=settings.GEMINI_API_KEY)
+                self._model = genai.GenerativeModel(settings.GEMINI_MODEL)
+            self._model_loaded = True
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._model_loaded = True
+    
+    def needs_llm(self, bias_analysis: Any, detailed: bool = False) -> bool:
+        """Whether a decision is explained by Gemini rather than from templates"""
+        if detailed or bias_analysis is None:
+            return True
+        if bias_analysis.risk_level not in RISK_LEVELS:
+            return True
+        return RISK_LEVELS.index(bias_analysis.risk_level) >= RISK_LEVELS.index(self.llm_min_risk)
     
     async def generate_explanation(
         self,
         decision_data: Dict[str, Any],
         bias_analysis: Any,
         comparable_cohort: List[Dict[str, Any]],
-        decision_type: str
+        decision_type: str,
+        detailed: bool = False
     ) -> ExplanationResult:
         """
-        Generate plain-language explanation for a decision using Gemini
+        Generate plain-language explanation for a decision
         
         Args:
             decision_data: The decision being evaluated
             bias_analysis: BiasAnalysisResult object
             comparable_cohort: List of comparable profiles
             decision_type: Type of decision
-            
+            detailed: Whether a reviewer asked for a Gemini explanation
+                regardless of the risk level
+        
         Returns:
             ExplanationResult with justification and insights
+        
+        Raises:
+            RateLimitExceeded: If the LLM rate limit leaves no capacity
+                within LLM_RATE_LIMIT_MAX_WAIT_SECONDS
         """
+        if not self.needs_llm(bias_analysis, detailed):
+            LLM_CALLS.inc(result="skipped")
+            with stage_timer("template_explanation"):
+                return self._generate_template_explanation(decision_data, bias_analysis, decision_type)
+        
         if not self.model:
             # Fallback for testing without API key
+            LLM_CALLS.inc(result="unavailable")
             return self._generate_fallback_explanation(
                 decision_data, bias_analysis, decision_type
             )
         
         # Build comprehensive prompt
-        prompt = self._build_explanation_prompt(
-            decision_data, bias_analysis, comparable_cohort, decision_type
-        )
+        with stage_timer("prompt_build"):
+            prompt = self._build_explanation_prompt(
+                decision_data, bias_analysis, comparable_cohort, decision_type
+            )
+        
+        try:
+            await self.rate_limiter.acquire(settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS)
+        except RateLimitExceeded:
+            LLM_CALLS.inc(result="rate_limited")
+            raise
         
         try:
             # Generate content using Gemini
-            response = self.model.generate_content(prompt)
+            with stage_timer("llm_call"):
+                response = self.model.generate_content(prompt)
+            LLM_CALLS.inc(result="success")
             
             # Parse the response
-            result = self._parse_gemini_response(response.text, prompt)
+            with stage_timer("parse"):
+                result = self._parse_gemini_response(response.text, prompt)
             return result
-            
+        
         except Exception as e:
-            print(f"Gemini API error: {e}")
+            LLM_CALLS.inc(result="error")
+            logger.warning("Gemini API error: %s", e)
             return self._generate_fallback_explanation(
                 decision_data, bias_analysis, decision_type
             )
@@ -92,78 +246,28 @@ class ExplainabilityService:
         detected_patterns = bias_analysis.detected_patterns if bias_analysis else []
         fairness_metrics = bias_analysis.fairness_metrics if bias_analysis else {}
         
-        prompt = f"""You are an ethical AI assistant for GlassBox AI, an HR Decision Intelligence platform. Your role is to provide transparent, unbiased, and factual explanations for HR decisions.
-
-DECISION CONTEXT:
-- Decision Type: {decision_type.upper()}
-- Employee/Candidate Profile: {json.dumps(decision_data, indent=2)}
-- Number of Comparable Peers: {len(comparable_cohort)}
-
-BIAS ANALYSIS RESULTS:
-- Risk Level: {risk_level.upper()}
-- Risk Score: {risk_score:.2f}/1.0
-- Detected Patterns: {len(detected_patterns)}
-
-FAIRNESS METRICS:
-- Cohort Size: {fairness_metrics.get('cohort_size', 0)}
-- Cohort Mean Outcome: {fairness_metrics.get('cohort_mean', 'N/A')}
-- Decision Z-Score: {fairness_metrics.get('z_score', 'N/A')}
-
-DETECTED PATTERNS:
-"""
-        
         if detected_patterns:
-            for i, pattern in enumerate(detected_patterns, 1):
-                prompt += f"{i}. {pattern.get('description', 'Pattern detected')} (Severity: {pattern.get('severity', 'unknown')})\n"
+            patterns = "".join(
+                f"{i}. {pattern.get('description', 'Pattern detected')} (Severity: {pattern.get('severity', 'unknown')})\n"
+                for i, pattern in enumerate(detected_patterns, 1)
+            )
         else:
-            prompt += "No significant bias patterns detected.\n"
+            patterns = "No significant bias patterns detected.\n"
         
-        prompt += f"""
-
-TASK:
-Generate a comprehensive, transparent explanation for this {decision_type} decision. Your response MUST include:
-
-1. **JUSTIFICATION** (2-3 paragraphs):
-   - Provide a clear, factual explanation of the decision
-   - Reference objective criteria and comparable outcomes
-   - Acknowledge any uncertainties or limitations
-   - Use non-judgmental, professional language
-   - If bias risks were detected, acknowledge them factually
-
-2. **KEY FACTORS** (List 3-5 factors):
-   - List the most important factors that influenced this decision
-   - For each factor, provide: name, weight/importance (1-10), and brief description
-   - Be specific and quantifiable where possible
-
-3. **ALTERNATIVE PERSPECTIVES** (2-3 alternatives):
-   - Suggest alternative interpretations or approaches
-   - Consider what might lead to a different outcome
-   - Acknowledge valid reasons for different decisions
-
-ETHICAL GUIDELINES:
-- Focus on factors, not people
-- Avoid accusatory or judgmental language
-- Acknowledge uncertainty where it exists
-- Provide balanced, multi-perspective analysis
-- Highlight both supporting and concerning signals
-- Never claim certainty in subjective matters
-
-FORMAT YOUR RESPONSE AS JSON:
-{{
-  "justification": "Your 2-3 paragraph explanation here...",
-  "key_factors": [
-    {{"factor": "Factor name", "weight": 8, "description": "Why this matters..."}},
-    ...
-  ],
-  "alternatives": [
-    "Alternative perspective 1...",
-    ...
-  ]
-}}
-
-Generate the explanation now:"""
-        
-        return prompt
+        return PROMPT_TEMPLATE.format(
+            decision_type=decision_type,
+            decision_label=decision_type.upper(),
+            profile=json.dumps(decision_data, indent=2),
+            peer_count=len(comparable_cohort),
+            risk_label=risk_level.upper(),
+            risk_score=risk_score,
+            pattern_count=len(detected_patterns),
+            cohort_size=fairness_metrics.get("cohort_size", 0),
+            cohort_mean=fairness_metrics.get("cohort_mean", "N/A"),
+            z_score=fairness_metrics.get("z_score", "N/A"),
+            percentile_rank=fairness_metrics.get("percentile_rank", "N/A"),
+            patterns=patterns
+        )
     
     def _parse_gemini_response(self, response_text: str, prompt: str) -> ExplanationResult:
         """Parse Gemini's response into structured format"""
@@ -199,48 +303,188 @@ Generate the explanation now:"""
         bias_analysis: Any,
         decision_type: str
     ) -> ExplanationResult:
-        """Generate a basic explanation when Gemini is unavailable"""
+        """Template explanation for a decision meant for Gemini when Gemini is unavailable"""
+        result = self._generate_template_explanation(decision_data, bias_analysis, decision_type)
+        result.justification += (
+            "\n\nThe AI explanation service was unavailable, so this explanation was generated "
+            "from the analysis results alone."
+        )
+        result.source = "fallback"
+        return result
+    
+    def _generate_template_explanation(
+        self,
+        decision_data: Dict[str, Any],
+        bias_analysis: Any,
+        decision_type: str
+    ) -> ExplanationResult:
+        """
+        Explanation built from the analysis results alone
         
+        Each paragraph, key factor and alternative is chosen and filled from
+        the fairness metrics, detected patterns and peer comparison, so the
+        text is specific to the decision and identical for identical analyses.
+        """
         risk_level = bias_analysis.risk_level if bias_analysis else "unknown"
+        risk_score = bias_analysis.risk_score if bias_analysis else 0
+        patterns = (bias_analysis.detected_patterns if bias_analysis else None) or []
+        metrics = (bias_analysis.fairness_metrics if bias_analysis else None) or {}
+        outcomes = (bias_analysis.comparable_outcomes if bias_analysis else None) or {}
+        demo_analysis = metrics.get("demographic_analysis") or {}
+        binary = decision_type in BINARY_OUTCOME_TYPES
         
-        justification = f"""
-This {decision_type} decision has been analyzed for bias and consistency with comparable peers.
-
-Based on the analysis, the decision shows a {risk_level} level of bias risk. The decision data was compared against similar employee profiles to ensure fairness and consistency.
-
-Key factors considered include the candidate's qualifications, experience, performance history, and how these compare to peers in similar roles. The analysis uses statistical methods to identify any unusual patterns or deviations from expected outcomes.
-
-This explanation is generated as a fallback because the AI explanation service is currently unavailable. For full explainability, please configure the Gemini API key in your environment settings.
-"""
-        
-        key_factors = [
-            {
-                "factor": "Qualifications",
-                "weight": 8,
-                "description": "Candidate's skills and credentials relevant to the role"
-            },
-            {
-                "factor": "Experience",
-                "weight": 7,
-                "description": "Years of relevant work experience"
-            },
-            {
-                "factor": "Peer Comparison",
-                "weight": 9,
-                "description": "How this decision compares to similar cases"
-            }
-        ]
-        
-        alternatives = [
-            "Consider additional context not captured in structured data",
-            "Review qualitative feedback from stakeholders",
-            "Examine longer-term performance trends"
+        paragraphs = [
+            self._peer_paragraph(metrics, decision_type, binary),
+            self._parity_paragraph(demo_analysis)
         ]
+        if patterns:
+            findings = "; ".join(pattern.get("description", "Pattern detected") for pattern in patterns)
+            paragraphs.append(
+                f"Overall bias risk is {risk_level} (score {risk_score:.2f}/1.0). "
+                f"The analysis found {len(patterns)} pattern{'s' if len(patterns) > 1 else ''}: {findings}."
+            )
+        else:
+            paragraphs.append(
+                f"Overall bias risk is {risk_level} (score {risk_score:.2f}/1.0) and no bias patterns were detected. "
+                "The assessment covers the structured decision data only and cannot account for context outside it."
+            )
         
         return ExplanationResult(
-            justification=justification.strip(),
-            key_factors=key_factors,
-            alternatives=alternatives,
-            raw_response="Fallback explanation generated",
-            prompt="No prompt - fallback mode"
+            justification="\n\n".join(paragraphs),
+            key_factors=self._template_key_factors(metrics, outcomes, patterns, demo_analysis),
+            alternatives=self._template_alternatives(metrics, demo_analysis, binary),
+            raw_response=None,
+            prompt=None,
+            source="template"
         )
+    
+    def _peer_paragraph(self, metrics: Dict[str, Any], decision_type: str, binary: bool) -> str:
+        cohort_size = metrics.get("cohort_size", 0)
+        if not cohort_size or metrics.get("decision_value") is None:
+            return (
+                f"This {decision_type} decision could not be positioned against comparable peers "
+                "because no comparable outcomes were available."
+            )
+        
+        decision_value = metrics["decision_value"]
+        cohort_mean = metrics.get("cohort_mean", 0)
+        if binary:
+            outcome = "positive" if decision_value >= 0.5 else "negative"
+            return (
+                f"This {decision_type} decision has a {outcome} outcome. "
+                f"Of {cohort_size} comparable peers, {cohort_mean:.0%} received a positive outcome."
+            )
+        
+        text = (
+            f"This {decision_type} decision has an outcome of {_format_number(decision_value)}, "
+            f"compared with a mean of {_format_number(cohort_mean)} across {cohort_size} comparable peers"
+        )
+        z_score = metrics.get("z_score", 0)
+        if z_score:
+            direction = "above" if z_score > 0 else "below"
+            text += f" ({abs(z_score):.2f} standard deviations {direction})"
+        text += "."
+        if metrics.get("percentile_rank") is not None:
+            text += (
+                f" It ranks at the {_ordinal(metrics['percentile_rank'])} percentile of the cohort, "
+                f"whose median is {_format_number(metrics['cohort_median'])} "
+                f"with an interquartile range of {_format_number(metrics['cohort_iqr'])}."
+            )
+        return text
+    
+    def _parity_paragraph(self, demo_analysis: Dict[str, Any]) -> str:
+        significance = demo_analysis.get("significance") or {}
+        if not significance:
+            return "No protected attributes were disclosed for the cohort, so demographic parity could not be checked."
+        
+        if not demo_analysis.get("disparity_detected"):
+            return (
+                f"Selection rates across {', '.join(significance)} are within the parity threshold "
+                "for the comparable peers."
+            )
+        
+        results = {**significance, **demo_analysis.get("intersectional", {})}
+        sentences = [f"{demo_analysis.get('description', 'Demographic disparity detected')}."]
+        for name in demo_analysis.get("flagged_attributes", [])[:MAX_PARITY_DETAILS]:
+            result = results.get(name)
+            if not result or not result.get("groups"):
+                continue
+            lowest, highest = self._extreme_groups(result["groups"])
+            sentences.append(
+                f"By {name}, the {lowest[0]} group is selected at {lowest[1]['rate']:.0%} against "
+                f"{highest[1]['rate']:.0%} for {highest[0]} "
+                f"(ratio {result['rate_ratio']:.2f}, p = {result['p_value']:.3g})."
+            )
+        return " ".join(sentences)
+    
+    def _template_key_factors(
+        self,
+        metrics: Dict[str, Any],
+        outcomes: Dict[str, Any],
+        patterns: List[Dict[str, Any]],
+        demo_analysis: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """The factors found by the analysis, weighted by how much they moved the risk"""
+        factors = []
+        if metrics.get("cohort_size"):
+            z_score = abs(metrics.get("z_score", 0))
+            description = f"Outcome is {z_score:.2f} standard deviations from the mean of {metrics['cohort_size']} peers"
+            if metrics.get("percentile_rank") is not None:
+                description += f", at the {_ordinal(metrics['percentile_rank'])} percentile"
+            factors.append({"factor": "Peer Comparison", "weight": min(10, 5 + int(2 * z_score)), "description": description})
+        
+        if demo_analysis.get("significance"):
+            flagged = demo_analysis.get("flagged_attributes", [])
+            if flagged:
+                description = f"Selection rates differ beyond the parity threshold by {', '.join(flagged)}"
+            else:
+                description = f"Selection rates by {', '.join(demo_analysis['significance'])} are within the parity threshold"
+            factors.append({"factor": "Demographic Parity", "weight": 8 if flagged else 3, "description": description})
+        
+        if any(pattern.get("type") == "statistical_outlier" for pattern in patterns):
+            factors.append({
+                "factor": "Statistical Outlier",
+                "weight": 9,
+                "description": "Outcome lies outside the range expected for the cohort"
+            })
+        
+        total = outcomes.get("total_comparable", 0)
+        for similar in outcomes.get("similar_attributes", []):
+            name = similar["attribute"].replace("_", " ")
+            factors.append({
+                "factor": name.title(),
+                "weight": 4,
+                "description": (
+                    f"{similar['similar_count']} of {total} peers have {name} within {_format_number(SIMILARITY_WINDOW)} of "
+                    f"{_format_number(similar['decision_value'])}"
+                )
+            })
+        
+        factors.sort(key=lambda factor: -factor["weight"])
+        return factors[:MAX_KEY_FACTORS]
+    
+    def _template_alternatives(self, metrics: Dict[str, Any], demo_analysis: Dict[str, Any], binary: bool) -> List[str]:
+        alternatives = []
+        if abs(metrics.get("z_score", 0)) > 1 and metrics.get("cohort_median") is not None:
+            target = "the cohort's selection rate" if binary else f"the peer median of {_format_number(metrics['cohort_median'])}"
+            alternatives.append(f"An outcome closer to {target} would align this decision with comparable peers")
+        
+        results = {**demo_analysis.get("significance", {}), **demo_analysis.get("intersectional", {})}
+        flagged = demo_analysis.get("flagged_attributes", [])
+        groups = (results.get(flagged[0]) or {}).get("groups") if flagged else None
+        if groups:
+            lowest, _ = self._extreme_groups(groups)
+            alternatives.append(f"Review how the {lowest[0]} group by {flagged[0]} was assessed before finalizing")
+        
+        cohort_size = metrics.get("cohort_size", 0)
+        if cohort_size < settings.COHORT_MIN_SIZE:
+            alternatives.append(
+                f"Compare against a broader cohort; {cohort_size} peers may be too few for a reliable comparison"
+            )
+        alternatives.append("Consider context not captured in the structured data, such as qualitative feedback")
+        return alternatives[:MAX_ALTERNATIVES]
+    
+    def _extreme_groups(self, groups: Dict[str, Dict[str, Any]]) -> tuple:
+        """(label, stats) of the lowest- and highest-rate group"""
+        ordered = sorted(groups.items(), key=lambda item: item[1]["rate"])
+        return ordered[0], ordered[-1]
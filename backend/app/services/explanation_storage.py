@@ -0,0 +1,82 @@
+import hashlib
+from datetime import datetime
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.bias_analysis import Explanation, PromptTemplate
+from app.services.explainability import PROMPT_TEMPLATE
+
+
+class ExplanationStore:
+    """
+    Prompt templates of stored explanations, and the move of old rows to compressed storage
+    
+    Templates are content-addressed: a template is stored once under the
+    SHA-256 of its body, so every worker registering the same scaffold ends
+    up with the same row, and a changed scaffold gets a new one while older
+    prompts keep decompressing against theirs.
+    """
+    
+    def __init__(self):
+        self._stored = set()  # Hashes known to be in the database
+    
+    def template(self, db: Session, body: str = PROMPT_TEMPLATE) -> PromptTemplate:
+        """Stored template for a scaffold (the current Gemini prompt by default), created on first use"""
+        digest = hashlib.sha256(body.encode()).hexdigest()
+        if digest not in self._stored and db.get(PromptTemplate, digest) is None:
+            try:
+                # Own transaction, so a worker inserting the same template first is not an error
+                with db.get_bind().begin() as conn:
+                    conn.execute(insert(PromptTemplate).values(hash=digest, body=body, created_at=datetime.utcnow()))
+            except IntegrityError:
+                pass
+        self._stored.add(digest)
+        return db.get(PromptTemplate, digest)
+    
+    def compress_legacy(self, db: Session, batch_size: int = 500) -> int:
+        """
+        Move plain-text prompts and responses into compressed storage (commits)
+        
+        Old prompts are compressed against the current template; one built
+        from an earlier scaffold still round-trips, it only compresses less.
+        
+        Returns:
+            Number of rows moved
+        """
+        template = self.template(db)
+        query = db.query(Explanation).filter(or_(
+            Explanation.legacy_prompt.isnot(None),
+            Explanation.legacy_response.isnot(None)
+        )).order_by(Explanation.id)
+        
+        # Moved rows leave the filter, so each batch is the next one
+        moved = 0
+        while True:
+            batch = query.limit(batch_size).all()
+            if not batch:
+                break
+            for explanation in batch:
+                prompt, response = explanation.legacy_prompt, explanation.legacy_response
+                explanation.store_prompt(prompt, template)
+                explanation.gemini_response = response
+            db.commit()
+            moved += len(batch)
+        return moved
+
+
+if __name__ == "__main__":
+    from app.core.database import SessionLocal, engine
+    
+    db = SessionLocal()
+    try:
+        moved = ExplanationStore().compress_legacy(db)
+        print(f"Compressed {moved} explanations")
+    finally:
+        db.close()
+    
+    if moved and engine.dialect.name == "sqlite":
+        # SQLite only returns the freed pages to the file system on VACUUM
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+        print("Vacuumed the database")
@@ -0,0 +1,218 @@
+import numpy as np
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+from datetime import datetime
+import uuid
+
+from app.models.decision import Decision, DecisionAttributes
+from app.models.bias_analysis import BiasAnalysis
+from app.models.disparity_scan import DisparityScanResult
+from app.services.bias_detection import BINARY_OUTCOME_TYPES, PROTECTED_ATTRIBUTES
+from app.services.scoring_policy import ScoringPolicyService
+from app.services.scoring_rules import ScoringRules
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class OrgScanResult:
+    """Container for an org-wide disparity scan"""
+    def __init__(
+        self,
+        scan_id: str,
+        organization_id: Optional[str],
+        decisions_scanned: int,
+        rows: List[Dict[str, Any]],
+        flagged_groups: int = 0
+    ):
+        self.scan_id = scan_id
+        self.organization_id = organization_id
+        self.decisions_scanned = decisions_scanned
+        self.rows = rows
+        self.flagged_groups = flagged_groups
+
+
+class OrgDisparityScanner:
+    """
+    Grouped disparity statistics over every stored decision of an organization
+    
+    Outliers and flagged groups follow the scoring policy active for each
+    decision type, as single-decision analyses do: an analysis is an outlier
+    above z_score.moderate, and a group is flagged below parity.min_ratio.
+    """
+    
+    def __init__(self, policies: ScoringPolicyService, chunk_size: int = 10000):
+        self.policies = policies
+        self.chunk_size = chunk_size
+    
+    def rules_by_type(
+        self,
+        db: Session,
+        organization_id: Optional[str],
+        decision_types: List[str]
+    ) -> Dict[str, ScoringRules]:
+        """Rules of the policy governing each decision type"""
+        return {
+            decision_type: self.policies.rules_for(self.policies.resolve(db, organization_id, decision_type))
+            for decision_type in decision_types
+        }
+    
+    def load_frame(self, db: Session, organization_id: Optional[str]) -> "pd.DataFrame":
+        """Read typed decision attributes and analysis z-scores in chunks into one columnar frame"""
+        import pandas as pd
+        
+        statement = db.query(
+            DecisionAttributes.decision_type,
+            DecisionAttributes.department,
+            *[getattr(DecisionAttributes, attr) for attr in PROTECTED_ATTRIBUTES],
+            DecisionAttributes.outcome,
+            BiasAnalysis.fairness_metrics["z_score"].as_float().label("z_score")
+        ).outerjoin(
+            BiasAnalysis, BiasAnalysis.decision_id == DecisionAttributes.decision_id
+        ).filter(
+            DecisionAttributes.organization_id == organization_id
+        ).statement
+        
+        frames = [
+            self._to_frame(chunk)
+            for chunk in pd.read_sql(statement, db.connection(), chunksize=self.chunk_size)
+        ]
+        if not frames:
+            return self._to_frame(pd.DataFrame(columns=self._columns()))
+        return pd.concat(frames, ignore_index=True)
+    
+    def compute(self, frame: "pd.DataFrame", rules: Optional[Dict[str, ScoringRules]] = None) -> "pd.DataFrame":
+        """
+        Compute grouped selection-rate disparities and z-score distributions
+        
+        Args:
+            frame: One row per decision, as built by load_frame
+            rules: Rules per decision type; types left out use the defaults
+        
+        Returns:
+            One row per decision type / attribute / department / group value.
+            Department is None for the all-departments rollup.
+        """
+        import pandas as pd
+        
+        # Long format: one row per decision and disclosed protected attribute
+        long = frame.melt(
+            id_vars=["decision_type", "department", "outcome", "z_score"],
+            value_vars=PROTECTED_ATTRIBUTES,
+            var_name="attribute",
+            value_name="group_value"
+        ).dropna(subset=["group_value"])
+        
+        if long.empty:
+            return pd.DataFrame()
+        
+        long["group_value"] = long["group_value"].astype(str)
+        long["department"] = long["department"].astype("string")
+        long["is_positive"] = (long["outcome"] == 1.0).astype(float)
+        z_cutoff = long["decision_type"].map({
+            decision_type: self._rules(rules, decision_type).z_moderate
+            for decision_type in long["decision_type"].unique()
+        })
+        long["is_outlier"] = np.where(
+            long["z_score"].notna(), (long["z_score"].abs() > z_cutoff).astype(float), np.nan
+        )
+        
+        by_department = self._aggregate(long, ["decision_type", "attribute", "department", "group_value"])
+        by_department = by_department[by_department["department"].notna()]
+        overall = self._aggregate(long, ["decision_type", "attribute", "group_value"])
+        overall["department"] = pd.Series(pd.NA, index=overall.index, dtype="string")
+        
+        result = pd.concat([by_department, overall], ignore_index=True)
+        
+        binary = result["decision_type"].isin(BINARY_OUTCOME_TYPES)
+        result["positive_count"] = result["positive_count"].where(binary)
+        result["selection_rate"] = (result["positive_count"] / result["outcome_count"]).where(binary)
+        
+        # Disparity relative to the best group within the same slice
+        metric = result["selection_rate"].where(binary, result["mean_outcome"])
+        slice_keys = [
+            result["decision_type"], result["attribute"],
+            result["department"].fillna("\x00")
+        ]
+        best = metric.groupby(slice_keys).transform("max")
+        result["disparity_ratio"] = (metric / best).where(best > 0)
+        
+        return result.drop(columns=["outcome_count"])
+    
+    def run_scan(self, db: Session, organization_id: Optional[str]) -> OrgScanResult:
+        """Scan an organization, persist the summary rows and return them"""
+        frame = self.load_frame(db, organization_id)
+        rules = self.rules_by_type(db, organization_id, frame["decision_type"].dropna().unique().tolist())
+        result = self.compute(frame, rules)
+        
+        scan_id = str(uuid.uuid4())
+        created_at = datetime.utcnow()
+        rows = []
+        flagged_groups = 0
+        if not result.empty:
+            min_ratio = result["decision_type"].map({
+                decision_type: self._rules(rules, decision_type).parity_min_ratio
+                for decision_type in result["decision_type"].unique()
+            })
+            flagged_groups = int((result["disparity_ratio"] < min_ratio).sum())
+            
+            result = result.astype(object).where(result.notna(), None)
+            rows = result.to_dict(orient="records")
+            for row in rows:
+                row["scan_id"] = scan_id
+                row["organization_id"] = organization_id
+                row["created_at"] = created_at
+                row["id"] = str(uuid.uuid4())
+            db.bulk_insert_mappings(DisparityScanResult, rows)
+            db.commit()
+        
+        return OrgScanResult(
+            scan_id=scan_id,
+            organization_id=organization_id,
+            decisions_scanned=len(frame),
+            rows=rows,
+            flagged_groups=flagged_groups
+        )
+    
+    def _rules(self, rules: Optional[Dict[str, ScoringRules]], decision_type: str) -> ScoringRules:
+        return (rules or {}).get(decision_type) or self.policies.rules_for(None)
+    
+    def _aggregate(self, long: "pd.DataFrame", keys: List[str]) -> "pd.DataFrame":
+        """Vectorized group-by over the long frame"""
+        grouped = long.groupby(keys, dropna=False, observed=True, sort=False)
+        agg = grouped.agg(
+            decision_count=("outcome", "size"),
+            outcome_count=("outcome", "count"),
+            positive_count=("is_positive", "sum"),
+            mean_outcome=("outcome", "mean"),
+            z_score_mean=("z_score", "mean"),
+            z_score_std=("z_score", "std"),
+            z_score_p50=("z_score", "median"),
+            outlier_share=("is_outlier", "mean")
+        )
+        agg["z_score_p90"] = grouped["z_score"].quantile(0.9)
+        return agg.reset_index()
+    
+    def _columns(self) -> List[str]:
+        return ["decision_type", "department", *PROTECTED_ATTRIBUTES, "outcome", "z_score"]
+    
+    def _to_frame(self, chunk: "pd.DataFrame") -> "pd.DataFrame":
+        chunk["outcome"] = chunk["outcome"].astype(float)
+        chunk["z_score"] = chunk["z_score"].astype(float)
+        return chunk
+
+
+if __name__ == "__main__":
+    # Periodic job entry point: scan every organization with stored decisions
+    from app.core.database import SessionLocal
+    from app.services.bias_detection import BiasDetectionService
+    
+    db = SessionLocal()
+    try:
+        scanner = OrgDisparityScanner(ScoringPolicyService(BiasDetectionService()))
+        org_ids = [row[0] for row in db.query(Decision.organization_id).distinct()]
+        for org_id in org_ids:
+            result = scanner.run_scan(db, org_id)
+            print(f"Scanned {result.decisions_scanned} decisions for organization {org_id}")
+    finally:
+        db.close()
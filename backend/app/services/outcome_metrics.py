@@ -0,0 +1,305 @@
+import numpy as np
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+import uuid
+
+from app.core.metrics import stage_timer
+from app.models.decision import Decision, DecisionAttributes, DecisionStatus
+from app.models.outcome_metrics import OutcomeFairnessResult
+from app.models.performance import Employee, ManagerRating
+from app.services.bias_detection import BINARY_OUTCOME_TYPES, PROTECTED_ATTRIBUTES
+
+# Later outcomes a finalized decision is checked against
+LATER_OUTCOMES = ["retention", "rating"]
+
+# Mean 0-5 manager rating after the decision that counts as a good later outcome
+RATING_SUCCESS = 3.5
+
+# Score bins of scored decision types (appraisal, compensation) for calibration
+CALIBRATION_BINS = 5
+
+
+def _factorize(values: np.ndarray) -> tuple:
+    """Distinct values in order of first appearance and per-row codes (-1 for None)"""
+    lookup: Dict[Any, int] = {}
+    codes = np.fromiter(
+        (-1 if value is None else lookup.setdefault(value, len(lookup)) for value in values),
+        dtype=np.int64, count=len(values)
+    )
+    return list(lookup), codes
+
+
+class OutcomeMetricsResult:
+    """Container for an outcome-based fairness run"""
+    def __init__(
+        self,
+        run_id: str,
+        organization_id: Optional[str],
+        decisions_scanned: int,
+        rows: List[Dict[str, Any]]
+    ):
+        self.run_id = run_id
+        self.organization_id = organization_id
+        self.decisions_scanned = decisions_scanned
+        self.rows = rows
+
+
+class OutcomeFairnessScanner:
+    """
+    Equal opportunity, equalized odds and calibration of finalized decisions
+    
+    Each finalized decision is a prediction checked against what happened
+    later: whether the employee was retained (not terminated) and whether
+    their manager ratings after the decision average RATING_SUCCESS or more.
+    Selections (hiring, promotion, retention) predict success when positive;
+    scored decisions (appraisal, compensation) when above the median of
+    their decision type, and are binned by score quantile for calibration.
+    
+    Confusion matrices and calibration bins of every decision type,
+    attribute and group are accumulated with one bincount per later outcome.
+    """
+    
+    def __init__(self, chunk_size: int = 10000):
+        self.chunk_size = chunk_size
+    
+    def load(self, db: Session, organization_id: Optional[str]) -> Dict[str, np.ndarray]:
+        """
+        Read finalized decisions with their later outcomes into columns
+        
+        Returns:
+            Dict of equal-length arrays: decision_type and the protected
+            attributes (object), outcome, and the later outcomes as 1/0
+            (NaN when unknown)
+        """
+        employee_id = Decision.employee_data["employee_id"].as_string()
+        finalized = [Decision.organization_id == organization_id, Decision.status == DecisionStatus.FINALIZED]
+        
+        query = db.query(
+            Decision.id,
+            DecisionAttributes.decision_type,
+            *[getattr(DecisionAttributes, attr) for attr in PROTECTED_ATTRIBUTES],
+            DecisionAttributes.outcome,
+            Employee.status
+        ).join(
+            DecisionAttributes, DecisionAttributes.decision_id == Decision.id
+        ).outerjoin(
+            Employee, and_(Employee.id == employee_id, Employee.organization_id == organization_id)
+        ).filter(*finalized)
+        rows = list(query.yield_per(self.chunk_size))
+        
+        later_ratings = dict(db.query(
+            Decision.id,
+            func.avg((
+                ManagerRating.volume_score + ManagerRating.quality_score
+                + ManagerRating.speed_score + ManagerRating.complexity_score
+            ) / 4)
+        ).join(
+            ManagerRating, ManagerRating.employee_id == employee_id
+        ).filter(
+            *finalized, ManagerRating.created_at > Decision.finalized_at
+        ).group_by(Decision.id).all())
+        
+        n_attrs = len(PROTECTED_ATTRIBUTES)
+        columns = {"decision_type": np.array([row[1] for row in rows], dtype=object)}
+        for i, attr in enumerate(PROTECTED_ATTRIBUTES):
+            columns[attr] = np.array([row[2 + i] for row in rows], dtype=object)
+        columns["outcome"] = np.array([row[2 + n_attrs] for row in rows], dtype=float)
+        statuses = [row[3 + n_attrs] for row in rows]
+        columns["retention"] = np.array(
+            [np.nan if status is None else float(status != "terminated") for status in statuses]
+        )
+        ratings = np.array([later_ratings.get(row[0]) for row in rows], dtype=float)
+        columns["rating"] = np.where(np.isnan(ratings), np.nan, ratings >= RATING_SUCCESS)
+        return columns
+    
+    def compute(self, columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """
+        Per-group confusion matrices, rate gaps and calibration
+        
+        Args:
+            columns: Finalized decisions, as built by load
+        
+        Returns:
+            One row per decision type / later outcome / attribute / group
+            with at least one decision whose later outcome is known
+        """
+        decision_types = columns["decision_type"]
+        if not len(decision_types):
+            return []
+        types, type_code = _factorize(decision_types)
+        predicted, score_bin = self._predictions(types, type_code, columns["outcome"])
+        
+        # Long format over every attribute: group ids are offset per attribute
+        attr_groups, row_index, group_index = [], [], []
+        n_groups = 0
+        for attr in PROTECTED_ATTRIBUTES:
+            names, codes = _factorize(columns[attr])
+            if not names:
+                continue
+            disclosed = np.flatnonzero(codes >= 0)
+            attr_groups.append((attr, n_groups, [str(name) for name in names]))
+            row_index.append(disclosed)
+            group_index.append(codes[disclosed] + n_groups)
+            n_groups += len(names)
+        if not attr_groups:
+            # No decision discloses any protected attribute
+            return []
+        row_index = np.concatenate(row_index)
+        group_index = np.concatenate(group_index)
+        n_types = len(types)
+        
+        rows = []
+        for outcome in LATER_OUTCOMES:
+            actual = columns[outcome][row_index]
+            valid = ~np.isnan(actual) & (score_bin[row_index] >= 0)
+            r = row_index[valid]
+            slot = type_code[r] * n_groups + group_index[valid]
+            
+            # confusion[t, g, predicted, actual] and per score bin counts / later successes
+            confusion = np.bincount(
+                (slot * 2 + predicted[r]) * 2 + actual[valid].astype(np.int64), minlength=n_types * n_groups * 4
+            ).reshape(n_types, n_groups, 2, 2)
+            bin_key = slot * CALIBRATION_BINS + score_bin[r]
+            bin_counts = np.bincount(bin_key, minlength=n_types * n_groups * CALIBRATION_BINS).reshape(
+                n_types, n_groups, CALIBRATION_BINS
+            )
+            bin_successes = np.bincount(
+                bin_key, weights=actual[valid], minlength=n_types * n_groups * CALIBRATION_BINS
+            ).reshape(n_types, n_groups, CALIBRATION_BINS)
+            
+            for attr, offset, names in attr_groups:
+                groups = slice(offset, offset + len(names))
+                metrics = self._group_metrics(confusion[:, groups], bin_counts[:, groups], bin_successes[:, groups])
+                for t, decision_type in enumerate(types):
+                    for g, group_value in enumerate(names):
+                        row = {key: values[t, g] for key, values in metrics.items()}
+                        if row["decision_count"] == 0:
+                            continue
+                        rows.append({
+                            "decision_type": decision_type,
+                            "outcome": outcome,
+                            "attribute": attr,
+                            "group_value": group_value,
+                            **row
+                        })
+        return [self._serialize(row) for row in rows]
+    
+    def run(self, db: Session, organization_id: Optional[str]) -> OutcomeMetricsResult:
+        """Compute an organization's metrics over its full history, persist and return them"""
+        with stage_timer("outcome_metrics_load"):
+            columns = self.load(db, organization_id)
+        with stage_timer("outcome_metrics_compute"):
+            rows = self.compute(columns)
+        
+        run_id = str(uuid.uuid4())
+        created_at = datetime.utcnow()
+        for row in rows:
+            row["id"] = str(uuid.uuid4())
+            row["run_id"] = run_id
+            row["organization_id"] = organization_id
+            row["created_at"] = created_at
+        if rows:
+            db.bulk_insert_mappings(OutcomeFairnessResult, rows)
+            db.commit()
+        
+        return OutcomeMetricsResult(
+            run_id=run_id,
+            organization_id=organization_id,
+            decisions_scanned=len(columns["decision_type"]),
+            rows=rows
+        )
+    
+    def _predictions(self, types: List[str], type_code: np.ndarray, outcome: np.ndarray) -> tuple:
+        """Predicted success (0/1) and calibration bin (-1 without an outcome) per decision"""
+        predicted = np.zeros(len(outcome), dtype=np.int64)
+        score_bin = np.full(len(outcome), -1, dtype=np.int64)
+        for t, decision_type in enumerate(types):
+            rows = np.flatnonzero((type_code == t) & ~np.isnan(outcome))
+            if not len(rows):
+                continue
+            values = outcome[rows]
+            if decision_type in BINARY_OUTCOME_TYPES:
+                predicted[rows] = values == 1.0
+                score_bin[rows] = predicted[rows]
+            else:
+                predicted[rows] = values > np.median(values)
+                ranks = np.empty(len(values), dtype=np.int64)
+                ranks[np.argsort(values, kind="stable")] = np.arange(len(values))
+                score_bin[rows] = ranks * CALIBRATION_BINS // len(values)
+        return predicted, score_bin
+    
+    def _group_metrics(
+        self,
+        confusion: np.ndarray,
+        bin_counts: np.ndarray,
+        bin_successes: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """Rates and gaps of one attribute's groups, as (decision type, group) arrays"""
+        tn, fn = confusion[..., 0, 0], confusion[..., 0, 1]
+        fp, tp = confusion[..., 1, 0], confusion[..., 1, 1]
+        
+        def rate(numerator, denominator):
+            return np.divide(numerator, denominator, out=np.full(numerator.shape, np.nan), where=denominator > 0)
+        
+        tpr, fpr = rate(tp, tp + fn), rate(fp, fp + tn)
+        
+        # Gaps within each decision type, to the best group; all-NaN types stay NaN
+        with np.errstate(invalid="ignore"):
+            best_tpr = np.fmax.reduce(tpr, axis=1, keepdims=True)
+            lowest_fpr = np.fmin.reduce(fpr, axis=1, keepdims=True)
+        tpr_gap = best_tpr - tpr
+        
+        # Calibration: each bin's later success rate against all groups of the type
+        group_rates = rate(bin_successes, bin_counts)
+        type_rates = rate(bin_successes.sum(axis=1, keepdims=True), bin_counts.sum(axis=1, keepdims=True))
+        deviation = np.where(bin_counts > 0, np.abs(group_rates - type_rates), 0.0)
+        decision_count = bin_counts.sum(axis=2)
+        
+        return {
+            "decision_count": decision_count,
+            "true_positive": tp,
+            "false_positive": fp,
+            "true_negative": tn,
+            "false_negative": fn,
+            "true_positive_rate": tpr,
+            "false_positive_rate": fpr,
+            "precision": rate(tp, tp + fp),
+            "equal_opportunity_gap": tpr_gap,
+            "equalized_odds_gap": np.fmax(tpr_gap, fpr - lowest_fpr),
+            "calibration_error": rate((deviation * bin_counts).sum(axis=2), decision_count),
+            "calibration": np.stack([bin_counts, group_rates], axis=-1)
+        }
+    
+    def _serialize(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Plain Python values, with None for undefined rates"""
+        calibration = row.pop("calibration")
+        row = {
+            key: (None if np.isnan(value) else float(value)) if isinstance(value, np.floating)
+            else int(value) if isinstance(value, np.integer) else value
+            for key, value in row.items()
+        }
+        row["calibration"] = [
+            {"bin": b, "count": int(count), "success_rate": None if np.isnan(success) else float(success)}
+            for b, (count, success) in enumerate(calibration.tolist())
+            if count > 0
+        ]
+        return row
+
+
+if __name__ == "__main__":
+    # Nightly job entry point: refresh every organization with finalized decisions
+    from app.core.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        scanner = OutcomeFairnessScanner()
+        org_ids = [row[0] for row in db.query(Decision.organization_id).filter(
+            Decision.status == DecisionStatus.FINALIZED
+        ).distinct()]
+        for org_id in org_ids:
+            result = scanner.run(db, org_id)
+            print(f"Evaluated {result.decisions_scanned} finalized decisions for organization {org_id}")
+    finally:
+        db.close()
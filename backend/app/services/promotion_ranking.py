@@ -0,0 +1,241 @@
+import uuid
+from datetime import date, datetime
+import numpy as np
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+
+from app.core.metrics import stage_timer
+from app.models.promotion import PromotionDecision, PromotionCandidate, PromotionDecisionStatus
+from app.services.bias_detection import BiasDetectionService, PROTECTED_ATTRIBUTES
+from app.services.cohort_store import ColumnarCohort, CohortColumn
+from app.services.contribution_scoring import ContributionScorer
+from app.services.scoring_policy import ScoringPolicyService
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first
+    
+    Partitions around the k-th best score instead of sorting every score;
+    only the k winners are sorted. Equal scores keep index order.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    threshold = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > threshold)
+    tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+    chosen = np.concatenate([above, tied])
+    return chosen[np.lexsort((chosen, -scores[chosen]))]
+
+
+class PromotionRankingService:
+    """
+    Ranks promotion candidates and recommends a slate for the open slots
+    
+    Candidates are scored by project contribution (see ContributionScorer)
+    and the best total_slots are recommended. With a fairness attribute,
+    the slate is re-balanced until every group's selection rate is at
+    least min_ratio of the highest one (the 80% rule of the demographic
+    parity analysis by default): the best remaining candidate of the
+    lowest-rate group replaces the weakest pick of the highest-rate group.
+    """
+    
+    def __init__(
+        self,
+        bias: BiasDetectionService,
+        policies: ScoringPolicyService,
+        scorer: ContributionScorer,
+        chunk_size: int = 1000
+    ):
+        self.bias = bias
+        self.policies = policies
+        self.scorer = scorer
+        self.chunk_size = chunk_size
+    
+    def rank(
+        self,
+        scores: np.ndarray,
+        total_slots: int,
+        groups: Optional[np.ndarray] = None,
+        min_ratio: float = 0.8
+    ) -> Dict[str, Any]:
+        """
+        Recommend a slate and rank every candidate
+        
+        Args:
+            scores: Candidate scores
+            total_slots: Slots to fill
+            groups: Optional group code per candidate (-1 when undisclosed);
+                undisclosed candidates are selectable but not balanced
+            min_ratio: Lowest allowed ratio of group selection rates
+        
+        Returns:
+            Dict with "order" (candidate indices, slate first, each part
+            best first), "slate_size", and the per-group "counts" and
+            "selected" arrays when groups are given
+        """
+        slate = top_k(scores, total_slots)
+        result: Dict[str, Any] = {"slate_size": len(slate)}
+        
+        if groups is not None and len(slate):
+            slate = self._rebalance(scores, groups, slate, min_ratio)
+            selected = groups[slate]
+            result["counts"] = np.bincount(groups[groups >= 0], minlength=groups.max() + 1)
+            result["selected"] = np.bincount(selected[selected >= 0], minlength=len(result["counts"]))
+        
+        # Every candidate row stores a rank, so the rest is ordered too
+        in_slate = np.zeros(len(scores), dtype=bool)
+        in_slate[slate] = True
+        rest = np.flatnonzero(~in_slate)
+        result["order"] = np.concatenate([slate, rest[np.argsort(-scores[rest], kind="stable")]])
+        return result
+    
+    def rank_candidates(
+        self,
+        db: Session,
+        decision: PromotionDecision,
+        eligible_departments: Optional[List[str]] = None,
+        eligible_employees: Optional[List[str]] = None,
+        period_start: Optional[date] = None,
+        period_end: Optional[date] = None,
+        fairness_attribute: Optional[str] = None,
+        employee_attributes: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Score, rank and store the candidates of a promotion decision (commits)
+        
+        Args:
+            db: Database session
+            decision: A draft or calculated promotion decision
+            eligible_departments: Departments to consider (None: all)
+            eligible_employees: Employee ids to consider (None: all)
+            period_start: Earliest project start date counted
+            period_end: Latest project end date counted
+            fairness_attribute: Protected attribute to balance the slate on
+            employee_attributes: Profile fields per employee id, holding the
+                fairness attribute
+        
+        Returns:
+            Summary with candidate count, slate and parity of the slate
+        
+        Raises:
+            ValueError: If the decision is finalized or the attribute is
+                not a protected attribute
+        """
+        if decision.status == PromotionDecisionStatus.FINALIZED.value:
+            raise ValueError("Candidates of a finalized promotion decision cannot change")
+        if fairness_attribute is not None and fairness_attribute not in PROTECTED_ATTRIBUTES:
+            raise ValueError(f"Fairness attribute must be one of {', '.join(PROTECTED_ATTRIBUTES)}")
+        
+        with stage_timer("promotion_load"):
+            inputs = self.scorer.load_inputs(
+                db, decision.organization_id, period_start, period_end, eligible_departments, eligible_employees
+            )
+        scored = self.scorer.score(inputs)
+        scores = scored["contribution"]
+        
+        policy = self.policies.resolve(db, decision.organization_id, "promotion")
+        rules = self.policies.rules_for(policy)
+        groups, group_names = None, []
+        if fairness_attribute:
+            employee_attributes = employee_attributes or {}
+            values = [employee_attributes.get(employee_id, {}).get(fairness_attribute) for employee_id in inputs.employee_ids]
+            group_names = list(dict.fromkeys(value for value in values if value is not None))
+            lookup = {name: code for code, name in enumerate(group_names)}
+            groups = np.array([lookup.get(value, -1) for value in values], dtype=np.int64)
+        
+        with stage_timer("promotion_rank"):
+            ranking = self.rank(scores, decision.total_slots, groups, rules.parity_min_ratio)
+        order = ranking["order"]
+        slate_size = ranking["slate_size"]
+        unconstrained = set(top_k(scores, decision.total_slots).tolist()) if groups is not None else None
+        
+        breakdowns = self.scorer.breakdowns(inputs, scored)
+        now = datetime.utcnow()
+        score_values = scores.tolist()
+        rows = []
+        for rank, i in enumerate(order.tolist(), start=1):
+            recommended = rank <= slate_size
+            details = {"projects": breakdowns[i]}
+            if unconstrained is not None:
+                details["fairness_adjusted"] = recommended != (i in unconstrained)
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "decision_id": decision.id,
+                "employee_id": inputs.employee_ids[i],
+                "score": score_values[i],
+                "rank": rank,
+                "is_recommended": recommended,
+                "calculation_details": details,
+                "created_at": now
+            })
+        
+        # Replace the previous ranking in one transaction
+        with stage_timer("promotion_write"):
+            db.execute(delete(PromotionCandidate).where(PromotionCandidate.decision_id == decision.id))
+            for start in range(0, len(rows), self.chunk_size):
+                db.execute(insert(PromotionCandidate), rows[start:start + self.chunk_size])
+            decision.status = PromotionDecisionStatus.CALCULATED.value
+            decision.criteria_snapshot = {
+                "eligible_departments": eligible_departments,
+                "eligible_employees": eligible_employees,
+                "period_start": period_start.isoformat() if period_start else None,
+                "period_end": period_end.isoformat() if period_end else None,
+                "fairness_attribute": fairness_attribute,
+                "min_ratio": rules.parity_min_ratio if fairness_attribute else None
+            }
+            db.commit()
+        
+        summary = {
+            "candidates": len(rows),
+            "recommended": slate_size,
+            "fairness_adjusted": sum(1 for row in rows if row["calculation_details"].get("fairness_adjusted"))
+        }
+        if groups is not None:
+            summary["parity"] = self._slate_parity(groups, group_names, order[:slate_size], fairness_attribute, rules)
+        return summary
+    
+    def _rebalance(self, scores: np.ndarray, groups: np.ndarray, slate: np.ndarray, min_ratio: float) -> np.ndarray:
+        """Swap picks between groups until the selection rates pass the ratio"""
+        n_groups = groups.max() + 1
+        if n_groups < 2:
+            return slate
+        k = len(slate)
+        counts = np.bincount(groups[groups >= 0], minlength=n_groups)
+        picks = groups[slate]
+        quota = np.bincount(picks[picks >= 0], minlength=n_groups)
+        
+        # Each group can contribute at most k picks, so only its top k are ordered
+        members = [np.flatnonzero(groups == g) for g in range(n_groups)]
+        ranked = [m[top_k(scores[m], k)] for m in members]
+        
+        for _ in range(k * n_groups):
+            rates = quota / counts
+            low, high = np.argmin(rates), np.argmax(rates)
+            if rates[low] >= min_ratio * rates[high] or quota[low] >= min(counts[low], k) or quota[high] == 0:
+                break
+            quota[low] += 1
+            quota[high] -= 1
+        
+        undisclosed = slate[picks < 0]
+        chosen = np.concatenate([undisclosed] + [ranked[g][:quota[g]] for g in range(n_groups)])
+        return chosen[np.lexsort((chosen, -scores[chosen]))]
+    
+    def _slate_parity(
+        self,
+        groups: np.ndarray,
+        group_names: List[Any],
+        slate: np.ndarray,
+        attribute: str,
+        rules
+    ) -> Dict[str, Any]:
+        """Demographic parity analysis of the slate, with candidates as the cohort"""
+        selected = np.zeros(len(groups), dtype=np.int8)
+        selected[slate] = 1
+        cohort = ColumnarCohort(len(groups), {
+            attribute: CohortColumn(attribute, "category", groups, categories=group_names),
+            "outcome": CohortColumn("outcome", "category", selected, categories=["no", "selected"])
+        })
+        return self.bias._analyze_demographic_parity({attribute: None}, cohort, rules)
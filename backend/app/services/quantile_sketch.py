@@ -0,0 +1,137 @@
+import numpy as np
+from typing import List, Dict, Any, Optional
+
+# Capacity of the top level; rank error is on the order of 1/K of the count
+DEFAULT_K = 200
+
+# Each level below the top holds this share of the one above
+CAPACITY_DECAY = 2 / 3
+MIN_CAPACITY = 2
+
+
+class QuantileSketch:
+    """
+    Mergeable KLL quantile sketch of float values
+    
+    Level h holds items that each stand for 2**h values. A level over its
+    capacity is sorted and every other item moves up one level, so the
+    sketch keeps O(k) items however many values it summarizes, and two
+    sketches merge by concatenating their levels. Up to k values it is
+    exact.
+    
+    Compaction alternates between the odd and even items of a level rather
+    than flipping a coin, so equal inputs always give equal sketches (and
+    equal analysis results).
+    """
+    
+    def __init__(
+        self,
+        k: int = DEFAULT_K,
+        levels: Optional[List[np.ndarray]] = None,
+        parities: Optional[List[int]] = None
+    ):
+        self.k = k
+        self.levels = levels or [np.zeros(0)]
+        self.parities = parities or [0] * len(self.levels)
+        self._cdf = None
+    
+    @classmethod
+    def from_values(cls, values: np.ndarray, k: int = DEFAULT_K) -> "QuantileSketch":
+        sketch = cls(k)
+        sketch.update(values)
+        return sketch
+    
+    def __len__(self) -> int:
+        """Number of values summarized"""
+        return sum(len(level) << h for h, level in enumerate(self.levels))
+    
+    def update(self, values: np.ndarray):
+        """Add a batch of values (NaN must be filtered out by the caller)"""
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=float)])
+        self._compress()
+    
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Fold another sketch into this one, e.g. of another cohort or shard
+        
+        Raises:
+            ValueError: If the sketches were built with different k
+        """
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with k={self.k} and k={other.k}")
+        for h, level in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.zeros(0))
+                self.parities.append(0)
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self._compress()
+        return self
+    
+    def rank(self, value: float) -> float:
+        """Share (0-1) of values below value, counting equal values half; NaN when empty"""
+        return float(self.ranks(np.array([value], dtype=float))[0])
+    
+    def ranks(self, values: np.ndarray) -> np.ndarray:
+        """rank of each of many values at once"""
+        items, cumulative = self._distribution()
+        if not len(items):
+            return np.full(len(values), np.nan)
+        # Weight up to each position, with 0 in front for "nothing below"
+        weight = np.concatenate([[0], cumulative])
+        below = np.searchsorted(items, values, side="left")
+        through = np.searchsorted(items, values, side="right")
+        return (weight[below] + weight[through]) / 2 / cumulative[-1]
+    
+    def quantile(self, q: float) -> float:
+        """Smallest value with at least a q share of the values at or below it; NaN when empty"""
+        values, cumulative = self._distribution()
+        if not len(values):
+            return np.nan
+        index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(values[min(index, len(values) - 1)])
+    
+    def layout(self) -> Dict[str, Any]:
+        """Everything but the items, to store next to to_array"""
+        return {"k": self.k, "levels": [len(level) for level in self.levels], "parities": list(self.parities)}
+    
+    def to_array(self) -> np.ndarray:
+        """Items of every level, lowest level first"""
+        return np.concatenate(self.levels)
+    
+    @classmethod
+    def from_array(cls, items: np.ndarray, layout: Dict[str, Any]) -> "QuantileSketch":
+        """Rebuild a stored sketch; levels are views of items"""
+        bounds = np.cumsum([0] + layout["levels"])
+        levels = [items[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        return cls(layout["k"], levels, list(layout["parities"]))
+    
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(MIN_CAPACITY, int(np.ceil(self.k * CAPACITY_DECAY ** depth)))
+    
+    def _compress(self):
+        self._cdf = None
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.zeros(0))
+                    self.parities.append(0)
+                level = np.sort(level)
+                # With an odd count the largest item stays behind
+                keep = len(level) % 2
+                promoted = level[self.parities[h]:len(level) - keep:2]
+                self.parities[h] ^= 1
+                self.levels[h] = level[len(level) - keep:]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+    
+    def _distribution(self):
+        """Sorted items and their cumulative weights, cached until the next change"""
+        if self._cdf is None:
+            values = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(level), 1 << h, dtype=np.int64) for h, level in enumerate(self.levels)])
+            order = np.argsort(values, kind="stable")
+            self._cdf = (values[order], np.cumsum(weights[order]))
+        return self._cdf
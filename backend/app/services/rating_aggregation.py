@@ -0,0 +1,294 @@
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import delete, func, insert, select, union
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+
+from app.core.metrics import stage_timer
+from app.models.performance import Project, ManagerRating, PeerRating, Kpi, EmployeeRatingSummary
+
+# Scored dimensions, in column order; KPIs map to them by metric_category
+DIMENSIONS = ["volume", "quality", "speed", "complexity"]
+
+# Weights of the manager rating, peer rating and KPI average, renormalized over the sources present
+SOURCE_WEIGHTS = (0.4, 0.3, 0.3)
+
+# Ratings created this long before the watermark are checked again, for commits that landed late
+RATING_REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+def period_key(period_start: Optional[date] = None, period_end: Optional[date] = None) -> str:
+    """Storage key of a rating period, e.g. "2025-01-01..2025-06-30" ("..": all time)"""
+    return f"{period_start.isoformat() if period_start else ''}..{period_end.isoformat() if period_end else ''}"
+
+
+def project_period_filters(
+    organization_id: Optional[str],
+    period_start: Optional[date] = None,
+    period_end: Optional[date] = None
+) -> list:
+    """Filters selecting the organization's projects run within a period"""
+    filters = [Project.organization_id == organization_id]
+    if period_start:
+        filters.append(Project.start_date >= period_start)
+    if period_end:
+        filters.append(Project.end_date <= period_end)
+    return filters
+
+
+class RatingAggregationService:
+    """
+    Per-employee performance scores from manager ratings, peer ratings and KPIs
+    
+    Each (employee, project) pair gets a 0-5 score per dimension, blending
+    the mean manager rating, mean peer rating and mean KPI of that
+    dimension. An employee's dimension score is the mean over their
+    projects weighted by project weightage, and performance_rating is the
+    mean of the dimensions scored. Averages are taken in SQL, one grouped
+    query per source, and the weighting is done with numpy.
+    
+    Scores are stored per employee and rating period. A refresh recomputes
+    only the employees with ratings newer than the stored ones.
+    """
+    
+    def __init__(self, chunk_size: int = 1000):
+        self.chunk_size = chunk_size
+    
+    def aggregate(
+        self,
+        db: Session,
+        organization_id: Optional[str],
+        period_start: Optional[date] = None,
+        period_end: Optional[date] = None,
+        changed_since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Compute the rating summaries of a period
+        
+        Args:
+            db: Database session
+            organization_id: Organization whose projects are rated
+            period_start: Earliest project start date (None: no bound)
+            period_end: Latest project end date (None: no bound)
+            changed_since: Only employees with a rating or KPI created after
+                this time (None: every rated employee)
+        
+        Returns:
+            EmployeeRatingSummary rows as dicts
+        """
+        filters = project_period_filters(organization_id, period_start, period_end)
+        changed = self._changed_employees(filters, changed_since) if changed_since is not None else None
+        
+        def scope(model) -> list:
+            return filters if changed is None else [*filters, model.employee_id.in_(changed)]
+        
+        sources = []
+        for model in [ManagerRating, PeerRating]:
+            rows = db.query(
+                model.employee_id,
+                model.project_id,
+                Project.weightage,
+                *[func.avg(getattr(model, f"{dimension}_score")) for dimension in DIMENSIONS],
+                func.count(),
+                func.max(model.created_at)
+            ).join(Project, Project.id == model.project_id).filter(
+                *scope(model)
+            ).group_by(model.employee_id, model.project_id, Project.weightage).all()
+            sources.append([(row[0], row[1], row[2], row[3:7], row[7], row[8]) for row in rows])
+        
+        kpi_rows = db.query(
+            Kpi.employee_id,
+            Kpi.project_id,
+            Project.weightage,
+            func.lower(Kpi.metric_category),
+            func.avg(Kpi.metric_value),
+            func.count(),
+            func.max(Kpi.created_at)
+        ).join(Project, Project.id == Kpi.project_id).filter(*scope(Kpi)).group_by(
+            Kpi.employee_id, Kpi.project_id, Project.weightage, func.lower(Kpi.metric_category)
+        ).all()
+        kpis = []
+        for employee_id, project_id, weightage, category, value, count, latest in kpi_rows:
+            values = [np.nan] * len(DIMENSIONS)
+            if category in DIMENSIONS:
+                values[DIMENSIONS.index(category)] = value
+            kpis.append((employee_id, project_id, weightage, values, count, latest))
+        sources.append(kpis)
+        
+        with stage_timer("rating_aggregate"):
+            return self._summarize(sources, organization_id, period_key(period_start, period_end))
+    
+    def refresh(
+        self,
+        db: Session,
+        organization_id: Optional[str],
+        period_start: Optional[date] = None,
+        period_end: Optional[date] = None,
+        full: bool = False
+    ) -> int:
+        """
+        Bring the stored summaries of a period up to date (commits)
+        
+        Without full, only employees rated since the newest stored rating
+        are recomputed. Use full after ratings are edited or deleted, or
+        project weightages change.
+        
+        Returns:
+            Number of summaries written
+        """
+        key = period_key(period_start, period_end)
+        scope = [EmployeeRatingSummary.organization_id == organization_id, EmployeeRatingSummary.period == key]
+        watermark = None
+        if not full:
+            watermark = db.query(func.max(EmployeeRatingSummary.ratings_through)).filter(*scope).scalar()
+            latest = self._latest_rating(db, project_period_filters(organization_id, period_start, period_end))
+            if latest is None or (watermark is not None and latest <= watermark):
+                return 0
+        
+        changed_since = watermark - RATING_REFRESH_OVERLAP if watermark is not None else None
+        rows = self.aggregate(db, organization_id, period_start, period_end, changed_since=changed_since)
+        
+        stale = delete(EmployeeRatingSummary).where(*scope)
+        if changed_since is not None:
+            stale = stale.where(EmployeeRatingSummary.employee_id.in_(self._changed_employees(
+                project_period_filters(organization_id, period_start, period_end), changed_since
+            )))
+        db.execute(stale)
+        for start in range(0, len(rows), self.chunk_size):
+            db.execute(insert(EmployeeRatingSummary), rows[start:start + self.chunk_size])
+        db.commit()
+        return len(rows)
+    
+    def ratings(
+        self,
+        db: Session,
+        organization_id: Optional[str],
+        employee_ids: Optional[List[str]] = None,
+        period_start: Optional[date] = None,
+        period_end: Optional[date] = None
+    ) -> Dict[str, EmployeeRatingSummary]:
+        """Up-to-date summaries of a period by employee id (every rated employee when employee_ids is None)"""
+        self.refresh(db, organization_id, period_start, period_end)
+        query = db.query(EmployeeRatingSummary).filter(
+            EmployeeRatingSummary.organization_id == organization_id,
+            EmployeeRatingSummary.period == period_key(period_start, period_end)
+        )
+        if employee_ids is not None:
+            query = query.filter(EmployeeRatingSummary.employee_id.in_(employee_ids))
+        return {summary.employee_id: summary for summary in query.all()}
+    
+    def fill_performance_ratings(
+        self,
+        db: Session,
+        organization_id: Optional[str],
+        profiles: List[Dict[str, Any]],
+        period_start: Optional[date] = None,
+        period_end: Optional[date] = None
+    ) -> int:
+        """
+        Set performance_rating on profiles that carry an employee_id but no rating
+        
+        Profiles are updated in place, so cohorts and decisions built from
+        them are compared on the aggregated score.
+        
+        Returns:
+            Number of profiles filled
+        """
+        missing = {
+            profile["employee_id"] for profile in profiles
+            if profile.get("employee_id") and profile.get("performance_rating") is None
+        }
+        if not missing:
+            return 0
+        
+        summaries = self.ratings(db, organization_id, list(missing), period_start, period_end)
+        filled = 0
+        for profile in profiles:
+            summary = summaries.get(profile.get("employee_id"))
+            if summary is not None and summary.performance_rating is not None and profile.get("performance_rating") is None:
+                profile["performance_rating"] = summary.performance_rating
+                filled += 1
+        return filled
+    
+    def _summarize(self, sources: List[List[tuple]], organization_id: Optional[str], key: str) -> List[Dict[str, Any]]:
+        """Weight the grouped (employee, project) averages into per-employee rows"""
+        rows = [row for source in sources for row in source]
+        if not rows:
+            return []
+        
+        employee_ids, employee = np.unique(np.array([row[0] for row in rows], dtype=object), return_inverse=True)
+        project_ids, project = np.unique(np.array([row[1] for row in rows], dtype=object), return_inverse=True)
+        pairs, pair = np.unique(employee * len(project_ids) + project, return_inverse=True)
+        pair_employee = pairs // len(project_ids)
+        project_weight = np.zeros(len(pairs))
+        project_weight[pair] = [row[2] or 0 for row in rows]
+        
+        # Source-weighted blend per (employee, project) and dimension, NaN where nothing is scored
+        weighted = np.zeros((len(pairs), len(DIMENSIONS)))
+        weight = np.zeros((len(pairs), len(DIMENSIONS)))
+        offset = 0
+        for source_weight, source in zip(SOURCE_WEIGHTS, sources):
+            positions = pair[offset:offset + len(source)]
+            offset += len(source)
+            values = np.array([row[3] for row in source], dtype=float).reshape(len(source), len(DIMENSIONS))
+            scored = ~np.isnan(values)
+            # KPIs come one row per category, each scoring a different dimension of the pair
+            np.add.at(weighted, positions, np.where(scored, values, 0.0) * source_weight)
+            np.add.at(weight, positions, scored * source_weight)
+        blended = np.divide(weighted, weight, out=np.full(weighted.shape, np.nan), where=weight > 0)
+        
+        # Mean over projects weighted by project weightage
+        scored = ~np.isnan(blended)
+        totals = np.zeros((len(employee_ids), len(DIMENSIONS)))
+        weights = np.zeros((len(employee_ids), len(DIMENSIONS)))
+        np.add.at(totals, pair_employee, np.where(scored, blended, 0.0) * project_weight[:, None])
+        np.add.at(weights, pair_employee, scored * project_weight[:, None])
+        scores = np.divide(totals, weights, out=np.full(totals.shape, np.nan), where=weights > 0)
+        scored_dimensions = (~np.isnan(scores)).sum(axis=1)
+        performance = np.divide(
+            np.nansum(scores, axis=1), scored_dimensions,
+            out=np.full(len(employee_ids), np.nan), where=scored_dimensions > 0
+        )
+        
+        project_count = np.bincount(pair_employee, minlength=len(employee_ids))
+        rating_count = np.bincount(employee, weights=[row[4] for row in rows], minlength=len(employee_ids))
+        ratings_through: List[Optional[datetime]] = [None] * len(employee_ids)
+        for position, row in zip(employee.tolist(), rows):
+            if row[5] is not None and (ratings_through[position] is None or row[5] > ratings_through[position]):
+                ratings_through[position] = row[5]
+        
+        now = datetime.utcnow()
+        scores = np.where(np.isnan(scores), None, scores.round(4)).tolist()
+        performance = np.where(np.isnan(performance), None, performance.round(4)).tolist()
+        return [
+            {
+                "employee_id": employee_id,
+                "period": key,
+                "organization_id": organization_id,
+                **{f"{dimension}_score": scores[i][d] for d, dimension in enumerate(DIMENSIONS)},
+                "performance_rating": performance[i],
+                "project_count": int(project_count[i]),
+                "rating_count": int(rating_count[i]),
+                "ratings_through": ratings_through[i],
+                "computed_at": now
+            }
+            for i, employee_id in enumerate(employee_ids.tolist())
+        ]
+    
+    def _changed_employees(self, filters: list, since: datetime):
+        """Subquery of employees with a rating or KPI created after since"""
+        return union(*[
+            select(model.employee_id).join(Project, Project.id == model.project_id).where(
+                *filters, model.created_at > since
+            )
+            for model in [ManagerRating, PeerRating, Kpi]
+        ])
+    
+    def _latest_rating(self, db: Session, filters: list) -> Optional[datetime]:
+        """Creation time of the newest rating or KPI in scope"""
+        latest = [
+            db.query(func.max(model.created_at)).join(Project, Project.id == model.project_id).filter(*filters).scalar()
+            for model in [ManagerRating, PeerRating, Kpi]
+        ]
+        latest = [value for value in latest if value is not None]
+        return max(latest) if latest else None
@@ -0,0 +1,257 @@
+import hashlib
+import json
+from sqlalchemy.orm import Session, defer
+from typing import List, Optional, Tuple
+
+from app.core.response_cache import response_cache
+from app.models.audit_log import AuditLog
+from app.models.bias_analysis import BiasAnalysis, Explanation
+from app.models.decision import Decision, DecisionCohortMember, DecisionStatus
+from app.services.bias_detection import BiasDetectionService
+from app.services.cohort_selection import CohortSelectionService
+from app.services.cohort_store import ColumnarCohort, Cohort
+from app.services.scoring_policy import ScoringPolicyService
+
+# Ids per IN (...) update, below SQLite's bound parameter limit
+MARK_BATCH = 500
+
+
+class ReanalysisResult:
+    """Outcome of a re-analysis run"""
+    def __init__(self):
+        self.checked = 0
+        self.recomputed = 0
+
+
+class ReanalysisService:
+    """
+    Keeps stored bias analyses in step with their inputs
+    
+    Each analysis records a hash of the decision's employee_data, its cohort
+    and the analysis parameters. An analysis is recomputed only when it was
+    marked stale or its hash no longer matches, so input changes refresh the
+    affected decisions without a global recompute. When only the scoring
+    policy changed, the stored metrics are re-scored instead.
+    """
+    
+    def __init__(
+        self,
+        bias: BiasDetectionService,
+        cohort: CohortSelectionService,
+        policies: ScoringPolicyService
+    ):
+        self.bias = bias
+        self.cohort = cohort
+        self.policies = policies
+    
+    def input_hash(self, decision: Decision, cohort: Cohort) -> str:
+        """Content hash of everything an analysis of the decision depends on"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            "decision_type": decision.decision_type.value,
+            "employee_data": decision.employee_data,
+            "parameters": self.bias.parameters()
+        }, sort_keys=True, default=str).encode())
+        digest.update(ColumnarCohort.wrap(cohort).fingerprint().encode())
+        return digest.hexdigest()
+    
+    def is_outdated(self, db: Session, decision: Decision, analysis: BiasAnalysis) -> bool:
+        """Whether analyze would recompute the analysis: marked stale, or its inputs changed"""
+        if analysis.stale:
+            return True
+        return analysis.input_hash != self.input_hash(decision, self.cohort.resolve_cohort(db, decision))
+    
+    def analyze(
+        self,
+        db: Session,
+        decision: Decision,
+        analysis: Optional[BiasAnalysis] = None
+    ) -> Tuple[BiasAnalysis, bool]:
+        """
+        Return an up-to-date analysis for a decision (caller commits)
+        
+        Args:
+            db: Database session
+            decision: The decision to analyze
+            analysis: Its stored analysis, looked up when not given
+        
+        Returns:
+            The analysis and whether it was recomputed
+        """
+        if analysis is None:
+            analysis = db.query(BiasAnalysis).filter(BiasAnalysis.decision_id == decision.id).first()
+        
+        policy = self.policies.resolve(db, decision.organization_id, decision.decision_type.value)
+        rules = self.policies.rules_for(policy)
+        policy_id = policy.id if policy is not None else None
+        
+        comparable_cohort = self.cohort.resolve_cohort(db, decision)
+        input_hash = self.input_hash(decision, comparable_cohort)
+        if analysis is not None and not analysis.stale and analysis.input_hash == input_hash:
+            if analysis.scoring_policy_id == policy_id:
+                return analysis, False
+            # Only the policy changed: re-score the stored metrics
+            result = self.bias.rescore(analysis.fairness_metrics, analysis.comparable_outcomes, rules)
+        else:
+            result = self.bias.analyze_bias(
+                decision.employee_data,
+                comparable_cohort,
+                decision.decision_type.value,
+                rules
+            )
+        
+        if analysis is None:
+            analysis = BiasAnalysis(decision_id=decision.id)
+            db.add(analysis)
+        else:
+            # The explanation described the previous result
+            db.query(Explanation).filter(Explanation.decision_id == decision.id).delete(synchronize_session=False)
+        
+        analysis.risk_score = result.risk_score
+        analysis.risk_level = result.risk_level
+        analysis.detected_patterns = result.detected_patterns
+        analysis.fairness_metrics = result.fairness_metrics
+        analysis.comparable_outcomes = result.comparable_outcomes
+        analysis.input_hash = input_hash
+        analysis.stale = False
+        analysis.scoring_policy_id = policy_id
+        self.policies.save_features(db, decision, result.fairness_metrics)
+        
+        if decision.status == DecisionStatus.PENDING:
+            decision.status = DecisionStatus.ANALYZED
+        
+        return analysis, True
+    
+    def mark_stale(
+        self,
+        db: Session,
+        decision_ids: List[str],
+        include_dependents: bool = True
+    ) -> int:
+        """
+        Flag the analyses of changed decisions for re-analysis (caller commits)
+        
+        With include_dependents, decisions whose server-selected cohort
+        references a changed decision are flagged too, and their stored
+        cohort copies are dropped so the next analysis reads the new data.
+        
+        Returns:
+            Number of analyses marked stale
+        """
+        changed = list(dict.fromkeys(decision_ids))
+        affected = changed
+        
+        if include_dependents:
+            dependents = []
+            for start in range(0, len(changed), MARK_BATCH):
+                batch = changed[start:start + MARK_BATCH]
+                dependents.extend(row[0] for row in db.query(DecisionCohortMember.decision_id).filter(
+                    DecisionCohortMember.member_decision_id.in_(batch)
+                ).distinct())
+            for dependent_id in dict.fromkeys(dependents):
+                self.cohort.store.delete(dependent_id)
+            affected = list(dict.fromkeys(affected + dependents))
+        
+        marked = 0
+        for start in range(0, len(affected), MARK_BATCH):
+            batch = affected[start:start + MARK_BATCH]
+            marked += db.query(BiasAnalysis).filter(
+                BiasAnalysis.decision_id.in_(batch),
+                BiasAnalysis.stale.isnot(True)
+            ).update({BiasAnalysis.stale: True}, synchronize_session=False)
+        return marked
+    
+    def run(
+        self,
+        db: Session,
+        organization_id: Optional[str] = None,
+        all_organizations: bool = False,
+        batch_size: int = 200,
+        verify: bool = False
+    ) -> ReanalysisResult:
+        """
+        Recompute stale analyses in batches
+        
+        Cached API responses of each organization with recomputed analyses
+        are invalidated after every batch commit. From a separate process
+        (the CLI job) that only reaches API workers when
+        RESPONSE_CACHE_BACKEND is "disk" or "shared"; the per-process
+        "memory" backend keeps serving the old results until the next write
+        through the API.
+        
+        Args:
+            db: Database session
+            organization_id: Organization to process (ignored with all_organizations)
+            all_organizations: Process every organization
+            batch_size: Analyses per commit
+            verify: Also check the input hash of analyses not marked stale,
+                catching changes made outside the API
+        
+        Returns:
+            ReanalysisResult with checked and recomputed counts
+        """
+        query = db.query(BiasAnalysis).join(Decision, Decision.id == BiasAnalysis.decision_id)
+        if not verify:
+            query = query.filter(BiasAnalysis.stale.is_(True))
+        if not all_organizations:
+            query = query.filter(Decision.organization_id == organization_id)
+        
+        result = ReanalysisResult()
+        last_id = None
+        while True:
+            # Keyset on id: recomputed rows leave the stale set without shifting pages
+            page = query if last_id is None else query.filter(BiasAnalysis.id > last_id)
+            batch = page.order_by(BiasAnalysis.id).limit(batch_size).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+            
+            decisions = {
+                decision.id: decision
+                for decision in db.query(Decision).options(
+                    defer(Decision.comparable_cohort)
+                ).filter(Decision.id.in_([analysis.decision_id for analysis in batch]))
+            }
+            changed_organizations = set()
+            for analysis in batch:
+                decision = decisions[analysis.decision_id]
+                _, recomputed = self.analyze(db, decision, analysis)
+                result.checked += 1
+                if recomputed:
+                    result.recomputed += 1
+                    changed_organizations.add(decision.organization_id)
+                    db.add(AuditLog(
+                        decision_id=decision.id,
+                        action="bias_reanalyzed",
+                        details={"risk_level": analysis.risk_level, "risk_score": analysis.risk_score}
+                    ))
+            db.commit()
+            for changed_organization in changed_organizations:
+                response_cache.invalidate(changed_organization)
+        
+        return result
+
+
+if __name__ == "__main__":
+    # Periodic job entry point: refresh stale analyses of every organization
+    import argparse
+    from app.core.database import SessionLocal
+    from app.core.response_cache import MemoryBackend
+    
+    parser = argparse.ArgumentParser(description="Recompute stale bias analyses")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--verify", action="store_true", help="also recheck input hashes of fresh analyses")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        bias = BiasDetectionService()
+        service = ReanalysisService(bias, CohortSelectionService(), ScoringPolicyService(bias))
+        result = service.run(db, all_organizations=True, batch_size=args.batch_size, verify=args.verify)
+        print(f"Checked {result.checked} analyses, recomputed {result.recomputed}")
+        if result.recomputed and isinstance(response_cache.backend, MemoryBackend):
+            print('RESPONSE_CACHE_BACKEND is "memory": running API workers serve cached results until their next write')
+        # Analyses stored before scoring inputs were packed, so what-if runs need not pack them
+        print(f"Packed scoring inputs of {service.policies.ensure_features(db)} analyses")
+    finally:
+        db.close()
@@ -0,0 +1,429 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional
+
+from app.models.bias_analysis import BiasAnalysis, AnalysisScoreFeatures, Explanation
+from app.models.decision import Decision, DecisionType
+from app.models.scoring_policy import ScoringPolicy
+from app.models.user import User
+from app.services.bias_detection import BiasDetectionService
+from app.services.scoring_rules import (
+    ScoringRules,
+    CompiledRules,
+    MetricFeatures,
+    RISK_LEVELS,
+    expand_grid,
+    pack_features
+)
+
+# Upper bound on settings x analyses scored in one broadcast step
+SIMULATION_CELLS = 4_000_000
+
+# (organization, decision type) feature arrays kept in memory for what-if runs
+FEATURE_CACHE_ENTRIES = 8
+
+# Rows updated this long before a cached load are fetched again on refresh
+FEATURE_REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+class ScoringPolicyService:
+    """
+    Versioned scoring policies per organization and decision type
+    
+    A policy for one decision type wins over the organization-wide policy
+    (decision_type NULL), which wins over the built-in defaults. Policy rows
+    are never edited; a change is a new version, so analyses can record the
+    exact policy they were scored under.
+    """
+    
+    def __init__(self, bias: BiasDetectionService, batch_size: int = 5000):
+        self.bias = bias
+        self.batch_size = batch_size
+        self._rules: Dict[str, ScoringRules] = {}
+        self._features: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def resolve(self, db: Session, organization_id: Optional[str], decision_type: str) -> Optional[ScoringPolicy]:
+        """Active policy governing a decision type, None for the defaults"""
+        policies = db.query(ScoringPolicy).filter(
+            ScoringPolicy.organization_id == organization_id,
+            ScoringPolicy.is_active.is_(True),
+            or_(ScoringPolicy.decision_type == decision_type, ScoringPolicy.decision_type.is_(None))
+        ).all()
+        for policy in policies:
+            if policy.decision_type == decision_type:
+                return policy
+        return policies[0] if policies else None
+    
+    def rules_for(self, policy: Optional[ScoringPolicy]) -> ScoringRules:
+        """Validated rules of a policy, cached by id since versions never change"""
+        if policy is None:
+            return self.bias.rules
+        with self._lock:
+            rules = self._rules.get(policy.id)
+            if rules is None:
+                rules = self._rules[policy.id] = ScoringRules(policy.rules)
+            return rules
+    
+    def create_version(
+        self,
+        db: Session,
+        user: User,
+        rules: Dict[str, Any],
+        decision_type: Optional[str] = None,
+        description: Optional[str] = None,
+        activate: bool = True
+    ) -> ScoringPolicy:
+        """
+        Store a new policy version for the user's organization (caller commits)
+        
+        Raises:
+            ValueError: If the rules are not valid
+        """
+        validated = ScoringRules(rules)
+        latest = db.query(func.max(ScoringPolicy.version)).filter(
+            ScoringPolicy.organization_id == user.organization_id,
+            self._scope_filter(decision_type)
+        ).scalar()
+        
+        policy = ScoringPolicy(
+            organization_id=user.organization_id,
+            decision_type=decision_type,
+            version=(latest or 0) + 1,
+            rules=validated.to_dict(),
+            description=description,
+            created_by=user.id
+        )
+        db.add(policy)
+        if activate:
+            self.activate(db, policy)
+        return policy
+    
+    def activate(self, db: Session, policy: ScoringPolicy):
+        """Make a version the active one of its scope (caller commits)"""
+        db.query(ScoringPolicy).filter(
+            ScoringPolicy.organization_id == policy.organization_id,
+            self._scope_filter(policy.decision_type),
+            ScoringPolicy.is_active.is_(True)
+        ).update({ScoringPolicy.is_active: False}, synchronize_session="fetch")
+        policy.is_active = True
+    
+    def preview(self, db: Session, policy: ScoringPolicy) -> Dict[str, Any]:
+        """
+        Score the policy's stored analyses with the vectorized evaluator
+        
+        Nothing is written. The result compares the policy's risk
+        distribution with the stored one.
+        """
+        self.ensure_features(db)
+        evaluator = self.rules_for(policy).compile()
+        current = np.zeros(len(RISK_LEVELS), dtype=np.int64)
+        proposed = np.zeros(len(RISK_LEVELS), dtype=np.int64)
+        level_changes = 0
+        score_total = 0.0
+        
+        query = self._policy_query(db, policy, AnalysisScoreFeatures.features, BiasAnalysis.risk_level).join(
+            AnalysisScoreFeatures, AnalysisScoreFeatures.decision_id == BiasAnalysis.decision_id
+        )
+        for batch in self._batches(query):
+            features = MetricFeatures.from_packed([row[1] for row in batch])
+            result = evaluator.evaluate(features)
+            levels = result["risk_level"][0]
+            stored = np.array([RISK_LEVELS.index(row[2]) if row[2] in RISK_LEVELS else -1 for row in batch])
+            current += np.bincount(stored[stored >= 0], minlength=len(RISK_LEVELS))
+            proposed += np.bincount(levels, minlength=len(RISK_LEVELS))
+            level_changes += int((stored != levels).sum())
+            score_total += float(result["risk_score"].sum())
+        
+        analyses = int(proposed.sum())
+        return {
+            "analyses": analyses,
+            "current_distribution": dict(zip(RISK_LEVELS, current.tolist())),
+            "risk_distribution": dict(zip(RISK_LEVELS, proposed.tolist())),
+            "level_changes": level_changes,
+            "mean_risk_score": score_total / analyses if analyses else None
+        }
+    
+    def apply(self, db: Session, policy: ScoringPolicy) -> Dict[str, int]:
+        """
+        Re-score the policy's stored analyses and record the policy on them
+        
+        Works from stored fairness_metrics, so no cohort is loaded.
+        Explanations of analyses whose score changed are dropped, since they
+        describe the old result. Commits per batch.
+        """
+        rules = self.rules_for(policy)
+        rescored = changed = 0
+        columns = (BiasAnalysis.decision_id, BiasAnalysis.fairness_metrics,
+                   BiasAnalysis.comparable_outcomes, BiasAnalysis.risk_score)
+        
+        for batch in self._batches(self._policy_query(db, policy, *columns)):
+            updates, outdated = [], []
+            for analysis_id, decision_id, fairness_metrics, comparable_outcomes, risk_score in batch:
+                result = self.bias.rescore(fairness_metrics or {}, comparable_outcomes, rules)
+                updates.append({
+                    "id": analysis_id,
+                    "risk_score": result.risk_score,
+                    "risk_level": result.risk_level,
+                    "detected_patterns": result.detected_patterns,
+                    "fairness_metrics": result.fairness_metrics,
+                    "scoring_policy_id": policy.id
+                })
+                if result.risk_score != risk_score:
+                    outdated.append(decision_id)
+            db.execute(update(BiasAnalysis), updates)
+            if outdated:
+                db.query(Explanation).filter(
+                    Explanation.decision_id.in_(outdated)
+                ).delete(synchronize_session=False)
+            db.commit()
+            rescored += len(updates)
+            changed += len(outdated)
+        
+        return {"rescored": rescored, "changed": changed}
+    
+    def simulate(
+        self,
+        db: Session,
+        organization_id: Optional[str],
+        base_rules: ScoringRules,
+        grid: Dict[str, List[Any]],
+        decision_type: Optional[str] = None,
+        bins: int = 20,
+        max_settings: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        What-if risk distributions of stored analyses over a grid of rules
+        
+        Every grid combination is applied over base_rules and all of them
+        are scored in one broadcast pass over the packed scoring inputs, so
+        no analysis or cohort is recomputed.
+        
+        Args:
+            db: Database session
+            organization_id: Organization whose analyses are scored
+            base_rules: Rules the grid values override
+            grid: Candidate values per rule, keyed "section.key"
+            decision_type: Only score analyses of this decision type
+            bins: Risk score histogram bins over [0, 1]
+            max_settings: Largest allowed number of grid combinations
+        
+        Returns:
+            Dict with the baseline summary and one summary per setting
+        
+        Raises:
+            ValueError: If the grid is not valid
+        """
+        settings, rule_sets = expand_grid(base_rules, grid, max_settings)
+        evaluator = CompiledRules([base_rules] + rule_sets)
+        
+        features = self.load_features(db, organization_id, decision_type)
+        analyses = len(features)
+        
+        levels = np.zeros((len(evaluator), len(RISK_LEVELS)), dtype=np.int64)
+        histograms = np.zeros((len(evaluator), bins), dtype=np.int64)
+        score_totals = np.zeros(len(evaluator))
+        step = max(1, SIMULATION_CELLS // max(analyses, 1))
+        for start in range(0, len(evaluator), step):
+            stop = min(start + step, len(evaluator))
+            result = evaluator.evaluate(features, start, stop)
+            for level in range(len(RISK_LEVELS)):
+                levels[start:stop, level] = (result["risk_level"] == level).sum(axis=1)
+            # One bincount over all rows of the chunk, offset per setting
+            bin_index = np.minimum((result["risk_score"] * bins).astype(np.int64), bins - 1)
+            bin_index += np.arange(stop - start)[:, None] * bins
+            histograms[start:stop] = np.bincount(bin_index.ravel(), minlength=(stop - start) * bins).reshape(-1, bins)
+            score_totals[start:stop] = result["risk_score"].sum(axis=1)
+        
+        def summary(i: int) -> Dict[str, Any]:
+            at_or_above = np.cumsum(histograms[i][::-1])[::-1]
+            return {
+                "risk_distribution": dict(zip(RISK_LEVELS, levels[i].tolist())),
+                "high_risk_share": float(levels[i][-1] / analyses) if analyses else None,
+                "mean_risk_score": float(score_totals[i] / analyses) if analyses else None,
+                "score_histogram": histograms[i].tolist(),
+                "share_at_or_above": (at_or_above / analyses).tolist() if analyses else None
+            }
+        
+        return {
+            "analyses": analyses,
+            "bin_edges": np.linspace(0.0, 1.0, bins + 1).tolist(),
+            "baseline": summary(0),
+            "settings": [{"rules": setting, **summary(i + 1)} for i, setting in enumerate(settings)]
+        }
+    
+    def save_features(self, db: Session, decision: Decision, fairness_metrics: Dict[str, Any]):
+        """Store the packed scoring inputs of a decision's analysis (caller commits)"""
+        db.merge(AnalysisScoreFeatures(
+            decision_id=decision.id,
+            organization_id=decision.organization_id,
+            decision_type=decision.decision_type.value,
+            features=pack_features(fairness_metrics),
+            updated_at=datetime.utcnow()
+        ))
+    
+    def load_features(
+        self,
+        db: Session,
+        organization_id: Optional[str],
+        decision_type: Optional[str] = None
+    ) -> MetricFeatures:
+        """
+        Packed scoring inputs of an organization's analyses
+        
+        Arrays are cached per organization and decision type. A row count and
+        the latest update time, read from the scope index, detect changes made
+        by any process; only rows updated since the arrays were loaded are
+        fetched again, unless rows were removed.
+        """
+        self.ensure_features(db)
+        key = (organization_id, decision_type)
+        count, updated_at = self._features_token(db, organization_id, decision_type)
+        with self._lock:
+            cached = self._features.get(key)
+            if cached is not None:
+                self._features.move_to_end(key)
+        if cached is not None and cached[0] == (count, updated_at):
+            return cached[1]
+        
+        query = select(AnalysisScoreFeatures.decision_id, AnalysisScoreFeatures.features).where(
+            AnalysisScoreFeatures.organization_id == organization_id
+        )
+        if decision_type is not None:
+            query = query.where(AnalysisScoreFeatures.decision_type == decision_type)
+        
+        features = positions = None
+        if cached is not None and cached[0][1] is not None:
+            # Overlap the previous load so writes committed slightly out of
+            # timestamp order are not missed; re-applying a row is harmless
+            since = cached[0][1] - FEATURE_REFRESH_OVERLAP
+            changed = db.execute(query.where(AnalysisScoreFeatures.updated_at >= since)).all()
+            features, positions = self._merge_features(cached[1], cached[2], changed)
+            if len(features) != count:
+                features = None  # Rows were removed: reload everything
+        if features is None:
+            rows = db.execute(query).all()
+            features = MetricFeatures.from_packed([row[1] for row in rows])
+            positions = {row[0]: i for i, row in enumerate(rows)}
+        
+        with self._lock:
+            self._features[key] = ((count, updated_at), features, positions)
+            self._features.move_to_end(key)
+            while len(self._features) > FEATURE_CACHE_ENTRIES:
+                self._features.popitem(last=False)
+        return features
+    
+    def _merge_features(
+        self,
+        features: MetricFeatures,
+        positions: Dict[str, int],
+        rows: List[tuple]
+    ) -> tuple:
+        """Copy of cached features with (decision_id, packed) rows replaced or appended"""
+        positions = dict(positions)
+        updated = {}
+        for decision_id, packed in rows:
+            if decision_id not in positions:
+                positions[decision_id] = len(positions)
+            updated[positions[decision_id]] = packed
+        
+        # Arrays handed out earlier may still be in use, so never write in place
+        records = np.empty(len(positions), dtype=features.records.dtype)
+        records[:len(features)] = features.records
+        if updated:
+            index = np.fromiter(updated.keys(), dtype=np.int64, count=len(updated))
+            records[index] = MetricFeatures.from_packed(list(updated.values())).records
+        return MetricFeatures(records), positions
+    
+    def ensure_features(self, db: Session) -> int:
+        """
+        Pack scoring inputs for analyses stored without them (commits per batch)
+        
+        Comparing two primary key counts is enough to skip the search once
+        every analysis has its features, which is the steady state.
+        """
+        analyses = db.query(func.count(BiasAnalysis.id)).scalar()
+        if db.query(func.count(AnalysisScoreFeatures.decision_id)).scalar() >= analyses:
+            return 0
+        
+        query = db.query(
+            BiasAnalysis.id,
+            BiasAnalysis.decision_id,
+            Decision.organization_id,
+            Decision.decision_type,
+            BiasAnalysis.fairness_metrics
+        ).join(
+            Decision, Decision.id == BiasAnalysis.decision_id
+        ).outerjoin(
+            AnalysisScoreFeatures, AnalysisScoreFeatures.decision_id == BiasAnalysis.decision_id
+        ).filter(
+            AnalysisScoreFeatures.decision_id.is_(None)
+        )
+        
+        packed = 0
+        for batch in self._batches(query):
+            now = datetime.utcnow()
+            db.execute(insert(AnalysisScoreFeatures), [
+                {
+                    "decision_id": decision_id,
+                    "organization_id": organization_id,
+                    "decision_type": decision_type.value,
+                    "features": pack_features(fairness_metrics),
+                    "updated_at": now
+                }
+                for _, decision_id, organization_id, decision_type, fairness_metrics in batch
+            ])
+            db.commit()
+            packed += len(batch)
+        return packed
+    
+    def _features_token(self, db: Session, organization_id: Optional[str], decision_type: Optional[str]) -> tuple:
+        query = db.query(func.count(), func.max(AnalysisScoreFeatures.updated_at)).filter(
+            AnalysisScoreFeatures.organization_id == organization_id
+        )
+        if decision_type is not None:
+            query = query.filter(AnalysisScoreFeatures.decision_type == decision_type)
+        return tuple(query.one())
+    
+    def _analyses_query(self, db: Session, organization_id: Optional[str], decision_type: Optional[str], *columns):
+        """(id, *columns) of an organization's analyses, optionally of one decision type"""
+        query = db.query(BiasAnalysis.id, *columns).join(
+            Decision, Decision.id == BiasAnalysis.decision_id
+        ).filter(Decision.organization_id == organization_id)
+        if decision_type is not None:
+            query = query.filter(Decision.decision_type == DecisionType(decision_type))
+        return query
+    
+    def _policy_query(self, db: Session, policy: ScoringPolicy, *columns):
+        """(id, *columns) of the analyses a policy governs"""
+        query = self._analyses_query(db, policy.organization_id, policy.decision_type, *columns)
+        if policy.decision_type is None:
+            # Types with their own active policy are not governed by the org-wide one
+            overridden = [row[0] for row in db.query(ScoringPolicy.decision_type).filter(
+                ScoringPolicy.organization_id == policy.organization_id,
+                ScoringPolicy.decision_type.isnot(None),
+                ScoringPolicy.is_active.is_(True)
+            )]
+            if overridden:
+                query = query.filter(Decision.decision_type.notin_([DecisionType(t) for t in overridden]))
+        return query
+    
+    def _batches(self, query):
+        """Keyset pages of a query whose first column is BiasAnalysis.id"""
+        last_id = None
+        while True:
+            page = query if last_id is None else query.filter(BiasAnalysis.id > last_id)
+            batch = page.order_by(BiasAnalysis.id).limit(self.batch_size).all()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            yield batch
+    
+    def _scope_filter(self, decision_type: Optional[str]):
+        if decision_type is None:
+            return ScoringPolicy.decision_type.is_(None)
+        return ScoringPolicy.decision_type == decision_type
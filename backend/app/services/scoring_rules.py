@@ -0,0 +1,326 @@
+import copy
+import itertools
+import math
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+# Scoring policy used when an organization has not defined its own
+DEFAULT_RULES = {
+    "z_score": {
+        "moderate": 2.0,  # |z| above this is an outcome deviation
+        "high": 3.0,  # ... and a high-severity one from here
+        "normalizer": 3.0  # |z| at which the z-score component saturates
+    },
+    "outlier": {
+        "min_cohort_size": 10,
+        "std_multiple": 3.0
+    },
+    "parity": {
+        "min_ratio": 0.8,  # 80% rule
+        "require_significance": True,
+        "severity": "moderate"
+    },
+    "pattern_weights": {
+        "high": 0.3,
+        "moderate": 0.15,
+        "low": 0.05
+    },
+    "composite_weights": {
+        "z_score": 0.4,
+        "patterns": 0.4,
+        "disparity": 0.2
+    },
+    "risk_levels": {
+        "moderate": 0.3,  # Lowest score rated moderate
+        "high": 0.6  # Lowest score rated high
+    }
+}
+
+SEVERITIES = ["low", "moderate", "high"]
+RISK_LEVELS = ["low", "moderate", "high"]
+
+
+class ScoringRules:
+    """
+    Validated bias scoring policy
+    
+    Rules are a two-level dict shaped like DEFAULT_RULES; any value left
+    out keeps its default. The scalar helpers score a single analysis and
+    compile() returns a vectorized evaluator that gives identical results
+    over many stored analyses at once.
+    
+    Raises:
+        ValueError: If a section, key or value is not valid
+    """
+    
+    def __init__(self, rules: Optional[Dict[str, Any]] = None):
+        merged = copy.deepcopy(DEFAULT_RULES)
+        for section, values in (rules or {}).items():
+            if section not in DEFAULT_RULES:
+                raise ValueError(f"Unknown rule section: {section}")
+            if not isinstance(values, dict):
+                raise ValueError(f"Rule section {section} must be an object")
+            for key, value in values.items():
+                if key not in DEFAULT_RULES[section]:
+                    raise ValueError(f"Unknown rule: {section}.{key}")
+                merged[section][key] = self._coerce(section, key, value)
+        self._rules = merged
+        
+        self.z_moderate = merged["z_score"]["moderate"]
+        self.z_high = merged["z_score"]["high"]
+        self.z_normalizer = merged["z_score"]["normalizer"]
+        self.outlier_min_cohort = merged["outlier"]["min_cohort_size"]
+        self.outlier_std_multiple = merged["outlier"]["std_multiple"]
+        self.parity_min_ratio = merged["parity"]["min_ratio"]
+        self.parity_require_significance = merged["parity"]["require_significance"]
+        self.parity_severity = merged["parity"]["severity"]
+        self.pattern_weights = merged["pattern_weights"]
+        self.composite_weights = merged["composite_weights"]
+        self.risk_moderate = merged["risk_levels"]["moderate"]
+        self.risk_high = merged["risk_levels"]["high"]
+        
+        if self.z_high < self.z_moderate:
+            raise ValueError("z_score.high must not be below z_score.moderate")
+        if self.risk_high < self.risk_moderate:
+            raise ValueError("risk_levels.high must not be below risk_levels.moderate")
+        if not 0 < self.parity_min_ratio <= 1:
+            raise ValueError("parity.min_ratio must be in (0, 1]")
+        if self.z_normalizer <= 0:
+            raise ValueError("z_score.normalizer must be positive")
+    
+    def _coerce(self, section: str, key: str, value: Any) -> Any:
+        default = DEFAULT_RULES[section][key]
+        if isinstance(default, bool):
+            if not isinstance(value, bool):
+                raise ValueError(f"{section}.{key} must be a boolean")
+            return value
+        if isinstance(default, str):
+            if value not in SEVERITIES:
+                raise ValueError(f"{section}.{key} must be one of {SEVERITIES}")
+            return value
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value) or value < 0:
+            raise ValueError(f"{section}.{key} must be a non-negative number")
+        return type(default)(value)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return copy.deepcopy(self._rules)
+    
+    def z_severity(self, z_score: float) -> Optional[str]:
+        """Severity of an outcome deviation, None below the threshold"""
+        if abs(z_score) > self.z_moderate:
+            return "moderate" if abs(z_score) < self.z_high else "high"
+        return None
+    
+    def parity_flagged(self, rate_ratio: float, significant: bool) -> bool:
+        """Whether a group selection-rate ratio breaks the parity rule"""
+        return rate_ratio < self.parity_min_ratio and (significant or not self.parity_require_significance)
+    
+    def risk_score(self, z_score: float, severities: List[str], disparity: bool) -> float:
+        """Composite risk score (0-1)"""
+        risk_components = []
+        
+        z_risk = min(abs(z_score) / self.z_normalizer, 1.0)
+        risk_components.append(z_risk * self.composite_weights["z_score"])
+        
+        pattern_risk = 0
+        for severity in severities:
+            pattern_risk += self.pattern_weights.get(severity, self.pattern_weights["low"])
+        pattern_risk = min(pattern_risk, 1.0)
+        risk_components.append(pattern_risk * self.composite_weights["patterns"])
+        
+        if disparity:
+            risk_components.append(self.composite_weights["disparity"])
+        
+        return min(sum(risk_components), 1.0)
+    
+    def risk_level(self, risk_score: float) -> str:
+        if risk_score < self.risk_moderate:
+            return "low"
+        elif risk_score < self.risk_high:
+            return "moderate"
+        else:
+            return "high"
+    
+    def compile(self) -> "CompiledRules":
+        return CompiledRules([self])
+
+
+# Per-analysis scoring inputs, packed as little-endian doubles in AnalysisScoreFeatures
+FEATURE_FIELDS = [
+    "z_score",
+    "cohort_size",
+    "decision_value",  # NaN when the decision has no numeric outcome
+    "cohort_mean",
+    "cohort_std",
+    "min_parity_ratio",  # Lowest group rate ratio over every tested attribute and intersection
+    "min_significant_parity_ratio"  # ... over attributes with a significant gap
+]
+FEATURE_DTYPE = np.dtype([(name, "<f8") for name in FEATURE_FIELDS])
+
+
+def extract_features(metrics: Optional[Dict[str, Any]]) -> np.void:
+    """Scoring inputs of one stored fairness_metrics dict"""
+    # Defaults mirror the .get() fallbacks of the scalar scoring path
+    metrics = metrics or {}
+    demographic = metrics.get("demographic_analysis") or {}
+    significance = demographic.get("significance")
+    if significance is not None:
+        results = [*significance.values(), *(demographic.get("intersectional") or {}).values()]
+        ratios = [result["rate_ratio"] for result in results]
+        significant = [result["rate_ratio"] for result in results if result["significant"]]
+        min_ratio = min(ratios, default=np.inf)
+        min_significant = min(significant, default=np.inf)
+    else:
+        # Stored without per-attribute results: keep the recorded flag under any rule
+        min_ratio = min_significant = -np.inf if demographic.get("disparity_detected") else np.inf
+    
+    decision_value = metrics.get("decision_value")
+    return np.array((
+        metrics.get("z_score", 0),
+        metrics.get("cohort_size", 0),
+        np.nan if decision_value is None else decision_value,
+        metrics.get("cohort_mean", 0),
+        metrics.get("cohort_std", 1),
+        min_ratio,
+        min_significant
+    ), dtype=FEATURE_DTYPE)
+
+
+def pack_features(metrics: Optional[Dict[str, Any]]) -> bytes:
+    return extract_features(metrics).tobytes()
+
+
+class MetricFeatures:
+    """Columnar scoring inputs of many stored analyses, the only input scoring needs"""
+    
+    def __init__(self, records: np.ndarray):
+        self.records = records
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.records[field]
+    
+    @classmethod
+    def from_metrics(cls, metrics_list: List[Optional[Dict[str, Any]]]) -> "MetricFeatures":
+        records = np.empty(len(metrics_list), dtype=FEATURE_DTYPE)
+        for i, metrics in enumerate(metrics_list):
+            records[i] = extract_features(metrics)
+        return cls(records)
+    
+    @classmethod
+    def from_packed(cls, blobs: List[bytes]) -> "MetricFeatures":
+        return cls(np.frombuffer(b"".join(blobs), dtype=FEATURE_DTYPE))
+
+
+def expand_grid(
+    base: ScoringRules,
+    grid: Dict[str, List[Any]],
+    max_settings: int
+) -> Tuple[List[Dict[str, Any]], List[ScoringRules]]:
+    """
+    Every combination of grid values applied over a base policy
+    
+    Grid keys name a rule as "section.key", e.g. "z_score.moderate".
+    
+    Returns:
+        The grid values of each setting and its validated rules
+    
+    Raises:
+        ValueError: If a rule is unknown, a value is invalid or the grid has
+            more than max_settings combinations
+    """
+    paths = []
+    for path, values in grid.items():
+        section, _, key = path.partition(".")
+        if key not in DEFAULT_RULES.get(section, {}):
+            raise ValueError(f"Unknown rule: {path}")
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"Grid values of {path} must be a non-empty list")
+        paths.append((section, key))
+    
+    size = math.prod(len(values) for values in grid.values())
+    if size > max_settings:
+        raise ValueError(f"Grid has {size} settings, at most {max_settings} are allowed")
+    
+    settings, rule_sets = [], []
+    for combination in itertools.product(*grid.values()):
+        rules = base.to_dict()
+        for (section, key), value in zip(paths, combination):
+            rules[section][key] = value
+        rule_sets.append(ScoringRules(rules))
+        settings.append(dict(zip(grid, combination)))
+    return settings, rule_sets
+
+
+class CompiledRules:
+    """
+    Vectorized evaluator of one or more ScoringRules over many analyses
+    
+    Every rule value becomes a column vector, so a grid of S rule sets is
+    scored against N analyses by broadcasting into (S, N) arrays.
+    """
+    
+    def __init__(self, rules: List[ScoringRules]):
+        self.rules = rules
+        
+        def column(values, dtype=float):
+            return np.array(values, dtype=dtype)[:, None]
+        
+        self.z_moderate = column([r.z_moderate for r in rules])
+        self.z_high = column([r.z_high for r in rules])
+        self.z_normalizer = column([r.z_normalizer for r in rules])
+        self.outlier_min_cohort = column([r.outlier_min_cohort for r in rules])
+        self.outlier_std_multiple = column([r.outlier_std_multiple for r in rules])
+        self.parity_min_ratio = column([r.parity_min_ratio for r in rules])
+        self.parity_require_significance = column([r.parity_require_significance for r in rules], bool)
+        self.weight_high = column([r.pattern_weights["high"] for r in rules])
+        self.weight_moderate = column([r.pattern_weights["moderate"] for r in rules])
+        self.weight_parity = column([r.pattern_weights[r.parity_severity] for r in rules])
+        self.composite_z = column([r.composite_weights["z_score"] for r in rules])
+        self.composite_patterns = column([r.composite_weights["patterns"] for r in rules])
+        self.composite_disparity = column([r.composite_weights["disparity"] for r in rules])
+        self.risk_moderate = column([r.risk_moderate for r in rules])
+        self.risk_high = column([r.risk_high for r in rules])
+    
+    def __len__(self) -> int:
+        return len(self.rules)
+    
+    def evaluate(self, features: MetricFeatures, start: int = 0, stop: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Score every analysis under rule sets start:stop
+        
+        Returns:
+            Dict with (S, N) arrays "risk_score" (float), "risk_level" (index
+            into RISK_LEVELS) and "disparity" (bool)
+        """
+        p = slice(start, stop)
+        abs_z = np.abs(features["z_score"])
+        decision_value = features["decision_value"]
+        
+        min_ratio = np.where(
+            self.parity_require_significance[p],
+            features["min_significant_parity_ratio"],
+            features["min_parity_ratio"]
+        )
+        disparity = min_ratio < self.parity_min_ratio[p]
+        deviation = abs_z > self.z_moderate[p]
+        outlier = (
+            (features["cohort_size"] >= self.outlier_min_cohort[p])
+            & ~np.isnan(decision_value)
+            & (np.abs(decision_value - features["cohort_mean"]) > self.outlier_std_multiple[p] * features["cohort_std"])
+        )
+        
+        # Same summation order as the scalar path, so scores match exactly
+        pattern_risk = np.where(deviation, np.where(abs_z < self.z_high[p], self.weight_moderate[p], self.weight_high[p]), 0.0)
+        pattern_risk = pattern_risk + np.where(disparity, self.weight_parity[p], 0.0)
+        pattern_risk = pattern_risk + np.where(outlier, self.weight_high[p], 0.0)
+        
+        risk_score = np.minimum(abs_z / self.z_normalizer[p], 1.0) * self.composite_z[p]
+        risk_score = risk_score + np.minimum(pattern_risk, 1.0) * self.composite_patterns[p]
+        risk_score = np.where(disparity, risk_score + self.composite_disparity[p], risk_score)
+        risk_score = np.minimum(risk_score, 1.0)
+        
+        risk_level = (risk_score >= self.risk_moderate[p]).astype(np.int8) + (risk_score >= self.risk_high[p])
+        return {"risk_score": risk_score, "risk_level": risk_level, "disparity": disparity}
@@ -0,0 +1,154 @@
+import time
+import numpy as np
+from typing import Dict, Any, Optional
+
+
+# Below this expected cell count the chi-square approximation is unreliable
+MIN_EXPECTED_FOR_CHI_SQUARE = 5
+
+
+def _stats():
+    """scipy.stats, imported on first use to keep API startup fast"""
+    from scipy import stats
+    return stats
+
+
+def wilson_interval(
+    positive: np.ndarray,
+    count: np.ndarray,
+    confidence: float = 0.95
+) -> Dict[str, np.ndarray]:
+    """Wilson score confidence intervals for a batch of selection rates"""
+    positive = np.asarray(positive, dtype=float)
+    count = np.asarray(count, dtype=float)
+    z = _stats().norm.ppf(0.5 + confidence / 2)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(count > 0, positive / count, 0.0)
+        denom = 1 + z ** 2 / count
+        center = (rate + z ** 2 / (2 * count)) / denom
+        margin = z * np.sqrt(rate * (1 - rate) / count + z ** 2 / (4 * count ** 2)) / denom
+    
+    lower = np.where(count > 0, np.clip(center - margin, 0.0, 1.0), 0.0)
+    upper = np.where(count > 0, np.clip(center + margin, 0.0, 1.0), 1.0)
+    return {"lower": lower, "upper": upper}
+
+
+def two_by_two_tests(
+    a: np.ndarray,
+    b: np.ndarray,
+    c: np.ndarray,
+    d: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Two-sided independence tests for a batch of 2x2 tables [[a, b], [c, d]]
+    
+    Tables with any expected cell below MIN_EXPECTED_FOR_CHI_SQUARE use
+    Fisher's exact test, the rest use Pearson's chi-square test.
+    
+    Returns:
+        Dict with "p_value" (float array) and "exact" (bool array)
+    """
+    a, b, c, d = (np.asarray(x, dtype=np.int64) for x in (a, b, c, d))
+    row1, row2 = a + b, c + d
+    col1, col2 = a + c, b + d
+    n = row1 + row2
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = np.stack([
+            row1 * col1, row1 * col2, row2 * col1, row2 * col2
+        ]) / np.where(n > 0, n, 1)
+        chi2_stat = n * (a * d - b * c).astype(float) ** 2 / (
+            row1 * row2 * col1 * col2
+        ).astype(float)
+    
+    degenerate = (row1 == 0) | (row2 == 0) | (col1 == 0) | (col2 == 0)
+    exact = (expected.min(axis=0) < MIN_EXPECTED_FOR_CHI_SQUARE) & ~degenerate
+    
+    p_value = np.ones(len(a))
+    chi_idx = ~exact & ~degenerate
+    p_value[chi_idx] = _stats().chi2.sf(chi2_stat[chi_idx], 1)
+    if exact.any():
+        p_value[exact] = _fisher_exact(a[exact], row1[exact], col1[exact], n[exact])
+    
+    return {"p_value": p_value, "exact": exact}
+
+
+def _fisher_exact(
+    a: np.ndarray,
+    row1: np.ndarray,
+    col1: np.ndarray,
+    n: np.ndarray
+) -> np.ndarray:
+    """Vectorized two-sided Fisher exact p-values over the hypergeometric support"""
+    stats = _stats()
+    lo = np.maximum(0, row1 + col1 - n)
+    hi = np.minimum(row1, col1)
+    width = int((hi - lo).max()) + 1
+    
+    support = lo[:, None] + np.arange(width)[None, :]
+    in_support = support <= hi[:, None]
+    pmf = stats.hypergeom.pmf(support, n[:, None], col1[:, None], row1[:, None])
+    pmf = np.where(in_support, pmf, 0.0)
+    
+    observed = stats.hypergeom.pmf(a, n, col1, row1)
+    # Relative tolerance matches scipy.stats.fisher_exact
+    as_extreme = pmf <= observed[:, None] * (1 + 1e-7)
+    return np.minimum(np.where(as_extreme, pmf, 0.0).sum(axis=1), 1.0)
+
+
+def bootstrap_rate_ratio(
+    positive: np.ndarray,
+    count: np.ndarray,
+    segment_starts: np.ndarray,
+    iterations: int,
+    seed: int,
+    time_budget_ms: Optional[float] = None,
+    confidence: float = 0.95,
+    chunk_size: int = 256
+) -> Dict[str, Any]:
+    """
+    Parametric bootstrap of the min/max selection-rate ratio
+    
+    Groups of all attributes are stacked into one array; segment_starts marks
+    where each attribute's groups begin. Resampling runs in chunks so the
+    iteration budget and optional time budget bound the total cost.
+    
+    Returns:
+        Dict with per-segment "lower"/"upper" ratio bounds and the number of
+        "iterations" actually completed
+    """
+    positive = np.asarray(positive, dtype=float)
+    count = np.asarray(count, dtype=np.int64)
+    rate = np.where(count > 0, positive / np.maximum(count, 1), 0.0)
+    rng = np.random.default_rng(seed)
+    
+    deadline = None
+    if time_budget_ms:
+        deadline = time.perf_counter() + time_budget_ms / 1000.0
+    
+    samples = []
+    done = 0
+    while done < iterations:
+        size = min(chunk_size, iterations - done)
+        draws = rng.binomial(count[:, None], rate[:, None], size=(len(count), size))
+        sampled_rates = draws / np.maximum(count, 1)[:, None]
+        seg_min = np.minimum.reduceat(sampled_rates, segment_starts, axis=0)
+        seg_max = np.maximum.reduceat(sampled_rates, segment_starts, axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            samples.append(np.where(seg_max > 0, seg_min / seg_max, 1.0))
+        done += size
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+    
+    if not samples:
+        nan = np.full(len(segment_starts), np.nan)
+        return {"lower": nan, "upper": nan, "iterations": 0}
+    
+    ratios = np.concatenate(samples, axis=1)
+    tail = (1 - confidence) / 2 * 100
+    return {
+        "lower": np.percentile(ratios, tail, axis=1),
+        "upper": np.percentile(ratios, 100 - tail, axis=1),
+        "iterations": done
+    }
@@ -0,0 +1 @@
+# Offline benchmark suite. Run with: python -m benchmarks.run
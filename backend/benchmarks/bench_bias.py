@@ -0,0 +1,242 @@
+import json
+import os
+import uuid
+import shutil
+import tempfile
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from typing import Dict
+
+from app.core.database import Base
+from app.models.audit_log import AuditLog
+from app.models.bias_analysis import Explanation
+from app.services.audit_archive import AuditArchiveService
+from app.services.bias_detection import PROTECTED_ATTRIBUTES, BiasDetectionService
+from app.services.cohort_store import read_cohort, write_cohort
+from app.services.explainability import ExplainabilityService
+from app.services.explanation_storage import ExplanationStore
+from app.services.outcome_metrics import OutcomeFairnessScanner
+from app.services.promotion_ranking import PromotionRankingService
+from app.services.scoring_rules import CompiledRules, MetricFeatures, expand_grid
+from benchmarks.harness import measure
+from benchmarks.synthetic import SyntheticHRData
+
+
+def run(quick: bool = False) -> Dict[str, Dict[str, float]]:
+    """Micro-benchmarks for each BiasDetectionService stage"""
+    service = BiasDetectionService()
+    results = {}
+    sizes = [100, 1000] if quick else [100, 1000, 10000]
+    workdir = tempfile.mkdtemp(prefix="glassbox-bench-")
+    stored_metrics = []
+    
+    for size in sizes:
+        data = SyntheticHRData(cohort_size=size)
+        for decision_type in ["promotion", "compensation"]:
+            cohort = data.cohort(decision_type)
+            decision = data.decision(decision_type)
+            metrics = service._calculate_fairness_metrics(decision, cohort, decision_type)
+            patterns = service._detect_patterns(decision, cohort, metrics)
+            stored_metrics.append(metrics)
+            prefix = f"bias.{decision_type}.n{size}"
+            cohort_path = os.path.join(workdir, f"{decision_type}-{size}.gbc")
+            write_cohort(cohort_path, cohort)
+            
+            stages = {
+                "fairness_metrics": lambda: service._calculate_fairness_metrics(decision, cohort, decision_type),
+                "demographic_parity": lambda: service._analyze_demographic_parity(decision, cohort),
+                "outcome_deviations": lambda: service._analyze_outcome_deviations(decision, cohort),
+                "detect_patterns": lambda: service._detect_patterns(decision, cohort, metrics),
+                "risk_score": lambda: service._calculate_risk_score(metrics, patterns),
+                "analyze_bias": lambda: service.analyze_bias(decision, cohort, decision_type),
+                # Stored cohort: memory-map plus analysis
+                "analyze_bias_columnar": lambda: service.analyze_bias(
+                    decision, read_cohort(cohort_path), decision_type
+                )
+            }
+            for stage, fn in stages.items():
+                results[f"{prefix}.{stage}"] = measure(fn, repeat=3 if quick else 5)
+    
+    # What-if scoring: a 12-setting grid over 100k stored analyses
+    _, rule_sets = expand_grid(service.rules, {
+        "z_score.moderate": [1.5, 2.0, 2.5],
+        "risk_levels.high": [0.5, 0.6, 0.7, 0.8]
+    }, max_settings=12)
+    features = MetricFeatures.from_metrics(stored_metrics * (100000 // len(stored_metrics)))
+    evaluator = CompiledRules(rule_sets)
+    results["bias.simulate.n100000.grid12"] = measure(lambda: evaluator.evaluate(features), repeat=3 if quick else 5)
+    
+    # Pool screening: every member of a bonus pool against the pool
+    for size in [1000, 10000]:
+        pool = SyntheticHRData(cohort_size=size).cohort("compensation")
+        results[f"bias.compensation.n{size}.analyze_pool"] = measure(
+            lambda: service.analyze_pool(pool, pool, "compensation"), repeat=3 if quick else 5
+        )
+    
+    # Promotion slate: 500 of 50k candidates, balanced over three groups
+    ranking = PromotionRankingService(service, None, None)
+    rng = np.random.default_rng(0)
+    scores = rng.gamma(2.0, 1.0, 50000)
+    groups = rng.integers(0, 3, 50000)
+    scores[groups == 2] *= 0.7
+    results["promotion.rank.n50000.slots500"] = measure(
+        lambda: ranking.rank(scores, 500, groups), repeat=3 if quick else 5
+    )
+    
+    # Outcome metrics: 100k finalized decisions against later retention and ratings
+    n = 100000
+    history = {
+        "decision_type": rng.choice(np.array(["promotion", "appraisal", "hiring"], dtype=object), n),
+        "gender": rng.choice(np.array(["female", "male", None], dtype=object), n),
+        "age_group": rng.choice(np.array(["<30", "30-50", ">50"], dtype=object), n),
+        "ethnicity": rng.choice(np.array(["a", "b", "c", "d", None], dtype=object), n),
+        "outcome": np.where(rng.random(n) < 0.5, rng.random(n) * 5, rng.integers(0, 2, n)),
+        "retention": rng.integers(0, 2, n).astype(float),
+        "rating": np.where(rng.random(n) < 0.3, np.nan, rng.integers(0, 2, n))
+    }
+    scanner = OutcomeFairnessScanner()
+    results["outcome_metrics.compute.n100000"] = measure(lambda: scanner.compute(history), repeat=3 if quick else 5)
+    
+    # Same history with no protected attribute disclosed: nothing to group by
+    undisclosed = {**history, **{attr: np.full(n, None, dtype=object) for attr in PROTECTED_ATTRIBUTES}}
+    results["outcome_metrics.compute.undisclosed.n100000"] = measure(
+        lambda: scanner.compute(undisclosed), repeat=3 if quick else 5
+    )
+    
+    results.update(_explanation_storage(service, workdir, 500 if quick else 2000))
+    results.update(_audit_tiers(workdir, 20000 if quick else 100000))
+    
+    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def _explanation_storage(service: BiasDetectionService, workdir: str, n: int) -> Dict[str, Dict[str, float]]:
+    """
+    Explanation rows stored as plain text and after compress_legacy
+    
+    "load" reads full rows as the API does, leaving prompts and responses
+    encoded; "read" also decodes every one of them; "scan" filters on a
+    column stored after them, as table scans and exports do. Read results
+    carry "file_bytes", the vacuumed SQLite file size.
+    """
+    path = os.path.join(workdir, "explanations.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    
+    # Gemini-sized prompts and responses: real prompts, template explanations as responses
+    data = SyntheticHRData(cohort_size=200)
+    cohort = data.cohort("promotion")
+    analysis = service.analyze_bias(data.decision("promotion"), cohort, "promotion")
+    explainer = ExplainabilityService()
+    rows = []
+    for i, profile in enumerate(data.profiles(n)):
+        explanation = explainer._generate_template_explanation(profile, analysis, "promotion")
+        rows.append({
+            "id": f"e{i:06d}",
+            "justification": explanation.justification,
+            "key_factors": explanation.key_factors,
+            "alternatives": explanation.alternatives,
+            "legacy_prompt": explainer._build_explanation_prompt(profile, analysis, cohort, "promotion"),
+            "legacy_response": json.dumps({
+                "justification": explanation.justification,
+                "key_factors": explanation.key_factors,
+                "alternatives": explanation.alternatives
+            }, indent=2),
+            "source": "gemini"
+        })
+    with Session() as db:
+        db.bulk_insert_mappings(Explanation, rows)
+        db.commit()
+    
+    def load_all():
+        with Session() as db:
+            db.query(Explanation).all()
+    
+    def read_all():
+        with Session() as db:
+            for explanation in db.query(Explanation):
+                explanation.gemini_prompt, explanation.gemini_response
+    
+    def scan():
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT COUNT(*) FROM explanations WHERE source = 'template'").scalar()
+    
+    def file_bytes():
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+        return os.path.getsize(path)
+    
+    # Sized (and vacuumed) before timing, so both layouts are read unfragmented
+    results = {}
+    plain_bytes = file_bytes()
+    results[f"explanations.load.plain.n{n}"] = measure(load_all, repeat=5)
+    results[f"explanations.read.plain.n{n}"] = {**measure(read_all, repeat=5), "file_bytes": plain_bytes}
+    results[f"explanations.scan.plain.n{n}"] = measure(scan, repeat=5)
+    
+    def compress():
+        with Session() as db:
+            ExplanationStore().compress_legacy(db)
+    
+    results[f"explanations.compress_legacy.n{n}"] = measure(compress, repeat=1, warmup=0, min_time=0)
+    compressed_bytes = file_bytes()
+    results[f"explanations.load.compressed.n{n}"] = measure(load_all, repeat=5)
+    results[f"explanations.read.compressed.n{n}"] = {**measure(read_all, repeat=5), "file_bytes": compressed_bytes}
+    results[f"explanations.scan.compressed.n{n}"] = measure(scan, repeat=5)
+    engine.dispose()
+    return results
+
+
+def _audit_tiers(workdir: str, n: int) -> Dict[str, Dict[str, float]]:
+    """
+    Audit history lookups with a year of entries, all in the table and after rollover
+    
+    A "recent" decision was created inside the hot window, an "old" one a
+    year ago; the n entries are spread evenly over 1000 decisions.
+    """
+    path = os.path.join(workdir, "audit.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    
+    now = datetime(2026, 1, 15)
+    rng = np.random.default_rng(0)
+    decision_ids = [str(uuid.UUID(int=int(i))) for i in range(1000)]
+    created = {decision_id: now - timedelta(days=365 - i * 365 / 1000) for i, decision_id in enumerate(decision_ids)}
+    rows = []
+    for i in range(n):
+        decision_id = decision_ids[i % 1000]
+        rows.append({
+            "id": str(uuid.UUID(int=n + i)),
+            "decision_id": decision_id,
+            "user_id": "bench",
+            "action": "decision_updated",
+            "details": {"field": "outcome", "value": float(rng.random())},
+            "created_at": created[decision_id] + timedelta(days=float(rng.random()) * 30)
+        })
+    with Session() as db:
+        db.bulk_insert_mappings(AuditLog, rows)
+        db.commit()
+    
+    audit = AuditArchiveService(os.path.join(workdir, "audit_archive"), hot_months=3)
+    old, recent = decision_ids[0], decision_ids[-1]
+    
+    def history(decision_id):
+        with Session() as db:
+            audit.history(db, decision_id, since=created[decision_id])
+    
+    results = {}
+    results[f"audit.history.recent.table.n{n}"] = measure(lambda: history(recent), repeat=5)
+    results[f"audit.history.old.table.n{n}"] = measure(lambda: history(old), repeat=5)
+    
+    def rollover():
+        with Session() as db:
+            audit.rollover(db, now=now)
+    
+    results[f"audit.rollover.n{n}"] = measure(rollover, repeat=1, warmup=0, min_time=0)
+    results[f"audit.history.recent.tiered.n{n}"] = measure(lambda: history(recent), repeat=5)
+    results[f"audit.history.old.tiered.n{n}"] = measure(lambda: history(old), repeat=5)
+    engine.dispose()
+    return results
@@ -0,0 +1,118 @@
+import io
+import json
+import time
+from typing import Dict, List, Any, Optional
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.container import services
+from benchmarks.harness import measure
+from benchmarks.synthetic import SyntheticHRData
+
+# Roughly a hosted model's response time for an explanation-sized reply
+STUB_LLM_LATENCY_SECONDS = 0.8
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubGeminiModel:
+    """Offline stand-in for genai.GenerativeModel"""
+    
+    def generate_content(self, prompt: str) -> StubResponse:
+        time.sleep(STUB_LLM_LATENCY_SECONDS)
+        return StubResponse(json.dumps({
+            "justification": "Stub justification for benchmarking.",
+            "key_factors": [{"factor": "Performance", "weight": 8, "description": "Stub"}],
+            "alternatives": ["Stub alternative"]
+        }))
+
+
+def _authenticated_client() -> TestClient:
+    client = TestClient(app)
+    # Entering the client runs the lifespan (schema + services)
+    client.__enter__()
+    credentials = {"email": "bench@example.com", "password": "bench-password"}
+    client.post("/api/v1/auth/register", json={**credentials, "full_name": "Benchmark"})
+    token = client.post(
+        "/api/v1/auth/login",
+        data={"username": credentials["email"], "password": credentials["password"]}
+    ).json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+def run(quick: bool = False) -> Dict[str, Dict[str, float]]:
+    """End-to-end endpoint load through the FastAPI test client"""
+    client = _authenticated_client()
+    services.explainability.model = StubGeminiModel()
+    data = SyntheticHRData(cohort_size=200 if quick else 1000)
+    results = {}
+    
+    upload_rows = 500 if quick else 2000
+    payload = json.dumps(data.profiles(upload_rows)).encode()
+    
+    def upload():
+        response = client.post(
+            "/api/v1/decisions/upload",
+            params={"decision_type": "promotion"},
+            files={"file": ("decisions.json", io.BytesIO(payload), "application/json")}
+        )
+        response.raise_for_status()
+    
+    results[f"endpoint.upload.rows{upload_rows}"] = measure(upload, repeat=3, warmup=0, min_time=0)
+    
+    cohort = data.cohort()
+    
+    def create_and_analyze(employee_data: Dict[str, Any], peers: Optional[List[Dict[str, Any]]] = None):
+        body = {"decision_type": "promotion", "employee_data": employee_data}
+        if peers is not None:
+            body["comparable_cohort"] = peers
+        decision_id = client.post("/api/v1/decisions/create", json=body).json()["id"]
+        client.post(f"/api/v1/decisions/{decision_id}/analyze").raise_for_status()
+        return decision_id
+    
+    results["endpoint.create_analyze.client_cohort"] = measure(lambda: create_and_analyze(data.decision(), cohort), repeat=5)
+    results["endpoint.create_analyze.server_cohort"] = measure(lambda: create_and_analyze(data.decision()), repeat=5)
+    
+    # Analyzed decisions without an explanation, one per explain call (warmup
+    # included). An unskewed cohort with large cells leaves them low risk,
+    # the share the routing default explains from templates
+    fair = SyntheticHRData(cohort_size=1000, attribute_cardinality=2, protected_skew=0.0)
+    fair_cohort = fair.cohort()
+    unexplained = [create_and_analyze(fair.decision(), fair_cohort) for _ in range(22)]
+    
+    def explain(detailed: bool):
+        decision_id = unexplained.pop()
+        client.post(f"/api/v1/decisions/{decision_id}/explain", params={"detailed": detailed}).raise_for_status()
+    
+    # Gemini tier (stubbed) and the routing default, which explains low-risk decisions from templates
+    results["endpoint.explain.stub_llm"] = measure(lambda: explain(True), repeat=5, min_time=0)
+    results["endpoint.explain.routed"] = measure(lambda: explain(False), repeat=15, min_time=0)
+    
+    for path in ["dashboard", "bias-trends", "fairness-metrics"]:
+        results[f"endpoint.analytics.{path}"] = measure(
+            lambda: client.get(f"/api/v1/analytics/{path}").raise_for_status(), repeat=5
+        )
+    
+    # Last, so the rows it adds do not grow the pools measured above
+    bulk_payload = "\n".join(
+        json.dumps({"decision_type": "promotion", "employee_data": profile})
+        for profile in data.profiles(upload_rows)
+    ).encode()
+    
+    def bulk_create():
+        response = client.post(
+            "/api/v1/decisions/bulk",
+            content=bulk_payload,
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+        response.raise_for_status()
+    
+    results[f"endpoint.bulk.rows{upload_rows}"] = measure(bulk_create, repeat=3, warmup=0, min_time=0)
+    
+    client.__exit__(None, None, None)
+    return results
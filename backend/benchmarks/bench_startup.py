@@ -0,0 +1,63 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Hard limit for importing the API module in a fresh interpreter
+IMPORT_BUDGET_SECONDS = 2.0
+
+# SDKs that must only be imported on first use
+LAZY_MODULES = ["google.generativeai", "scipy", "pandas"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def _probe() -> dict:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(lazy=LAZY_MODULES)],
+        cwd=backend_dir,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(quick: bool = False) -> Tuple[Dict[str, Dict[str, float]], List[str]]:
+    """
+    Measure cold import time of app.main in fresh interpreters
+    
+    Returns:
+        Benchmark results and a list of budget violations
+    """
+    probes = [_probe() for _ in range(3 if quick else 5)]
+    seconds = [probe["seconds"] for probe in probes]
+    results = {
+        "startup.import_app_main": {
+            "median": statistics.median(seconds),
+            "min": min(seconds),
+            "max": max(seconds)
+        }
+    }
+    
+    violations = []
+    if results["startup.import_app_main"]["median"] > IMPORT_BUDGET_SECONDS:
+        violations.append(
+            f"importing app.main took {results['startup.import_app_main']['median']:.2f}s "
+            f"(budget {IMPORT_BUDGET_SECONDS:.2f}s)"
+        )
+    eager = sorted({module for probe in probes for module in probe["loaded"]})
+    if eager:
+        violations.append(f"heavy modules imported at startup: {', '.join(eager)}")
+    
+    return results, violations
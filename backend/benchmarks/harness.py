@@ -0,0 +1,48 @@
+import time
+import statistics
+from typing import Callable, Dict, Any
+
+
+def measure(
+    fn: Callable[[], Any],
+    repeat: int = 5,
+    number: int = 1,
+    warmup: int = 1,
+    min_time: float = 0.2
+) -> Dict[str, float]:
+    """
+    Time a callable
+    
+    Rounds continue past repeat until min_time seconds have been timed, so
+    the best round of a fast callable is drawn from a spread of moments
+    rather than one burst of background load.
+    
+    Args:
+        fn: Zero-argument callable to time
+        repeat: Minimum number of timed rounds
+        number: Calls per round
+        warmup: Untimed calls before measuring
+        min_time: Minimum total seconds of timed rounds; 0 runs exactly
+            repeat rounds, for callables that consume prepared state
+        
+    Returns:
+        Dict with median, min and max seconds per call
+    """
+    for _ in range(warmup):
+        fn()
+    
+    rounds = []
+    timed = 0.0
+    while len(rounds) < repeat or timed < min_time:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        timed += elapsed
+        rounds.append(elapsed / number)
+    
+    return {
+        "median": statistics.median(rounds),
+        "min": min(rounds),
+        "max": max(rounds)
+    }
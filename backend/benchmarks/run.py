@@ -0,0 +1,116 @@
+"""
+Run the benchmark suite offline and compare against stored baselines
+
+    python -m benchmarks.run                  # full run, fail on regressions
+    python -m benchmarks.run --quick          # smaller inputs
+    python -m benchmarks.run --update-baseline
+
+Regressions compare each benchmark's best round with the stored one:
+background load only ever adds time, so the minimum is the statistic least
+moved by a busy machine. The startup group also enforces a hard import-time
+budget for app.main.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BASELINE_PATH = Path(__file__).parent / "baselines.json"
+
+
+def _configure_environment(workdir: str):
+    """Point the app at a throwaway database and disable external services"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["DEBUG"] = "False"
+    os.environ["GEMINI_API_KEY"] = ""
+    os.environ["COHORT_STORE_DIR"] = os.path.join(workdir, "cohorts")
+
+
+def _extras(stats: dict) -> dict:
+    """Measurements of a result other than its timings"""
+    return {key: value for key, value in stats.items() if key not in ("median", "min", "max")}
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """Return (name, baseline, current, ratio) of best rounds for every regressed benchmark"""
+    threshold = baseline.get("threshold", 1.5)
+    # Ignore jitter on millisecond stages
+    min_delta = baseline.get("min_delta_seconds", 0.002)
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        # Baselines from before best rounds were stored only have the median
+        best = reference.get("min", reference["median"])
+        ratio = stats["min"] / best if best > 0 else 1.0
+        limit = reference.get("threshold", threshold)
+        if ratio > limit and stats["min"] - best > min_delta:
+            regressions.append((name, best, stats["min"], ratio))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="GlassBox AI benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="Use smaller inputs")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the stored baselines")
+    parser.add_argument("--only", choices=["startup", "bias", "endpoints"], help="Run one group only")
+    parser.add_argument("--threshold", type=float, help="Override the regression ratio threshold")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure_environment(workdir)
+        
+        # Imported after the environment is set so settings pick it up
+        from benchmarks import bench_startup, bench_bias, bench_endpoints
+        
+        results = {}
+        violations = []
+        if args.only in (None, "startup"):
+            startup_results, violations = bench_startup.run(quick=args.quick)
+            results.update(startup_results)
+        if args.only in (None, "bias"):
+            results.update(bench_bias.run(quick=args.quick))
+        if args.only in (None, "endpoints"):
+            results.update(bench_endpoints.run(quick=args.quick))
+    
+    width = max(len(name) for name in results)
+    print(f"{'':<{width}}  {'median':>13}  {'best':>13}")
+    for name, stats in sorted(results.items()):
+        # Extra measurements, e.g. file_bytes, follow the timings
+        extras = "".join(f"  {key}={value}" for key, value in sorted(_extras(stats).items()))
+        print(f"{name:<{width}}  {stats['median'] * 1000:10.3f} ms  {stats['min'] * 1000:10.3f} ms{extras}")
+    
+    for violation in violations:
+        print(f"BUDGET EXCEEDED: {violation}")
+    
+    if args.update_baseline:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        baseline.setdefault("threshold", 1.5)
+        baseline.setdefault("min_delta_seconds", 0.002)
+        baseline.setdefault("results", {}).update({
+            name: {"median": float(f"{stats['median']:.4g}"), "min": float(f"{stats['min']:.4g}"), **_extras(stats)}
+            for name, stats in results.items()
+        })
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baselines written to {BASELINE_PATH}")
+        return 1 if violations else 0
+    
+    if not BASELINE_PATH.exists():
+        print("No baselines stored yet; run with --update-baseline")
+        return 1 if violations else 0
+    
+    baseline = json.loads(BASELINE_PATH.read_text())
+    if args.threshold:
+        baseline["threshold"] = args.threshold
+    regressions = compare(results, baseline)
+    for name, reference, current, ratio in regressions:
+        print(f"REGRESSION {name}: best {reference * 1000:.3f} ms -> {current * 1000:.3f} ms ({ratio:.2f}x)")
+    
+    return 1 if regressions or violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import numpy as np
+from typing import List, Dict, Any, Optional
+
+from app.services.bias_detection import OUTCOME_KEYS
+
+
+class SyntheticHRData:
+    """Seeded generator for synthetic HR decision data"""
+    
+    def __init__(
+        self,
+        cohort_size: int = 1000,
+        attribute_cardinality: int = 3,
+        protected_skew: float = 0.2,
+        departments: int = 5,
+        seed: int = 7
+    ):
+        """
+        Args:
+            cohort_size: Number of peer profiles per cohort
+            attribute_cardinality: Number of distinct values per protected attribute
+            protected_skew: Selection-rate penalty applied to the first group of each attribute
+            departments: Number of distinct departments
+            seed: RNG seed so runs are comparable
+        """
+        self.cohort_size = cohort_size
+        self.attribute_cardinality = attribute_cardinality
+        self.protected_skew = protected_skew
+        self.departments = departments
+        self.rng = np.random.default_rng(seed)
+    
+    def profiles(self, count: int, decision_type: str = "promotion") -> List[Dict[str, Any]]:
+        """Generate employee profiles with outcomes for a decision type"""
+        rng = self.rng
+        k = self.attribute_cardinality
+        gender = rng.integers(0, k, count)
+        age_group = rng.integers(0, k, count)
+        ethnicity = rng.integers(0, k, count)
+        
+        # First group of each attribute is selected less often
+        penalty = self.protected_skew * ((gender == 0).astype(float) + (ethnicity == 0))
+        selected = rng.random(count) < np.clip(0.6 - penalty, 0.05, 0.95)
+        rating = np.clip(np.round(rng.normal(3.5, 0.8, count) - penalty, 1), 1, 5)
+        increase = np.round(np.clip(rng.normal(5.0, 2.0, count) - 5 * penalty, 0, None), 2)
+        
+        outcome_key = OUTCOME_KEYS.get(decision_type, "outcome")
+        outcome_values = {
+            "selected": selected,
+            "promoted": selected,
+            "retained": selected,
+            "performance_rating": rating,
+            "salary_increase": increase
+        }
+        
+        experience = rng.integers(0, 25, count)
+        tenure = np.minimum(rng.integers(0, 15, count), experience)
+        role_level = rng.integers(1, 6, count)
+        department = rng.integers(0, self.departments, count)
+        
+        profiles = []
+        for i in range(count):
+            profile = {
+                "employee_id": f"emp-{i}",
+                "department": f"dept-{department[i]}",
+                "experience_years": int(experience[i]),
+                "tenure_years": int(tenure[i]),
+                "performance_rating": float(rating[i]),
+                "role_level": int(role_level[i]),
+                "gender": f"gender-{gender[i]}",
+                "age_group": f"age-{age_group[i]}",
+                "ethnicity": f"ethnicity-{ethnicity[i]}",
+                "outcome": "selected" if selected[i] else "rejected"
+            }
+            value = outcome_values.get(outcome_key, selected)[i]
+            profile[outcome_key] = value.item() if hasattr(value, "item") else value
+            profiles.append(profile)
+        
+        return profiles
+    
+    def cohort(self, decision_type: str = "promotion", size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Generate a comparable cohort"""
+        return self.profiles(size or self.cohort_size, decision_type)
+    
+    def decision(self, decision_type: str = "promotion") -> Dict[str, Any]:
+        """Generate a single decision's employee data"""
+        return self.profiles(1, decision_type)[0]